@@ -1,10 +1,31 @@
+import re
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from chart_cache import FigureCache, get_or_build
+from exporters import TextItineraryRenderer, export_csv
+from gazetteer import PlaceNormalizer, get_gazetteer
+from importers import import_days
+from itinerary import (ACCOMMODATION_TYPES, COST_FIELDS, Itinerary, OPTIONAL_FIELDS, REQUIRED_FIELDS,
+                       TRANSPORT_TYPES)
+from profiling import PROFILE_QUERY_PARAM, PROFILER, profiling_forced, session_state_size, widgets_this_run
+from schema import BUDGET_SCHEMA, TRIP_INFO_SCHEMA
+from session_store import checkin_current_session, checkout_current_session, get_session_store
+
+# Streamlit 1.50+ accepts a callable as download data and only runs it when the
+# button is clicked; older versions need the bytes up front
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, 'add_deferred')
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
 # Page configuration
 st.set_page_config(
     page_title="Backpacking Trip Planner",
@@ -13,194 +34,255 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ============================================================================
+# LOOKUP TABLES
+# ============================================================================
+# Built once per process and shared by every session and rerun
+
+DAILY_RATES = {
+    "Budget Backpacker": (25, 40),
+    "Mid-range Explorer": (40, 70),
+    "Comfort Traveller": (70, 120)
+}
+
+TRANSPORT_EMOJI = {
+    'Bus': '🚌', 'Bus (overnight)': '🚌', 'Train': '🚂', 'Train (overnight)': '🚂',
+    'Plane': '✈️', 'Ferry': '⛴️', 'Car/Taxi': '🚗', 'Walking': '🚶',
+    'Local Transport': '🚊', 'Cycling': '🚴'
+}
+
+ACCOMMODATION_EMOJI = {
+    'Hostel': '🏠', 'Hotel': '🏨', 'Guesthouse': '🏡', 'Camping': '⛺',
+    'Bus (sleeping)': '🚌', 'Train (sleeping)': '🚂', 'Airbnb': '🏠',
+    'Couchsurfing': '🛋️', "Friend's place": '👥', 'None (transit day)': '🚶'
+}
+
+TRAVEL_STYLES = [
+    "🎒 Budget Backpacker (£25-40/day)",
+    "🌟 Mid-range Explorer (£40-70/day)",
+    "💎 Comfort Traveller (£70+/day)"
+]
+TRANSPORT_PREFERENCES = ["🚌 Bus", "🚂 Train", "🔄 Mix of Both", "✈️ Airlines", "🚗 Car Rental"]
+ACCOMMODATION_PREFERENCES = ["🏠 Hostels", "🏨 Hotels", "🏡 Mix of Both", "⛺ Camping", "🏘️ Local Stays"]
+
+# Selectbox positions by value, instead of list.index() on every render
+TRANSPORT_TYPE_INDEX = {value: i for i, value in enumerate(TRANSPORT_TYPES)}
+ACCOMMODATION_TYPE_INDEX = {value: i for i, value in enumerate(ACCOMMODATION_TYPES)}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
 def calculate_suggested_budget(travel_style, days):
     """Calculate suggested budget based on travel style and duration"""
-    daily_rates = {
-        "Budget Backpacker": (25, 40),
-        "Mid-range Explorer": (40, 70),
-        "Comfort Traveller": (70, 120)
-    }
-    
     style_key = travel_style.split('(')[0].strip()
     
-    if style_key in daily_rates:
-        low, high = daily_rates[style_key]
+    if style_key in DAILY_RATES:
+        low, high = DAILY_RATES[style_key]
         return (low + high) / 2 * days
     
     return 50 * days
 
 def calculate_day_completion(day_data):
     """Calculate completion percentage for a day's planning"""
-    required_fields = ['location', 'transport_from', 'transport_to', 'accommodation_type']
-    optional_fields = ['date', 'transport_time', 'accommodation_name', 'notes']
-    
-    required_completed = sum(1 for field in required_fields if day_data.get(field))
-    required_score = (required_completed / len(required_fields)) * 0.7
+    required_completed = sum(1 for field in REQUIRED_FIELDS if day_data.get(field))
+    required_score = (required_completed / len(REQUIRED_FIELDS)) * 0.7
     
-    optional_completed = sum(1 for field in optional_fields if day_data.get(field))
-    optional_score = (optional_completed / len(optional_fields)) * 0.3
+    optional_completed = sum(1 for field in OPTIONAL_FIELDS if day_data.get(field))
+    optional_score = (optional_completed / len(OPTIONAL_FIELDS)) * 0.3
     
     return required_score + optional_score
 
+def completion_indicator(completion):
+    """Traffic-light emoji for a day's completion score"""
+    return "🟢" if completion >= 0.8 else "🟡" if completion >= 0.4 else "🔴"
+
+def completion_indicators(scores):
+    """completion_indicator() for a whole array of scores"""
+    return np.where(scores >= 0.8, "🟢", np.where(scores >= 0.4, "🟡", "🔴"))
+
 def get_transport_emoji(transport_type):
     """Get emoji for transport type"""
-    emoji_map = {
-        'Bus': '🚌', 'Bus (overnight)': '🚌', 'Train': '🚂', 'Train (overnight)': '🚂',
-        'Plane': '✈️', 'Ferry': '⛴️', 'Car/Taxi': '🚗', 'Walking': '🚶',
-        'Local Transport': '🚊', 'Cycling': '🚴'
-    }
-    return emoji_map.get(transport_type, '🚌')
+    return TRANSPORT_EMOJI.get(transport_type, '🚌')
 
 def get_accommodation_emoji(accommodation_type):
     """Get emoji for accommodation type"""
-    emoji_map = {
-        'Hostel': '🏠', 'Hotel': '🏨', 'Guesthouse': '🏡', 'Camping': '⛺',
-        'Bus (sleeping)': '🚌', 'Train (sleeping)': '🚂', 'Airbnb': '🏠',
-        'Couchsurfing': '🛋️', "Friend's place": '👥', 'None (transit day)': '🚶'
-    }
-    return emoji_map.get(accommodation_type, '🏠')
+    return ACCOMMODATION_EMOJI.get(accommodation_type, '🏠')
+
+def category_options(choices, index, value):
+    """Selectbox options and position for a stored value; an unknown value is offered as-is"""
+    if value in index:
+        return choices, index[value]
+    return choices + [value], len(choices)
+
+DAY_PAGE_SIZES = [10, 25, 50, 100]
+COMPLETION_FILTERS = ["All days", "🔴 Not started", "🟡 In progress", "🟢 Complete"]
+
+# Bulk day operations
+MAX_GENERATED_DAYS = 1000
+BULK_COST_TARGETS = {
+    "Transport + accommodation": COST_FIELDS,
+    "Transport": ['transport_cost'],
+    "Accommodation": ['accommodation_cost']
+}
+BULK_COST_UNITS = ["£", "%"]
+IMPORT_MODES = ["Append to itinerary", "Replace itinerary"]
+IMPORT_FILE_TYPES = ["csv", "gz", "json", "jsonl"]
+PLACE_SUGGESTIONS = 8
 
 # ============================================================================
 # CSS STYLING
 # ============================================================================
 
+# Written as readable CSS, sent minified: the block is re-sent on every rerun
+APP_CSS_SOURCE = """
+<style>
+/* Hide sidebar */
+section[data-testid="stSidebar"] {
+    display: none !important;
+}
+
+/* Modern color palette */
+:root {
+    --primary: #667eea;
+    --secondary: #f5576c;
+    --success: #4facfe;
+    --warning: #fa709a;
+}
+
+/* Main container */
+.main .block-container {
+    padding: 1rem;
+    max-width: 1400px;
+}
+
+/* Header styling */
+.app-header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 3rem 2rem;
+    border-radius: 16px;
+    text-align: center;
+    margin-bottom: 2rem;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
+}
+
+.app-header h1 {
+    font-size: 3rem;
+    font-weight: 700;
+    margin: 0;
+    text-shadow: 0 2px 4px rgba(0,0,0,0.2);
+}
+
+.app-header p {
+    font-size: 1.2rem;
+    margin: 1rem 0 0 0;
+    opacity: 0.9;
+}
+
+/* Card styling */
+.card {
+    background: white;
+    border-radius: 12px;
+    padding: 2rem;
+    border: 1px solid #e2e8f0;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+    margin-bottom: 2rem;
+    transition: all 0.3s ease;
+}
+
+.card:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 8px 25px rgba(0,0,0,0.1);
+}
+
+/* Section headers */
+.section-header {
+    font-size: 2.5rem;
+    font-weight: 600;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    text-align: center;
+    margin: 2rem 0;
+}
+
+/* Enhanced buttons */
+.stButton > button {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: none;
+    border-radius: 8px;
+    font-weight: 600;
+    transition: all 0.3s ease;
+}
+
+.stButton > button:hover {
+    transform: translateY(-1px);
+    box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3);
+}
+
+/* Transport section styling */
+.transport-section {
+    background: linear-gradient(135deg, #e6f3ff 0%, #cce7ff 100%);
+    padding: 1.5rem;
+    border-radius: 12px;
+    border: 2px solid #b3d9ff;
+    margin-bottom: 1rem;
+}
+
+/* Accommodation section styling */
+.accommodation-section {
+    background: linear-gradient(135deg, #fff0f5 0%, #ffe4e8 100%);
+    padding: 1.5rem;
+    border-radius: 12px;
+    border: 2px solid #ffb3c1;
+    margin-bottom: 1rem;
+}
+
+/* Session warning */
+.session-warning {
+    background: linear-gradient(135deg, #fff3cd 0%, #ffeaa7 100%);
+    border: 2px solid #f39c12;
+    border-radius: 12px;
+    padding: 1rem;
+    margin-bottom: 2rem;
+    text-align: center;
+}
+
+/* Metrics styling */
+[data-testid="metric-container"] {
+    background: white;
+    border: 1px solid #e2e8f0;
+    border-radius: 12px;
+    padding: 1rem;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+}
+
+/* Mobile responsiveness */
+@media (max-width: 768px) {
+    .app-header h1 { font-size: 2rem; }
+    .main .block-container { padding: 0.5rem; }
+    .card { padding: 1rem; }
+}
+</style>
+"""
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and collapse whitespace"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).strip()
+
+
+APP_CSS = _minify_css(APP_CSS_SOURCE)
+
+
 def load_css():
-    st.markdown("""
-    <style>
-    /* Hide sidebar */
-    section[data-testid="stSidebar"] {
-        display: none !important;
-    }
-    
-    /* Modern color palette */
-    :root {
-        --primary: #667eea;
-        --secondary: #f5576c;
-        --success: #4facfe;
-        --warning: #fa709a;
-    }
-    
-    /* Main container */
-    .main .block-container {
-        padding: 1rem;
-        max-width: 1400px;
-    }
-    
-    /* Header styling */
-    .app-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        padding: 3rem 2rem;
-        border-radius: 16px;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-    }
-    
-    .app-header h1 {
-        font-size: 3rem;
-        font-weight: 700;
-        margin: 0;
-        text-shadow: 0 2px 4px rgba(0,0,0,0.2);
-    }
-    
-    .app-header p {
-        font-size: 1.2rem;
-        margin: 1rem 0 0 0;
-        opacity: 0.9;
-    }
-    
-    /* Card styling */
-    .card {
-        background: white;
-        border-radius: 12px;
-        padding: 2rem;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-        margin-bottom: 2rem;
-        transition: all 0.3s ease;
-    }
-    
-    .card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-    }
-    
-    /* Section headers */
-    .section-header {
-        font-size: 2.5rem;
-        font-weight: 600;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        text-align: center;
-        margin: 2rem 0;
-    }
-    
-    /* Enhanced buttons */
-    .stButton > button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        border-radius: 8px;
-        font-weight: 600;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-1px);
-        box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Transport section styling */
-    .transport-section {
-        background: linear-gradient(135deg, #e6f3ff 0%, #cce7ff 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border: 2px solid #b3d9ff;
-        margin-bottom: 1rem;
-    }
-    
-    /* Accommodation section styling */
-    .accommodation-section {
-        background: linear-gradient(135deg, #fff0f5 0%, #ffe4e8 100%);
-        padding: 1.5rem;
-        border-radius: 12px;
-        border: 2px solid #ffb3c1;
-        margin-bottom: 1rem;
-    }
-    
-    /* Session warning */
-    .session-warning {
-        background: linear-gradient(135deg, #fff3cd 0%, #ffeaa7 100%);
-        border: 2px solid #f39c12;
-        border-radius: 12px;
-        padding: 1rem;
-        margin-bottom: 2rem;
-        text-align: center;
-    }
-    
-    /* Metrics styling */
-    [data-testid="metric-container"] {
-        background: white;
-        border: 1px solid #e2e8f0;
-        border-radius: 12px;
-        padding: 1rem;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-    }
-    
-    /* Mobile responsiveness */
-    @media (max-width: 768px) {
-        .app-header h1 { font-size: 2rem; }
-        .main .block-container { padding: 0.5rem; }
-        .card { padding: 1rem; }
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Streamlit drops elements a rerun does not emit again, so the style tag
+    # has to be re-sent each run; it is built once per process
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # ============================================================================
 # SESSION STATE INITIALIZATION (No File Storage)
@@ -211,33 +293,31 @@ def init_session_state():
     
     # Initialize trip data (empty for each new session)
     if 'trip_data' not in st.session_state:
-        st.session_state.trip_data = []
+        st.session_state.trip_data = Itinerary()
 
     # Initialize budget data with defaults
     if 'budget_data' not in st.session_state:
-        st.session_state.budget_data = {
-            'total_budget': 1000.0,
-            'food_budget': 0.0,
-            'activities_budget': 0.0,
-            'shopping_budget': 0.0,
-            'misc_costs': 0.0,
-            'emergency_budget': 0.0,
-            'insurance_cost': 0.0,
-            'currency': 'GBP'
-        }
+        st.session_state.budget_data = BUDGET_SCHEMA.defaults()
 
     # Initialize trip info with defaults
     if 'trip_info' not in st.session_state:
-        st.session_state.trip_info = {
-            'name': '',
-            'start_date': None,
-            'end_date': None,
-            'destinations': '',
-            'travel_style': '🎒 Budget Backpacker (£25-40/day)',
-            'group_size': 1,
-            'transport_preference': '🚌 Bus',
-            'accommodation_preference': '🏠 Hostels'
-        }
+        st.session_state.trip_info = TRIP_INFO_SCHEMA.defaults()
+    
+    # Per-session LRU of built charts (backed by a process-wide one)
+    if 'figure_cache' not in st.session_state:
+        st.session_state.figure_cache = FigureCache(maxsize=16)
+    
+    # Per-day text blocks for the itinerary summary
+    if 'text_renderer' not in st.session_state:
+        st.session_state.text_renderer = TextItineraryRenderer()
+    
+    # Place names resolved to gazetteer entries, for hints and analytics
+    if 'place_normalizer' not in st.session_state:
+        st.session_state.place_normalizer = PlaceNormalizer()
+    
+    # Currently selected navigation section
+    if 'active_tab' not in st.session_state:
+        st.session_state.active_tab = "🌍 Trip Overview"
     
     # Track if this is a new session
     if 'session_initialized' not in st.session_state:
@@ -261,6 +341,7 @@ def session_info_banner():
     </div>
     """, unsafe_allow_html=True)
 
+@PROFILER.timed()
 def trip_overview():
     """Trip overview component"""
     st.markdown('<h2 class="section-header">🌍 Trip Overview</h2>', unsafe_allow_html=True)
@@ -319,11 +400,7 @@ def trip_overview():
         with col1:
             travel_style = st.selectbox(
                 "✈️ Travel Style", 
-                [
-                    "🎒 Budget Backpacker (£25-40/day)", 
-                    "🌟 Mid-range Explorer (£40-70/day)", 
-                    "💎 Comfort Traveller (£70+/day)"
-                ],
+                TRAVEL_STYLES,
                 index=0,
                 key="travel_style_input"
             )
@@ -340,14 +417,14 @@ def trip_overview():
         with col3:
             transport_preference = st.selectbox(
                 "🚌 Preferred Transport", 
-                ["🚌 Bus", "🚂 Train", "🔄 Mix of Both", "✈️ Airlines", "🚗 Car Rental"],
+                TRANSPORT_PREFERENCES,
                 key="transport_pref_input"
             )
         
         with col4:
             accommodation_preference = st.selectbox(
                 "🏨 Accommodation Style",
-                ["🏠 Hostels", "🏨 Hotels", "🏡 Mix of Both", "⛺ Camping", "🏘️ Local Stays"],
+                ACCOMMODATION_PREFERENCES,
                 key="accommodation_pref_input"
             )
         
@@ -378,140 +455,375 @@ def trip_overview():
                 if total_budget < suggested_budget * 0.8:
                     st.warning(f"💡 Consider budgeting £{suggested_budget:.0f} for {suggested_days} days")
 
+@PROFILER.timed()
 def day_by_day_planning():
     """Day-by-day planning component"""
     st.markdown('<h2 class="section-header">📅 Day-by-Day Planning</h2>', unsafe_allow_html=True)
     
     # Add days section
-    col1, col2, col3 = st.columns([2, 1, 1])
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     
     with col1:
         if st.button("➕ Add New Day", type="primary", key="add_day_btn"):
             add_new_day()
+            focus_day(len(st.session_state.trip_data) - 1)
             st.rerun()
     
     with col2:
-        days_to_add = st.number_input("Add Multiple", min_value=1, max_value=10, value=1, key="days_to_add_input")
+        days_to_add = st.number_input("Add Multiple", min_value=1, max_value=MAX_GENERATED_DAYS, value=1,
+                                      key="days_to_add_input")
     
     with col3:
+        template_day = st.number_input("Template day", min_value=1, value=None, key="template_day_input",
+                                       placeholder="Blank day", help="Copy every field except the date from this day")
+    
+    with col4:
         if st.button(f"Add {days_to_add} Days", key="add_multiple_days_btn"):
-            for _ in range(int(days_to_add)):
-                add_new_day()
+            generate_days(int(days_to_add), template_day)
+            focus_day(len(st.session_state.trip_data) - 1)
             st.rerun()
     
+    import_days_panel()
+    place_lookup()
+    
     if not st.session_state.trip_data:
         st.info("👆 Click 'Add New Day' to start planning your itinerary!")
         return
     
+    bulk_range_operations()
+    
     # Clear all button
     if len(st.session_state.trip_data) > 0:
         if st.button("🗑️ Clear All Days", type="secondary", key="clear_all_btn"):
-            st.session_state.trip_data = []
+            st.session_state.trip_data.clear()
             st.rerun()
     
+    # Only the current page of days gets widgets; the rest stay in the store
+    visible_days = day_list_pager()
+    focused_day_id = st.session_state.get('focused_day_id', st.session_state.trip_data.day_id(-1))
+    
+    # Scored for every day at once; reused across reruns until a day changes
+    completion_scores = st.session_state.trip_data.completion_scores()
+    revisions = st.session_state.trip_data.column('revision')
+    
     # Display days
-    for i, day_data in enumerate(st.session_state.trip_data):
+    for i in visible_days:
+        day_data = st.session_state.trip_data[i]
+        # Widget keys follow the day's stable id, not its position, so inserting,
+        # moving or deleting a day leaves the other days' widget state in place
+        day_id = st.session_state.trip_data.day_id(i)
+        # Form widgets also follow the row revision: any write to the day (a save,
+        # a bulk date shift or cost change) gives them fresh keys, so they show the
+        # stored values instead of stale widget state that a save would write back
+        form_key = f"{day_id}_{revisions[i]}"
         day_cost = day_data.get('transport_cost', 0.0) + day_data.get('accommodation_cost', 0.0)
-        completion = calculate_day_completion(day_data)
-        progress_indicator = "🟢" if completion >= 0.8 else "🟡" if completion >= 0.4 else "🔴"
+        completion = float(completion_scores[i])
+        progress_indicator = completion_indicator(completion)
         
         with st.expander(f"{progress_indicator} Day {day_data['day']} - {day_data.get('location', 'Location TBD')} | £{day_cost:.2f}", 
-                        expanded=i == len(st.session_state.trip_data) - 1):
-            
-            # Date and location
-            col1, col2 = st.columns(2)
-            with col1:
-                date = st.date_input("📅 Date", key=f"date_{i}", 
-                                   value=pd.to_datetime(day_data.get('date')).date() if day_data.get('date') else None)
-            with col2:
-                location = st.text_input("📍 Location", key=f"location_{i}", 
-                                       value=day_data.get('location', ''))
+                        expanded=day_id == focused_day_id):
             
-            # Transport and accommodation
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown('<div class="transport-section">', unsafe_allow_html=True)
-                st.markdown("#### 🚌 Transportation")
-                
-                transport_type = st.selectbox("Type", 
-                    ["Bus", "Train", "Plane", "Ferry", "Car/Taxi", "Walking"], 
-                    key=f"transport_type_{i}",
-                    index=["Bus", "Train", "Plane", "Ferry", "Car/Taxi", "Walking"].index(day_data.get('transport_type', 'Bus')))
+            # Edits are batched in a form and committed together on save
+            with st.form(key=f"day_form_{form_key}", border=False):
+                # Date and location
+                col1, col2 = st.columns(2)
+                with col1:
+                    date = st.date_input("📅 Date", key=f"date_{form_key}", 
+                                       value=pd.to_datetime(day_data.get('date')).date() if day_data.get('date') else None)
+                with col2:
+                    location = st.text_input("📍 Location", key=f"location_{form_key}", 
+                                           value=day_data.get('location', ''))
                 
-                col_from, col_to = st.columns(2)
-                with col_from:
-                    transport_from = st.text_input("From", key=f"transport_from_{i}", 
-                                                 value=day_data.get('transport_from', ''))
-                with col_to:
-                    transport_to = st.text_input("To", key=f"transport_to_{i}", 
-                                               value=day_data.get('transport_to', ''))
+                # Transport and accommodation
+                col1, col2 = st.columns(2)
                 
-                col_time, col_cost = st.columns(2)
-                with col_time:
-                    transport_time = st.text_input("Time", key=f"transport_time_{i}", 
-                                                 value=day_data.get('transport_time', ''))
-                with col_cost:
-                    transport_cost = st.number_input("Cost (£)", key=f"transport_cost_{i}", 
-                                                   value=float(day_data.get('transport_cost', 0.0)),
-                                                   min_value=0.0, step=1.0)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-            with col2:
-                st.markdown('<div class="accommodation-section">', unsafe_allow_html=True)
-                st.markdown("#### 🏨 Accommodation")
-                
-                accommodation_types = ["Hostel", "Hotel", "Guesthouse", "Camping", "Airbnb", "None"]
-                accommodation_type = st.selectbox("Type",
-                    accommodation_types, 
-                    key=f"accommodation_type_{i}",
-                    index=accommodation_types.index(day_data.get('accommodation_type', 'Hostel')))
-                
-                if accommodation_type != "None":
-                    accommodation_name = st.text_input("Name", key=f"accommodation_name_{i}", 
+                with col1:
+                    st.markdown('<div class="transport-section">', unsafe_allow_html=True)
+                    st.markdown("#### 🚌 Transportation")
+                    
+                    options, index = category_options(TRANSPORT_TYPES, TRANSPORT_TYPE_INDEX,
+                                                      day_data.get('transport_type', 'Bus'))
+                    transport_type = st.selectbox("Type", 
+                        options, 
+                        key=f"transport_type_{form_key}",
+                        index=index)
+                    
+                    col_from, col_to = st.columns(2)
+                    with col_from:
+                        transport_from = st.text_input("From", key=f"transport_from_{form_key}", 
+                                                     value=day_data.get('transport_from', ''))
+                    with col_to:
+                        transport_to = st.text_input("To", key=f"transport_to_{form_key}", 
+                                                   value=day_data.get('transport_to', ''))
+                    
+                    col_time, col_cost = st.columns(2)
+                    with col_time:
+                        transport_time = st.text_input("Time", key=f"transport_time_{form_key}", 
+                                                     value=day_data.get('transport_time', ''))
+                    with col_cost:
+                        transport_cost = st.number_input("Cost (£)", key=f"transport_cost_{form_key}", 
+                                                       value=float(day_data.get('transport_cost', 0.0)),
+                                                       min_value=0.0, step=1.0)
+                    
+                    st.markdown('</div>', unsafe_allow_html=True)
+                    
+                with col2:
+                    st.markdown('<div class="accommodation-section">', unsafe_allow_html=True)
+                    st.markdown("#### 🏨 Accommodation")
+                    
+                    options, index = category_options(ACCOMMODATION_TYPES, ACCOMMODATION_TYPE_INDEX,
+                                                      day_data.get('accommodation_type', 'Hostel'))
+                    accommodation_type = st.selectbox("Type",
+                        options, 
+                        key=f"accommodation_type_{form_key}",
+                        index=index)
+                    
+                    # Forms only rerun on submit, so these stay visible and are
+                    # cleared on save when the type is "None"
+                    accommodation_name = st.text_input("Name", key=f"accommodation_name_{form_key}", 
                                                      value=day_data.get('accommodation_name', ''))
-                    accommodation_cost = st.number_input("Cost (£)", key=f"accommodation_cost_{i}", 
+                    accommodation_cost = st.number_input("Cost (£)", key=f"accommodation_cost_{form_key}", 
                                                        value=float(day_data.get('accommodation_cost', 0.0)),
                                                        min_value=0.0, step=1.0)
-                else:
+                    
+                    st.markdown('</div>', unsafe_allow_html=True)
+                
+                # Notes
+                notes = st.text_area("📝 Notes & Activities", key=f"notes_{form_key}", 
+                                   value=day_data.get('notes', ''), height=80)
+                
+                submitted = st.form_submit_button("💾 Save Day", type="primary")
+            
+            if submitted:
+                if accommodation_type == "None":
                     accommodation_name = ""
                     accommodation_cost = 0.0
                 
-                st.markdown('</div>', unsafe_allow_html=True)
+                # Only fields that differ from the stored row are written
+                changed = st.session_state.trip_data.commit_changes(i, {
+                    'date': str(date) if date else '',
+                    'location': location,
+                    'transport_type': transport_type,
+                    'transport_from': transport_from,
+                    'transport_to': transport_to,
+                    'transport_time': transport_time,
+                    'transport_cost': transport_cost,
+                    'accommodation_type': accommodation_type,
+                    'accommodation_name': accommodation_name,
+                    'accommodation_cost': accommodation_cost,
+                    'notes': notes
+                })
+                if changed:
+                    focus_day(i)
+                    st.rerun()
             
-            # Notes
-            notes = st.text_area("📝 Notes & Activities", key=f"notes_{i}", 
-                               value=day_data.get('notes', ''), height=80)
+            place_hint(day_data.get('location', ''))
             
             # Action buttons
-            col1, col2, col3 = st.columns([1, 1, 2])
+            col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 2])
             with col1:
-                if st.button("🗑️ Delete", key=f"delete_{i}"):
+                if st.button("🗑️ Delete", key=f"delete_{day_id}"):
                     delete_day(i)
                     st.rerun()
             with col2:
-                if st.button("📋 Copy", key=f"copy_{i}"):
+                if st.button("📋 Copy", key=f"copy_{day_id}"):
                     copy_day(i)
+                    focus_day(len(st.session_state.trip_data) - 1)
                     st.rerun()
             with col3:
+                if st.button("⤴️ Insert before", key=f"insert_before_{day_id}"):
+                    insert_day_before(i)
+                    focus_day(i)
+                    st.rerun()
+            with col4:
+                st.number_input("Move to day", min_value=1, max_value=len(st.session_state.trip_data),
+                                value=None, key=f"move_to_{day_id}", on_change=move_day,
+                                args=(day_id,), label_visibility="collapsed", placeholder="Move to day")
+            with col5:
                 st.progress(completion, text=f"Completion: {completion:.0%}")
+
+def import_days_panel():
+    """Upload a CSV or JSON itinerary and stream its valid rows into the trip"""
+    report = st.session_state.pop('import_report', None)
+    if report is not None:
+        if report['fatal']:
+            st.error(f"Import stopped early: {report['fatal']}")
+        if report['rows_rejected']:
+            st.warning(f"Imported {report['rows_imported']} of {report['rows_read']} rows; "
+                       f"{report['rows_rejected']} rejected ({report['error_count']} errors)")
+        else:
+            st.success(f"Imported {report['rows_imported']} days")
+    
+    with st.expander("📥 Import days from CSV / JSON", expanded=report is not None and bool(report['error_count'])):
+        if report is not None and report['errors']:
+            st.caption(f"First {len(report['errors'])} errors")
+            st.dataframe(pd.DataFrame(report['errors']), hide_index=True)
+        
+        with st.form(key="import_form", border=False):
+            uploaded = st.file_uploader("Itinerary file", type=IMPORT_FILE_TYPES, key="import_file_input",
+                                        help="A CSV with the exported columns, a JSON array of days or JSON Lines; "
+                                             "gzipped files are accepted")
+            mode = st.radio("Mode", IMPORT_MODES, horizontal=True, key="import_mode_input")
+            submitted = st.form_submit_button("📥 Import")
+        
+        if submitted and uploaded is not None:
+            # Replacing builds a fresh store, so a failed import leaves the trip as it was
+            replace = mode == IMPORT_MODES[1]
+            target = Itinerary() if replace else st.session_state.trip_data
+            with PROFILER.section("import_days"):
+                report = import_days(uploaded, target)
+            if replace and report.rows_imported:
+                st.session_state.trip_data = target
+            st.session_state.import_report = report.to_dict()
+            st.rerun()
+
+def place_lookup():
+    """Search the offline gazetteer by name, alias or airport code as you type"""
+    with st.expander("🗺️ Place lookup"):
+        query = st.text_input("Search places", key="place_lookup_input", placeholder="e.g. Chiang, BKK, Gare du",
+                              help="Cities and major stations from the bundled offline gazetteer")
+        if not query.strip():
+            return
+        places = get_gazetteer().complete(query, limit=PLACE_SUGGESTIONS)
+        if not places:
+            st.caption("No matching places - free-text names still work, they just aren't grouped in analytics")
+            return
+        st.dataframe(pd.DataFrame([{
+            'Place': place.name,
+            'Type': place.kind.title(),
+            'Country': place.country,
+            'Also known as': ', '.join(place.aliases),
+            'Lat': place.lat,
+            'Lon': place.lon
+        } for place in places]), hide_index=True)
+
+def place_hint(text):
+    """Caption under a day showing which gazetteer place its location resolves to"""
+    if not text.strip():
+        return
+    place = st.session_state.place_normalizer.resolve(text)
+    if place is not None:
+        st.caption(f"🗺️ {place.label} ({place.lat:.3f}, {place.lon:.3f})")
+        return
+    suggestions = get_gazetteer().complete(text, limit=3)
+    if suggestions:
+        st.caption("🗺️ Not a known place - did you mean " + ", ".join(place.label for place in suggestions) + "?")
+
+def bulk_range_operations():
+    """Date shift, cost change and block duplication over a range of days, applied in one rerun"""
+    trip_data = st.session_state.trip_data
+    
+    with st.expander("🧰 Bulk edit a range of days"):
+        with st.form(key="bulk_range_form", border=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                first_day = st.number_input("From day", min_value=1, value=1, key="bulk_from_input")
+            with col2:
+                last_day = st.number_input("To day", min_value=1, value=None, key="bulk_to_input",
+                                           placeholder=f"Last day ({len(trip_data)})")
             
-            # Update session state immediately
-            st.session_state.trip_data[i].update({
-                'date': str(date) if date else '',
-                'location': location,
-                'transport_type': transport_type,
-                'transport_from': transport_from,
-                'transport_to': transport_to,
-                'transport_time': transport_time,
-                'transport_cost': transport_cost,
-                'accommodation_type': accommodation_type,
-                'accommodation_name': accommodation_name,
-                'accommodation_cost': accommodation_cost,
-                'notes': notes
-            })
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                shift = st.number_input("Shift dates by (days)", value=0, step=1, key="bulk_shift_input")
+            with col2:
+                cost_target = st.selectbox("Costs to change", list(BULK_COST_TARGETS), key="bulk_cost_target_input")
+            with col3:
+                cost_unit = st.selectbox("Unit", BULK_COST_UNITS, key="bulk_cost_unit_input")
+            cost_change = st.number_input("Cost change (negative to reduce)", value=0.0, step=1.0,
+                                          key="bulk_cost_change_input")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                shift_clicked = st.form_submit_button("📅 Shift dates")
+            with col2:
+                cost_clicked = st.form_submit_button("💷 Apply cost change")
+            with col3:
+                duplicate_clicked = st.form_submit_button("📑 Duplicate block")
+        
+        # Day numbers are 1-based and inclusive; the store takes a half-open slice
+        start = int(first_day) - 1
+        stop = len(trip_data) if last_day is None else int(last_day)
+        if not shift_clicked and not cost_clicked and not duplicate_clicked:
+            return
+        if start >= min(stop, len(trip_data)):
+            st.warning("The range is empty; check From day and To day.")
+            return
+        
+        if shift_clicked:
+            trip_data.shift_dates(int(shift), start, stop)
+        elif cost_clicked:
+            fields = BULK_COST_TARGETS[cost_target]
+            if cost_unit == "%":
+                trip_data.adjust_costs(fields, start, stop, percent=cost_change)
+            else:
+                trip_data.adjust_costs(fields, start, stop, amount=cost_change)
+        else:
+            focus_day(trip_data.duplicate_range(start, stop))
+        st.rerun()
+
+def day_list_pager():
+    """Page size, filter and jump-to-day controls; returns the day indices to render"""
+    trip_data = st.session_state.trip_data
+    page_size = st.session_state.get('day_page_size', DAY_PAGE_SIZES[0])
+    
+    # A focus request (new day, copy, jump) clears filters and opens the right page
+    if st.session_state.pop('focus_pending', False):
+        st.session_state.day_filter_location = ''
+        st.session_state.day_filter_completion = COMPLETION_FILTERS[0]
+        try:
+            st.session_state.day_page = trip_data.index_of(st.session_state.focused_day_id) // page_size + 1
+        except KeyError:
+            pass
+    
+    col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+    
+    with col1:
+        page_size = st.selectbox("Days per page", DAY_PAGE_SIZES, key="day_page_size")
+    with col2:
+        location_filter = st.text_input("🔎 Filter by location", key="day_filter_location",
+                                        placeholder="e.g., Bangkok")
+    with col3:
+        completion_filter = st.selectbox("Completion", COMPLETION_FILTERS, key="day_filter_completion")
+    with col4:
+        st.number_input("Jump to day", min_value=1, max_value=len(trip_data), value=None,
+                        key="jump_to_day_input", on_change=jump_to_day)
+    
+    # Filter
+    if location_filter.strip():
+        indices = trip_data.search('location', location_filter)
+    else:
+        indices = range(len(trip_data))
+    
+    if completion_filter != COMPLETION_FILTERS[0]:
+        indicator = completion_filter.split()[0]
+        matches = completion_indicators(trip_data.completion_scores()) == indicator
+        indices = [i for i in indices if matches[i]]
+    
+    if not indices:
+        st.info("No days match these filters.")
+        return []
+    
+    # Paginate
+    total_pages = (len(indices) - 1) // page_size + 1
+    st.session_state.day_page = min(max(1, st.session_state.get('day_page', 1)), total_pages)
+    
+    if total_pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("⬅️ Previous", key="day_page_prev", on_click=change_day_page, args=(-1,),
+                      disabled=st.session_state.day_page <= 1)
+        with col2:
+            st.number_input("Page", min_value=1, max_value=total_pages, key="day_page")
+        with col3:
+            st.button("Next ➡️", key="day_page_next", on_click=change_day_page, args=(1,),
+                      disabled=st.session_state.day_page >= total_pages)
+    
+    start = (st.session_state.day_page - 1) * page_size
+    window = indices[start:start + page_size]
+    st.caption(f"Showing days {start + 1}-{start + len(window)} of {len(indices)} matching")
+    return list(window)
 
+@PROFILER.timed()
 def budget_calculator():
     """Budget calculator component"""
     st.markdown('<h2 class="section-header">💰 Budget Calculator</h2>', unsafe_allow_html=True)
@@ -521,8 +833,8 @@ def budget_calculator():
         return
     
     # Calculate base costs
-    total_transport = sum(day.get('transport_cost', 0.0) for day in st.session_state.trip_data)
-    total_accommodation = sum(day.get('accommodation_cost', 0.0) for day in st.session_state.trip_data)
+    total_transport = st.session_state.trip_data.total('transport_cost')
+    total_accommodation = st.session_state.trip_data.total('accommodation_cost')
     
     # Additional budget categories
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -611,13 +923,14 @@ def budget_calculator():
         budget_breakdown = {k: v for k, v in budget_breakdown.items() if v > 0}
         
         if budget_breakdown:
-            fig = px.pie(
+            fig = cached_figure('budget_breakdown', budget_breakdown, lambda: px.pie(
                 values=list(budget_breakdown.values()),
                 names=list(budget_breakdown.keys()),
                 title="💰 Budget Breakdown"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
 
+@PROFILER.timed()
 def trip_summary():
     """Trip summary component"""
     st.markdown('<h2 class="section-header">📋 Trip Summary</h2>', unsafe_allow_html=True)
@@ -689,41 +1002,55 @@ def trip_summary():
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.button("📁 Download CSV", type="primary", key="download_csv_btn"):
-            try:
-                df = pd.DataFrame(st.session_state.trip_data)
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="💾 Download Trip Data",
-                    data=csv,
-                    file_name=f"{trip_name.replace(' ', '_')}_trip.csv",
-                    mime="text/csv",
-                    key="download_csv_button"
-                )
-            except Exception as e:
-                st.error(f"Error creating CSV: {e}")
+        compress_csv = st.checkbox("🗜️ Gzip compress", key="csv_gzip_input")
+        try:
+            st.download_button(
+                label="📁 Download CSV",
+                data=cached_csv_export(compress_csv),
+                file_name=f"{trip_name.replace(' ', '_')}_trip.csv" + (".gz" if compress_csv else ""),
+                mime="application/gzip" if compress_csv else "text/csv",
+                type="primary",
+                key="download_csv_button"
+            )
+        except Exception as e:
+            st.error(f"Error creating CSV: {e}")
     
     with col2:
+        text_format = st.radio("Text format", ["Plain text", "Markdown"], horizontal=True, key="text_format_input")
+        target = 'markdown' if text_format == "Markdown" else 'plain'
+        
         if st.button("📋 Generate Text Summary", key="generate_text_btn"):
             try:
-                text_summary = generate_text_itinerary()
+                text_summary = generate_text_itinerary(target)
                 st.text_area("Copy this itinerary:", value=text_summary, height=200, key="text_summary_area")
             except Exception as e:
                 st.error(f"Error generating summary: {e}")
+        
+        try:
+            st.download_button(
+                label="💾 Download Itinerary",
+                data=cached_text_export(target),
+                file_name=f"{trip_name.replace(' ', '_')}_itinerary." + ("md" if target == 'markdown' else "txt"),
+                mime="text/markdown" if target == 'markdown' else "text/plain",
+                key="download_text_button"
+            )
+        except Exception as e:
+            st.error(f"Error creating text export: {e}")
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
+@PROFILER.timed()
 def show_trip_stats():
     """Display trip statistics"""
     if not st.session_state.trip_data:
         return
         
     total_days = len(st.session_state.trip_data)
-    total_transport = sum(day.get('transport_cost', 0.0) for day in st.session_state.trip_data)
-    total_accommodation = sum(day.get('accommodation_cost', 0.0) for day in st.session_state.trip_data)
-    total_cost = total_transport + total_accommodation
+    total_transport = st.session_state.trip_data.total('transport_cost')
+    total_accommodation = st.session_state.trip_data.total('accommodation_cost')
+    total_cost = st.session_state.trip_data.total_cost()
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -736,6 +1063,72 @@ def show_trip_stats():
     with col4:
         st.metric("💰 Total Cost", f"£{total_cost:.0f}")
 
+def focus_day(index):
+    """Open a day in the planner on the next rerun"""
+    st.session_state.focused_day_id = st.session_state.trip_data.day_id(index)
+    st.session_state.focus_pending = True
+
+def jump_to_day():
+    """Callback for the jump-to-day input"""
+    # Callbacks run before main(), so bring back a spilled trip first
+    checkin_current_session()
+    target = st.session_state.jump_to_day_input
+    if target:
+        focus_day(int(target) - 1)
+        st.session_state.jump_to_day_input = None
+
+def change_day_page(step):
+    """Callback for the previous/next page buttons"""
+    st.session_state.day_page = st.session_state.get('day_page', 1) + step
+
+def cached_figure(chart, inputs, builder):
+    """Reuse a Plotly figure while the data feeding it is unchanged"""
+    def timed_builder():
+        with PROFILER.section(f"chart_build:{chart}"):
+            return builder()
+    
+    with PROFILER.section("chart_lookup"):
+        return get_or_build(chart, inputs, timed_builder, st.session_state.figure_cache)
+
+def build_transport_chart(transport_stats):
+    """Bar chart of days per transport type"""
+    fig = px.bar(
+        x=list(transport_stats.keys()),
+        y=list(transport_stats.values()),
+        title="Transport Usage",
+        labels={'x': 'Transport Type', 'y': 'Number of Days'}
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+def cached_csv_export(compress):
+    """CSV export for a download button: built on click, or cached until the itinerary changes"""
+    if DEFERRED_DOWNLOADS:
+        # Runs on another thread, so it must not reach into st.session_state
+        trip_data = st.session_state.trip_data
+        return lambda: export_csv(trip_data, compress=compress).getvalue()
+    cache_key = (id(st.session_state.trip_data), st.session_state.trip_data.version, compress)
+    cached = st.session_state.get('csv_export')
+    if cached is None or cached[0] != cache_key:
+        cached = (cache_key, export_csv(st.session_state.trip_data, compress=compress).getvalue())
+        st.session_state.csv_export = cached
+    return cached[1]
+
+def cached_text_export(target):
+    """Itinerary text for a download button: rendered on click, or cached until the trip changes"""
+    trip_info = st.session_state.trip_info
+    if DEFERRED_DOWNLOADS:
+        trip_data, renderer, trip_info = st.session_state.trip_data, st.session_state.text_renderer, dict(trip_info)
+        return lambda: renderer.export(trip_data, trip_info, target).getvalue()
+    cache_key = (id(st.session_state.trip_data), st.session_state.trip_data.version, target,
+                 trip_info.get('name'), trip_info.get('start_date'), trip_info.get('end_date'))
+    cached = st.session_state.get('text_export')
+    if cached is None or cached[0] != cache_key:
+        export = st.session_state.text_renderer.export(st.session_state.trip_data, trip_info, target)
+        cached = (cache_key, export.getvalue())
+        st.session_state.text_export = cached
+    return cached[1]
+
 def add_new_day():
     """Add a new day to the trip"""
     new_day = {
@@ -754,68 +1147,56 @@ def add_new_day():
     }
     st.session_state.trip_data.append(new_day)
 
+def generate_days(count, template_day=None):
+    """Append days copied from a template day (or blank), dated on from the trip start date"""
+    trip_data = st.session_state.trip_data
+    template = None
+    if template_day and template_day <= len(trip_data):
+        template = trip_data.get_day(int(template_day) - 1)
+        template['date'] = ''
+    
+    # Day N falls N - 1 days after the start date
+    start_date = st.session_state.trip_info.get('start_date')
+    first_date = start_date + timedelta(days=len(trip_data)) if start_date else None
+    trip_data.generate_days(count, template, first_date)
+
 def delete_day(index):
-    """Delete a day and renumber remaining days"""
+    """Delete a day (day numbers follow row order, so nothing to renumber)"""
     st.session_state.trip_data.pop(index)
-    # Renumber days
-    for j, day in enumerate(st.session_state.trip_data):
-        day['day'] = j + 1
+
+def insert_day_before(index):
+    """Insert a blank day before position `index`"""
+    st.session_state.trip_data.insert(index)
+
+def move_day(day_id):
+    """Callback for a day's move-to input: move it before the chosen day number"""
+    checkin_current_session()
+    target = st.session_state[f"move_to_{day_id}"]
+    if not target:
+        return
+    st.session_state[f"move_to_{day_id}"] = None
+    trip_data = st.session_state.trip_data
+    try:
+        index = trip_data.index_of(day_id)
+    except KeyError:
+        # Rendered for a day that has since gone (deleted, or the trip was reloaded)
+        return
+    # Day numbers are 1-based; moving later lands after the day currently there
+    before = int(target) if int(target) - 1 > index else int(target) - 1
+    focus_day(trip_data.move(index, before))
 
 def copy_day(index):
     """Copy a day with incremented day number"""
     original_day = st.session_state.trip_data[index].copy()
-    original_day['day'] = len(st.session_state.trip_data) + 1
     original_day['date'] = ''
     st.session_state.trip_data.append(original_day)
 
-def generate_text_itinerary():
+def generate_text_itinerary(target='plain'):
     """Generate text version of the itinerary"""
-    trip_name = st.session_state.trip_info.get('name', 'My Adventure')
-    start_date = st.session_state.trip_info.get('start_date', '')
-    end_date = st.session_state.trip_info.get('end_date', '')
-    
-    text = f"🎒 {trip_name}\n{'='*50}\n\n"
-    
-    if start_date and end_date:
-        text += f"📅 {start_date} → {end_date}\n"
-    
-    text += f"🌍 {len(st.session_state.trip_data)} days of adventure\n\n"
-    
-    total_cost = 0
-    for day in st.session_state.trip_data:
-        day_cost = day.get('transport_cost', 0) + day.get('accommodation_cost', 0)
-        total_cost += day_cost
-        
-        text += f"📍 Day {day['day']} - {day.get('location', 'TBD')}\n"
-        text += f"📅 Date: {day.get('date', 'TBD')}\n"
-        text += f"🚌 Transport: {day.get('transport_from', 'TBD')} → {day.get('transport_to', 'TBD')}\n"
-        text += f"   Type: {day.get('transport_type', 'TBD')}\n"
-        
-        if day.get('transport_time'):
-            text += f"   Time: {day['transport_time']}\n"
-            
-        text += f"🏨 Accommodation: {day.get('accommodation_type', 'TBD')}\n"
-        
-        if day.get('accommodation_name'):
-            text += f"   Place: {day['accommodation_name']}\n"
-        
-        if day.get('notes'):
-            text += f"📝 Notes: {day['notes']}\n"
-            
-        text += f"💰 Daily Cost: £{day_cost:.2f}\n"
-        text += "-" * 50 + "\n\n"
-    
-    text += f"💰 Total Trip Cost: £{total_cost:.2f}\n"
-    text += f"🎒 Total Days: {len(st.session_state.trip_data)}\n"
-    
-    if len(st.session_state.trip_data) > 0:
-        avg_daily = total_cost / len(st.session_state.trip_data)
-        text += f"📊 Average Daily Cost: £{avg_daily:.2f}\n"
-    
-    text += "\n🌟 Have an amazing adventure! Safe travels! 🎒"
-    
-    return text
+    return st.session_state.text_renderer.render(
+        st.session_state.trip_data, st.session_state.trip_info, target)
 
+@PROFILER.timed()
 def analytics_dashboard():
     """Analytics dashboard for trip insights"""
     st.markdown('<h2 class="section-header">📊 Trip Analytics</h2>', unsafe_allow_html=True)
@@ -828,7 +1209,7 @@ def analytics_dashboard():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("🎯 Trip Completion Status")
     
-    completed_days = sum(1 for day in st.session_state.trip_data if calculate_day_completion(day) >= 0.8)
+    completed_days = st.session_state.trip_data.completed_days(0.8)
     total_days = len(st.session_state.trip_data)
     completion_rate = completed_days / total_days if total_days > 0 else 0
     
@@ -839,10 +1220,10 @@ def analytics_dashboard():
     with col2:
         st.metric("📈 Completion Rate", f"{completion_rate:.1%}")
     with col3:
-        missing_locations = sum(1 for day in st.session_state.trip_data if not day.get('location'))
+        missing_locations = st.session_state.trip_data.count_missing('location')
         st.metric("📍 Missing Locations", missing_locations)
     with col4:
-        missing_transport = sum(1 for day in st.session_state.trip_data if not day.get('transport_from'))
+        missing_transport = st.session_state.trip_data.count_missing('transport_from')
         st.metric("🚌 Missing Transport", missing_transport)
     
     # Progress bar
@@ -856,19 +1237,11 @@ def analytics_dashboard():
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("🚌 Transport Analysis")
         
-        transport_stats = {}
-        for day in st.session_state.trip_data:
-            transport = day.get('transport_type', 'Unknown')
-            transport_stats[transport] = transport_stats.get(transport, 0) + 1
+        transport_stats = st.session_state.trip_data.value_counts('transport_type')
         
         if transport_stats:
-            fig = px.bar(
-                x=list(transport_stats.keys()),
-                y=list(transport_stats.values()),
-                title="Transport Usage",
-                labels={'x': 'Transport Type', 'y': 'Number of Days'}
-            )
-            fig.update_layout(showlegend=False)
+            fig = cached_figure('transport_usage', transport_stats,
+                                lambda: build_transport_chart(transport_stats))
             st.plotly_chart(fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -876,43 +1249,136 @@ def analytics_dashboard():
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("🏨 Accommodation Analysis")
         
-        accommodation_stats = {}
-        for day in st.session_state.trip_data:
-            accommodation = day.get('accommodation_type', 'Unknown')
-            accommodation_stats[accommodation] = accommodation_stats.get(accommodation, 0) + 1
+        accommodation_stats = st.session_state.trip_data.value_counts('accommodation_type')
         
         if accommodation_stats:
-            fig = px.pie(
+            fig = cached_figure('accommodation_distribution', accommodation_stats, lambda: px.pie(
                 values=list(accommodation_stats.values()),
                 names=list(accommodation_stats.keys()),
                 title="Accommodation Distribution"
-            )
+            ))
             st.plotly_chart(fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
+    place_analytics()
+    
     # Daily costs chart
     if st.session_state.trip_data:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("💰 Daily Expenses")
         
-        days = [day['day'] for day in st.session_state.trip_data]
-        costs = [day.get('transport_cost', 0) + day.get('accommodation_cost', 0) for day in st.session_state.trip_data]
+        days = st.session_state.trip_data.column('day')
+        costs = st.session_state.trip_data.daily_costs()
         
-        fig = px.bar(
+        fig = cached_figure('daily_costs', costs, lambda: px.bar(
             x=days,
             y=costs,
             title="Daily Cost Breakdown",
             labels={'x': 'Day', 'y': 'Cost (£)'}
-        )
+        ))
         st.plotly_chart(fig, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
+def place_analytics():
+    """Days per place, counting spellings and codes of the same place (Bangkok, BKK) together"""
+    with PROFILER.section("place_analytics"):
+        normalizer = st.session_state.place_normalizer
+        known, unrecognized = normalizer.group_counts(st.session_state.trip_data.text_counts('location'))
+        places = [normalizer.gazetteer.get(place_id) for place_id in known]
+    
+    if not known and not unrecognized:
+        return
+    
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("🗺️ Places")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("📍 Unique Places", len(known) + len(unrecognized))
+    with col2:
+        st.metric("❓ Not in Gazetteer", len(unrecognized))
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        rows = [{'Place': place.name, 'Country': place.country, 'Days': known[place.id]} for place in places]
+        rows += [{'Place': name, 'Country': '', 'Days': days} for name, days in unrecognized.items()]
+        st.dataframe(pd.DataFrame(rows).sort_values('Days', ascending=False, kind='stable'), hide_index=True)
+    with col2:
+        if places:
+            st.map(pd.DataFrame({'lat': [place.lat for place in places], 'lon': [place.lon for place in places]}),
+                   zoom=1)
+    st.markdown('</div>', unsafe_allow_html=True)
+
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
 
+TAB_SECTIONS = {
+    "🌍 Trip Overview": trip_overview,
+    "📅 Day Planning": day_by_day_planning,
+    "💰 Budget": budget_calculator,
+    "📊 Analytics": analytics_dashboard,
+    "📋 Summary": trip_summary
+}
+
+DEBUG_TAB = "🛠 Debug"
+
+def profiling_enabled():
+    """Profiling is opt-in: PLANNER_PROFILE=1 for everyone, or ?profile=1 per session"""
+    return profiling_forced() or st.query_params.get(PROFILE_QUERY_PARAM) == "1"
+
+def debug_panel():
+    """Timings of the previous run and the process-wide aggregates"""
+    st.markdown('<h2 class="section-header">🛠 Debug</h2>', unsafe_allow_html=True)
+    
+    report = st.session_state.get('profile_report')
+    if report:
+        st.metric("Previous run", f"{report['total_seconds'] * 1000:.1f} ms")
+        sections = sorted(report['sections'].items(), key=lambda item: -item[1]['seconds'])
+        st.dataframe(pd.DataFrame(
+            [{'Section': name, 'Calls': entry['count'], 'ms': round(entry['seconds'] * 1000, 2)}
+             for name, entry in sections]
+        ), hide_index=True)
+        st.json(report['gauges'])
+    else:
+        st.info("Timings appear after the next rerun.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Metrics (JSON)", PROFILER.to_json(), "planner_metrics.json",
+                           "application/json", key="download_metrics_json")
+    with col2:
+        st.download_button("📥 Metrics (Prometheus)", PROFILER.to_prometheus(), "planner_metrics.prom",
+                           "text/plain", key="download_metrics_prom")
+    with st.expander("Process-wide aggregates"):
+        st.json(PROFILER.snapshot()['sections'])
+    with st.expander("Sessions"):
+        st.json(get_session_store().stats())
+
 def main():
     """Main application function"""
+    # Brings back the trip if this session sat idle long enough to be spilled to disk
+    checkin_current_session()
+    try:
+        if profiling_enabled():
+            run_profiled()
+        else:
+            run_app(False)
+    finally:
+        checkout_current_session()
+
+def run_profiled():
+    """Render the page with the debug tab, timing the run"""
+    PROFILER.start_run()
+    try:
+        run_app(True)
+    finally:
+        gauges = {'widgets': widgets_this_run()}
+        gauges.update(session_state_size(st.session_state))
+        st.session_state.profile_report = PROFILER.end_run(**gauges)
+
+def run_app(debug):
+    """Render the page; `debug` adds the profiling tab"""
     # Initialize session state
     init_session_state()
     
@@ -934,29 +1400,20 @@ def main():
     if st.session_state.trip_data:
         show_trip_stats()
     
-    # Navigation tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🌍 Trip Overview", 
-        "📅 Day Planning", 
-        "💰 Budget", 
-        "📊 Analytics",
-        "📋 Summary"
-    ])
-    
-    with tab1:
-        trip_overview()
-    
-    with tab2:
-        day_by_day_planning()
+    # Navigation - unlike st.tabs, only the selected section executes on a rerun
+    tabs = list(TAB_SECTIONS) + ([DEBUG_TAB] if debug else [])
+    if st.session_state.get('active_tab') not in tabs:
+        st.session_state.active_tab = tabs[0]
+    active_tab = st.radio(
+        "Navigation",
+        tabs,
+        horizontal=True,
+        key="active_tab",
+        label_visibility="collapsed"
+    )
     
-    with tab3:
-        budget_calculator()
-    
-    with tab4:
-        analytics_dashboard()
-    
-    with tab5:
-        trip_summary()
+    with st.container():
+        TAB_SECTIONS.get(active_tab, debug_panel)()
     
     # Footer with session reminder
     st.markdown("""
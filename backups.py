@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from itinerary import Itinerary, normalize_day
+from serialization import encode_trip_info
+from storage_backends import atomic_write_bytes
+
+# A chunk ends after a day whose content hash hits this modulus, so chunk
+# boundaries move with the days: inserting a day only rewrites its own chunk
+CHUNK_TARGET_DAYS = 32
+CHUNK_MAX_DAYS = 256
+
+DEFAULT_KEEP_LAST = 20
+DEFAULT_KEEP_DAILY = 30
+
+# Garbage collection leaves chunks touched this recently alone: another process
+# may have just stored one for a manifest it has not written yet
+GC_GRACE_SECONDS = 60 * 60
+
+# One lock per backup directory, shared by every BackupStore on it in this
+# process, so a store's GC never runs between another's chunk and manifest writes
+_directory_locks: Dict[str, threading.Lock] = {}
+_directory_locks_lock = threading.Lock()
+
+
+def _directory_lock(directory: str) -> threading.Lock:
+    key = os.path.realpath(directory)
+    with _directory_locks_lock:
+        lock = _directory_locks.get(key)
+        if lock is None:
+            lock = _directory_locks[key] = threading.Lock()
+        return lock
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class BackupStore:
+    """Content-addressed, deduplicated trip backups with retention
+
+    Days are grouped into chunks with content-defined boundaries; each chunk
+    is stored once under its hash in ``objects/`` (zlib-compressed), and a
+    backup is a small manifest in ``manifests/`` listing chunk hashes plus
+    budget and trip info. Unchanged chunks are shared by every manifest that
+    references them, so a backup writes only the chunks that changed.
+
+    Retention keeps the newest ``keep_last`` backups of each trip plus the
+    newest backup of each of the last ``keep_daily`` days; chunks no longer
+    referenced by any manifest are deleted.
+    """
+
+    def __init__(self, directory: str = "trip_backups", keep_last: int = DEFAULT_KEEP_LAST,
+                 keep_daily: int = DEFAULT_KEEP_DAILY):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.manifests_dir = os.path.join(directory, "manifests")
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self._lock = _directory_lock(directory)
+        # (encoded line, ends a chunk) by row revision, so unchanged rows are not re-encoded
+        self._lines: Dict[int, Tuple[bytes, bool]] = {}
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def backup(self, trip_id: str, data: Dict[str, Any]) -> Optional[str]:
+        """Store a loaded trip; returns the backup id, or None if nothing changed"""
+        with self._lock:
+            chunks = [self._put_object(chunk) for chunk in self._chunks(data["trip_data"])]
+            manifest = {
+                "trip_id": trip_id,
+                "last_saved": data.get("last_saved"),
+                "version": data.get("version"),
+                "day_count": len(data["trip_data"]),
+                "budget_data": data.get("budget_data", {}),
+                "trip_info": data.get("trip_info", {}),
+                "chunks": chunks
+            }
+
+            latest = self._latest_manifest(trip_id)
+            if latest is not None and all(latest.get(key) == json.loads(json.dumps(value, default=_isoformat))
+                                          for key, value in manifest.items()):
+                return None
+
+            created = datetime.now()
+            backup_id = f"{trip_id}-{created.strftime('%Y%m%d_%H%M%S_%f')}"
+            manifest["created"] = created.isoformat()
+            os.makedirs(self.manifests_dir, exist_ok=True)
+            atomic_write_bytes(os.path.join(self.manifests_dir, f"{backup_id}.json"),
+                               json.dumps(manifest, default=_isoformat).encode('utf-8'))
+
+            self._prune(trip_id)
+            return backup_id
+
+    def _chunks(self, trip_data: List[Dict]) -> List[bytes]:
+        """Group encoded day lines into content-defined chunks"""
+        if isinstance(trip_data, Itinerary):
+            revisions = trip_data.column('revision').tolist()
+        else:
+            revisions = [None] * len(trip_data)
+        lines = {}
+        chunks, current = [], []
+        for i, revision in enumerate(revisions):
+            cached = self._lines.get(revision) if revision is not None else None
+            if cached is None:
+                line = json.dumps(normalize_day(trip_data[i]), sort_keys=True, ensure_ascii=False)
+                line = line.encode('utf-8') + b"\n"
+                digest = hashlib.blake2b(line, digest_size=4).digest()
+                boundary = int.from_bytes(digest, 'big') % CHUNK_TARGET_DAYS == 0
+                cached = (line, boundary)
+            if revision is not None:
+                lines[revision] = cached
+            line, boundary = cached
+            current.append(line)
+            if boundary or len(current) >= CHUNK_MAX_DAYS:
+                chunks.append(b"".join(current))
+                current = []
+        if current:
+            chunks.append(b"".join(current))
+
+        # Only the current rows' lines are worth keeping
+        self._lines = lines
+        return chunks
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _put_object(self, chunk: bytes) -> str:
+        """Store a chunk under its hash unless it is already there"""
+        digest = hashlib.blake2b(chunk, digest_size=20).hexdigest()
+        path = self._object_path(digest)
+        try:
+            # Reused: refresh its age so no other process collects it before our manifest lands
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write_bytes(path, zlib.compress(chunk))
+        return digest
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def list_backups(self, trip_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Backups, newest first, optionally for one trip only"""
+        backups = []
+        for backup_id in self._manifest_ids(trip_id):
+            manifest = self._read_manifest(backup_id)
+            if manifest is not None:
+                backups.append({
+                    'backup_id': backup_id,
+                    'trip_id': manifest['trip_id'],
+                    'created': manifest['created'],
+                    'last_saved': manifest.get('last_saved'),
+                    'day_count': manifest['day_count']
+                })
+        return backups
+
+    def restore(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        """Rebuild a trip from a backup, in DataManager.load_data() form"""
+        manifest = self._read_manifest(backup_id)
+        if manifest is None:
+            return None
+
+        days = []
+        for digest in manifest["chunks"]:
+            with open(self._object_path(digest), 'rb') as f:
+                chunk = zlib.decompress(f.read())
+            days.extend(json.loads(line) for line in chunk.splitlines())
+
+        return {
+            "trip_data": Itinerary(days),
+            "budget_data": manifest["budget_data"],
+            "trip_info": encode_trip_info(manifest["trip_info"]),
+            "last_saved": manifest.get("last_saved"),
+            "version": manifest.get("version")
+        }
+
+    def _manifest_ids(self, trip_id: Optional[str] = None) -> List[str]:
+        """Backup ids, newest first"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        ids = [name[:-len(".json")] for name in os.listdir(self.manifests_dir) if name.endswith(".json")]
+        if trip_id is not None:
+            ids = [backup_id for backup_id in ids if backup_id.rsplit('-', 1)[0] == trip_id]
+        # The timestamp suffix sorts chronologically
+        return sorted(ids, key=lambda backup_id: backup_id.rsplit('-', 1)[1], reverse=True)
+
+    def _read_manifest(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.manifests_dir, f"{backup_id}.json"), 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _latest_manifest(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        ids = self._manifest_ids(trip_id)
+        return self._read_manifest(ids[0]) if ids else None
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def _prune(self, trip_id: str) -> None:
+        """Apply the retention policy to one trip and drop unreferenced chunks"""
+        ids = self._manifest_ids(trip_id)
+        keep = set(ids[:self.keep_last])
+        days_kept = set()
+        for backup_id in ids:
+            day = backup_id.rsplit('-', 1)[1][:8]
+            if day not in days_kept and len(days_kept) < self.keep_daily:
+                days_kept.add(day)
+                keep.add(backup_id)
+
+        expired = [backup_id for backup_id in ids if backup_id not in keep]
+        if not expired:
+            return
+        for backup_id in expired:
+            os.remove(os.path.join(self.manifests_dir, f"{backup_id}.json"))
+        self._collect_garbage()
+
+    def _collect_garbage(self) -> None:
+        """Delete chunks that no manifest references any more, unless touched within the grace period"""
+        referenced = set()
+        for backup_id in self._manifest_ids():
+            manifest = self._read_manifest(backup_id)
+            if manifest is not None:
+                referenced.update(manifest["chunks"])
+        if not os.path.isdir(self.objects_dir):
+            # Only empty trips backed up so far
+            return
+
+        cutoff = time.time() - GC_GRACE_SECONDS
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest in referenced:
+                    continue
+                path = os.path.join(prefix_dir, digest)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    # Collected by another process meanwhile
+                    pass
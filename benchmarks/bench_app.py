@@ -0,0 +1,30 @@
+"""Full-script reruns through Streamlit's AppTest harness"""
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from conftest import BUDGET_DATA, ROOT, TRIP_INFO, get_trip, trip_sizes
+
+APP_PATH = os.path.join(ROOT, "backpacking_planner.py")
+TABS = ["🌍 Trip Overview", "📅 Day Planning", "💰 Budget", "📊 Analytics", "📋 Summary"]
+
+
+@pytest.fixture(params=trip_sizes(limit=10_000))
+def app(request):
+    """App with a trip loaded into session state and one warm-up run"""
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    at.session_state['trip_data'] = get_trip(request.param).copy()
+    at.session_state['trip_info'] = dict(TRIP_INFO)
+    at.session_state['budget_data'] = dict(BUDGET_DATA)
+    at.run()
+    assert not at.exception
+    return at
+
+
+@pytest.mark.parametrize("tab", TABS)
+def test_rerun(benchmark, app, tab):
+    """One script rerun with `tab` selected, after it has rendered once"""
+    app.radio(key="active_tab").set_value(tab).run()
+    benchmark.pedantic(app.run, rounds=3)
+    assert not app.exception
@@ -0,0 +1,36 @@
+"""Text itinerary rendering and CSV export"""
+import pytest
+
+from conftest import TRIP_INFO
+from exporters import TextItineraryRenderer, export_csv
+
+
+@pytest.mark.parametrize("target", ["plain", "markdown"])
+def test_text_itinerary_cold(benchmark, trip, target):
+    """Full render with an empty block cache (first render of a trip)"""
+    benchmark(lambda: TextItineraryRenderer().render(trip, TRIP_INFO, target))
+
+
+def test_text_itinerary_warm(benchmark, trip):
+    """Re-render with every day block cached, as generate_text_itinerary() does on reruns"""
+    renderer = TextItineraryRenderer()
+    renderer.render(trip, TRIP_INFO, 'plain')
+    benchmark(renderer.render, trip, TRIP_INFO, 'plain')
+
+
+def test_text_itinerary_one_day_changed(benchmark, trip):
+    itinerary = trip.copy()
+    renderer = TextItineraryRenderer()
+    renderer.render(itinerary, TRIP_INFO, 'plain')
+    counter = iter(range(10 ** 9))
+
+    def edit_and_render():
+        itinerary.update_day(0, {'notes': f"edit {next(counter)}"})
+        return renderer.render(itinerary, TRIP_INFO, 'plain')
+
+    benchmark(edit_and_render)
+
+
+@pytest.mark.parametrize("compress", [False, True], ids=["csv", "csv.gz"])
+def test_export_csv(benchmark, trip, compress):
+    benchmark(export_csv, trip, compress)
@@ -0,0 +1,23 @@
+"""Place autocomplete and per-session normalization against the bundled gazetteer"""
+import pytest
+
+from gazetteer import Gazetteer, PlaceNormalizer, get_gazetteer
+
+
+def test_load(benchmark):
+    """Parsing and indexing the bundled data, paid once per process"""
+    benchmark(Gazetteer.load)
+
+
+@pytest.mark.parametrize("prefix", ["s", "ba", "chiang", "gare du"])
+def test_complete(benchmark, prefix):
+    gazetteer = get_gazetteer()
+    assert benchmark(gazetteer.complete, prefix)
+
+
+def test_group_counts(benchmark, trip):
+    """Days per place for the analytics tab, with the session cache warm"""
+    normalizer = PlaceNormalizer()
+    counts = trip.text_counts('location')
+    normalizer.group_counts(counts)
+    benchmark(lambda: normalizer.group_counts(trip.text_counts('location')))
@@ -0,0 +1,40 @@
+"""Streaming CSV / JSON import and schema validation of loaded trips"""
+import io
+import json
+
+import pytest
+
+from exporters import export_csv
+from importers import import_days
+from itinerary import Itinerary
+from schema import DAY_SCHEMA
+
+ROUNDS = 3
+
+
+def _encode(trip, file_format: str) -> bytes:
+    if file_format == "csv":
+        return export_csv(trip).getvalue()
+    if file_format == "csv.gz":
+        return export_csv(trip, compress=True).getvalue()
+    return json.dumps(trip.to_records(), default=str).encode('utf-8')
+
+
+@pytest.mark.parametrize("file_format", ["csv", "csv.gz", "json"])
+def test_import(benchmark, trip, file_format):
+    raw = _encode(trip, file_format)
+
+    def run():
+        report = import_days(io.BytesIO(raw), Itinerary())
+        assert report.rows_imported == len(trip)
+
+    benchmark.pedantic(run, rounds=ROUNDS)
+
+
+@pytest.mark.parametrize("dates", ["native", "iso"])
+def test_coerce_trip_columns(benchmark, trip, dates):
+    """Schema pass over a loaded trip's columns, as done on every load"""
+    columns = trip.to_columns()
+    if dates == "iso":
+        columns['date'] = [str(value) if value else None for value in columns['date']]
+    benchmark(DAY_SCHEMA.coerce_columns, columns)
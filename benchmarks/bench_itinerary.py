@@ -0,0 +1,87 @@
+"""Completion scoring and trip aggregations"""
+from backpacking_planner import calculate_day_completion
+from itinerary import COST_FIELDS
+
+
+def test_calculate_day_completion_all_days(benchmark, trip):
+    """Per-day scoring through the dict-like row views, as the planner list does"""
+    benchmark(lambda: [calculate_day_completion(day) for day in trip])
+
+
+def test_completion_from_store(benchmark, trip):
+    benchmark(lambda: [trip.completion(i) for i in range(len(trip))])
+
+
+def test_completion_histogram(benchmark, trip):
+    benchmark(trip.completion_histogram)
+
+
+def test_total_cost(benchmark, trip):
+    benchmark(trip.total_cost)
+
+
+def test_cost_totals_from_columns(benchmark, trip):
+    benchmark(lambda: [float(trip.column(field).sum()) for field in COST_FIELDS])
+
+
+def test_daily_costs(benchmark, trip):
+    benchmark(trip.daily_costs)
+
+
+def test_value_counts(benchmark, trip):
+    benchmark(lambda: (trip.value_counts('transport_type'), trip.value_counts('accommodation_type')))
+
+
+def test_search(benchmark, trip):
+    benchmark(trip.search, 'location', 'par')
+
+
+def test_update_day(benchmark, trip):
+    itinerary = trip.copy()
+    middle = len(itinerary) // 2
+    costs = iter(range(10 ** 9))
+    benchmark(lambda: itinerary.update_day(middle, {'transport_cost': float(next(costs))}))
+
+
+def test_to_frame(benchmark, trip):
+    benchmark(trip.to_frame)
+
+
+def test_completion_scores_after_edit(benchmark, trip):
+    """Every day's score from presence masks, after an edit invalidated the cache"""
+    itinerary = trip.copy()
+    notes = iter(range(10 ** 9))
+
+    def edit_and_score():
+        itinerary.update_day(0, {'notes': f"edit {next(notes)}"})
+        return itinerary.completion_scores()
+
+    benchmark(edit_and_score)
+
+
+def test_completion_summary_cached(benchmark, trip):
+    trip.completion_scores()
+    benchmark(trip.completion_summary)
+
+
+def test_generate_days(benchmark, trip):
+    """Appending a trip's worth of template days in one pass"""
+    template = trip.get_day(0)
+    benchmark.pedantic(lambda itinerary: itinerary.generate_days(len(trip), template, '2025-01-01'),
+                       setup=lambda: ((trip.copy(),), {}), rounds=5)
+
+
+def test_shift_dates(benchmark, trip):
+    itinerary = trip.copy()
+    benchmark(itinerary.shift_dates, 1)
+
+
+def test_adjust_costs(benchmark, trip):
+    itinerary = trip.copy()
+    benchmark(itinerary.adjust_costs, COST_FIELDS, percent=1.0)
+
+
+def test_duplicate_range(benchmark, trip):
+    """Duplicating the first half of the trip right after itself"""
+    benchmark.pedantic(lambda itinerary: itinerary.duplicate_range(0, len(trip) // 2),
+                       setup=lambda: ((trip.copy(),), {}), rounds=5)
@@ -0,0 +1,69 @@
+"""DataManager save/load through the JSON and SQLite backends"""
+import itertools
+
+import pytest
+
+from conftest import BUDGET_DATA, TRIP_INFO
+from data_manager import DataManager
+from serialization import available_formats
+from storage_backends import SQLiteBackend
+
+FORMATS = [name for name, available in available_formats().items() if available]
+ROUNDS = 5
+
+
+def _manager(directory, file_format):
+    if file_format == "sqlite":
+        return DataManager(backend=SQLiteBackend(str(directory / "trips.db")))
+    return DataManager(str(directory / "trip_data.json"), file_format=file_format)
+
+
+@pytest.fixture(params=FORMATS + ["sqlite"])
+def file_format(request) -> str:
+    return request.param
+
+
+def test_save_full(benchmark, trip, file_format, tmp_path):
+    """First save of a trip: a full snapshot (JSON) or every row (SQLite)"""
+    counter = itertools.count()
+
+    def setup():
+        directory = tmp_path / str(next(counter))
+        directory.mkdir()
+        return (_manager(directory, file_format),), {}
+
+    benchmark.pedantic(lambda manager: manager.save_data(trip, BUDGET_DATA, TRIP_INFO),
+                       setup=setup, rounds=ROUNDS)
+
+
+def test_save_one_day_changed(benchmark, trip, file_format, tmp_path):
+    """Incremental save after editing a single day (journal append / row upsert)"""
+    itinerary = trip.copy()
+    manager = _manager(tmp_path, file_format)
+    manager.save_data(itinerary, BUDGET_DATA, TRIP_INFO)
+    counter = itertools.count()
+
+    def edit_and_save():
+        itinerary.update_day(len(itinerary) // 2, {'notes': f"edit {next(counter)}"})
+        manager.save_data(itinerary, BUDGET_DATA, TRIP_INFO)
+
+    benchmark(edit_and_save)
+
+
+def test_load_cold(benchmark, trip, file_format, tmp_path):
+    """Load in a fresh manager, parsing everything from disk"""
+    _manager(tmp_path, file_format).save_data(trip, BUDGET_DATA, TRIP_INFO)
+    benchmark.pedantic(lambda: _manager(tmp_path, file_format).load_data(), rounds=ROUNDS)
+
+
+def test_load_cached(benchmark, trip, file_format, tmp_path):
+    """Repeat load from the same manager while the stored trip is unchanged"""
+    manager = _manager(tmp_path, file_format)
+    manager.save_data(trip, BUDGET_DATA, TRIP_INFO)
+    manager.load_data()
+    benchmark(manager.load_data)
+
+
+def test_get_last_saved(benchmark, trip, file_format, tmp_path):
+    _manager(tmp_path, file_format).save_data(trip, BUDGET_DATA, TRIP_INFO)
+    benchmark.pedantic(lambda: _manager(tmp_path, file_format).get_last_saved(), rounds=ROUNDS)
@@ -0,0 +1,77 @@
+import os
+import sys
+from datetime import date, timedelta
+from typing import Dict
+
+import numpy as np
+import pytest
+
+# The planner is a set of top-level modules; make them importable from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from itinerary import ACCOMMODATION_TYPES, TRANSPORT_TYPES, Itinerary  # noqa: E402
+
+TRIP_SIZES = [10, 1_000, 10_000, 100_000]
+# Cap trip sizes for quick runs, e.g. BENCH_MAX_DAYS=10000
+MAX_DAYS = int(os.environ.get("BENCH_MAX_DAYS", TRIP_SIZES[-1]))
+
+CITIES = ["Lisbon", "Porto", "Madrid", "Seville", "Granada", "Barcelona", "Lyon", "Paris",
+          "Brussels", "Amsterdam", "Berlin", "Prague", "Vienna", "Budapest", "Zagreb", "Split"]
+
+_trips: Dict[int, Itinerary] = {}
+
+
+def make_trip(days: int, seed: int = 0) -> Itinerary:
+    """Synthetic trip with a realistic mix of filled and empty fields"""
+    rng = np.random.default_rng(seed)
+    start = date(2025, 1, 1)
+    cities = rng.choice(CITIES, size=days + 1)
+    filled = rng.random((6, days)) < np.array([[0.95], [0.9], [0.9], [0.6], [0.7], [0.4]])
+
+    def text(values, mask):
+        return [str(value) if keep else '' for value, keep in zip(values, mask)]
+
+    columns = {
+        'date': [start + timedelta(days=i) if keep else None for i, keep in enumerate(filled[0])],
+        'location': text(cities[1:], filled[1]),
+        'transport_type': rng.choice(TRANSPORT_TYPES, size=days).tolist(),
+        'transport_from': text(cities[:-1], filled[2]),
+        'transport_to': text(cities[1:], filled[2]),
+        'transport_time': text((f"{h:02d}:00" for h in rng.integers(0, 24, size=days)), filled[3]),
+        'transport_cost': np.round(rng.gamma(2.0, 15.0, size=days), 2).tolist(),
+        'accommodation_type': rng.choice(ACCOMMODATION_TYPES, size=days).tolist(),
+        'accommodation_name': text((f"Hostel {i}" for i in range(days)), filled[4]),
+        'accommodation_cost': np.round(rng.gamma(3.0, 10.0, size=days), 2).tolist(),
+        'notes': text(("Book ahead; check the market" for _ in range(days)), filled[5]),
+    }
+    return Itinerary.from_columns(columns)
+
+
+def get_trip(days: int) -> Itinerary:
+    """Shared read-only trip of a given size; copy it before mutating"""
+    if days not in _trips:
+        _trips[days] = make_trip(days)
+    return _trips[days]
+
+
+def trip_sizes(limit: int = TRIP_SIZES[-1]):
+    return [pytest.param(days, id=f"{days}d") for days in TRIP_SIZES if days <= min(limit, MAX_DAYS)]
+
+
+@pytest.fixture(params=trip_sizes())
+def trip_size(request) -> int:
+    return request.param
+
+
+@pytest.fixture
+def trip(trip_size) -> Itinerary:
+    return get_trip(trip_size)
+
+
+TRIP_INFO = {'name': 'Benchmark trip', 'start_date': date(2025, 1, 1), 'end_date': date(2025, 12, 31),
+             'destinations': ', '.join(CITIES), 'group_size': 2}
+BUDGET_DATA = {'total_budget': 5000.0, 'food_budget': 900.0, 'activities_budget': 400.0,
+               'shopping_budget': 0.0, 'misc_costs': 50.0, 'emergency_budget': 200.0,
+               'insurance_cost': 60.0, 'currency': 'GBP'}
@@ -0,0 +1,192 @@
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from itinerary import Itinerary
+from serialization import to_date
+from storage_backends import StorageBackend, as_itinerary
+
+CATALOG_FIELDS = ['trip_id', 'owner', 'name', 'start_date', 'end_date', 'day_count', 'total_cost', 'last_saved']
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    trip_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    start_date TEXT,
+    end_date TEXT,
+    day_count INTEGER NOT NULL DEFAULT 0,
+    total_cost REAL NOT NULL DEFAULT 0,
+    last_saved TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_owner_saved ON catalog (owner, last_saved);
+CREATE INDEX IF NOT EXISTS idx_catalog_owner_name ON catalog (owner, name);
+"""
+
+_SQL_INSERT = (
+    f"INSERT INTO catalog ({', '.join(CATALOG_FIELDS)}) "
+    f"VALUES ({', '.join('?' for _ in CATALOG_FIELDS)})"
+)
+_SQL_UPDATE_SUMMARY = (
+    "UPDATE catalog SET name = ?, start_date = ?, end_date = ?, day_count = ?, total_cost = ?, last_saved = ? "
+    "WHERE trip_id = ?"
+)
+_SQL_SELECT = f"SELECT {', '.join(CATALOG_FIELDS)} FROM catalog WHERE trip_id = ?"
+_SQL_DELETE = "DELETE FROM catalog WHERE trip_id = ?"
+
+
+def trip_summary(trip_data: List[Dict], trip_info: Dict) -> Dict[str, Any]:
+    """Catalog columns for a trip, from the store's aggregates rather than its rows"""
+    itinerary = as_itinerary(trip_data)
+    start_date = to_date(trip_info.get('start_date'))
+    end_date = to_date(trip_info.get('end_date'))
+
+    # Fall back to the span of the day dates when the overview has no range
+    if start_date is None or end_date is None:
+        dates = itinerary.column('date')
+        dates = dates[~np.isnat(dates)]
+        if len(dates):
+            start_date = start_date or dates.min().astype(object)
+            end_date = end_date or dates.max().astype(object)
+
+    return {
+        'name': trip_info.get('name') or '',
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'day_count': len(itinerary),
+        'total_cost': itinerary.total_cost()
+    }
+
+
+class TripCatalog:
+    """Index of every trip (owner, name, date range, day count, total cost)
+
+    Listing and searching only touch the index; trip bodies stay in the
+    storage backend and are loaded when a trip is opened. The index lives in
+    its own SQLite database so it works in front of any backend.
+    """
+
+    def __init__(self, backend: StorageBackend, index_path: str = "trip_catalog.db"):
+        self.backend = backend
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(CATALOG_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Trips
+    # ------------------------------------------------------------------
+
+    def create_trip(self, owner: str, name: str = '', trip_info: Optional[Dict] = None,
+                    budget_data: Optional[Dict] = None) -> str:
+        """Register and store a new empty trip; returns its id"""
+        trip_id = uuid.uuid4().hex
+        trip_info = dict(trip_info or {}, name=name)
+        budget_data = dict(budget_data or {})
+        self.backend.save(trip_id, Itinerary(), budget_data, trip_info)
+
+        summary = trip_summary([], trip_info)
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_INSERT, (trip_id, owner, summary['name'], summary['start_date'],
+                                             summary['end_date'], 0, 0.0, datetime.now().isoformat()))
+        return trip_id
+
+    def open_trip(self, trip_id: str, **manager_options):
+        """A DataManager for one trip; its body is read on load_data()"""
+        from data_manager import DataManager
+
+        if self.get(trip_id) is None:
+            raise KeyError(trip_id)
+        return DataManager(backend=self.backend, trip_id=trip_id, catalog=self, **manager_options)
+
+    def record_save(self, trip_id: str, trip_data: List[Dict], trip_info: Dict,
+                    last_saved: Optional[str] = None) -> None:
+        """Refresh a trip's index entry after it has been saved"""
+        summary = trip_summary(trip_data, trip_info)
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_UPDATE_SUMMARY, (
+                summary['name'], summary['start_date'], summary['end_date'], summary['day_count'],
+                summary['total_cost'], last_saved or datetime.now().isoformat(), trip_id
+            ))
+
+    def delete_trip(self, trip_id: str) -> bool:
+        """Remove a trip's body and its index entry"""
+        existed = self.backend.delete(trip_id)
+        with self._lock, self._conn:
+            existed = self._conn.execute(_SQL_DELETE, (trip_id,)).rowcount > 0 or existed
+        return existed
+
+    # ------------------------------------------------------------------
+    # Index queries
+    # ------------------------------------------------------------------
+
+    def get(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        """One trip's index entry"""
+        with self._lock:
+            row = self._conn.execute(_SQL_SELECT, (trip_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def list_trips(self, owner: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Index entries, most recently saved first"""
+        return self.search(owner=owner, limit=limit, offset=offset)
+
+    def search(self, owner: Optional[str] = None, text: str = '', starts_after: Any = None,
+               ends_before: Any = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Index entries matching a name fragment and/or a date window"""
+        clauses, params = [], []
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if text:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        if starts_after is not None:
+            clauses.append("start_date >= ?")
+            params.append(to_date(starts_after).isoformat())
+        if ends_before is not None:
+            clauses.append("end_date <= ?")
+            params.append(to_date(ends_before).isoformat())
+
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        query = (f"SELECT {', '.join(CATALOG_FIELDS)} FROM catalog {where}"
+                 "ORDER BY last_saved DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(query, params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, owner: Optional[str] = None) -> int:
+        """Number of indexed trips, optionally for one owner"""
+        with self._lock:
+            if owner is None:
+                return self._conn.execute("SELECT COUNT(*) FROM catalog").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM catalog WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def rebuild(self, owner: str) -> int:
+        """Index stored trips missing from the catalog under `owner`; returns how many"""
+        added = 0
+        for trip in self.backend.list_trips():
+            if self.get(trip['trip_id']) is not None:
+                continue
+            data = self.backend.load(trip['trip_id'])
+            if data is None:
+                continue
+            summary = trip_summary(data['trip_data'], data.get('trip_info', {}))
+            with self._lock, self._conn:
+                self._conn.execute(_SQL_INSERT, (
+                    trip['trip_id'], owner, summary['name'], summary['start_date'], summary['end_date'],
+                    summary['day_count'], summary['total_cost'], data.get('last_saved')
+                ))
+            added += 1
+        return added
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+def content_hash(*parts: Any) -> str:
+    """Cheap, stable digest of chart inputs (dicts, sequences, arrays, scalars)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+def _feed(digest, value: Any) -> None:
+    """Add one value to a running digest, tagging its type to avoid collisions"""
+    if isinstance(value, np.ndarray):
+        digest.update(b'a' + str(value.dtype).encode() + str(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'd%d' % len(value))
+        for key, item in value.items():
+            _feed(digest, key)
+            _feed(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'l%d' % len(value))
+        for item in value:
+            _feed(digest, item)
+    else:
+        digest.update(b's' + repr(value).encode('utf-8') + b'\0')
+
+
+class FigureCache:
+    """Thread-safe LRU cache of built figures with hit/miss counters"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached figure and mark it recently used, or None"""
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is None:
+                self.misses += 1
+                return None
+            self._figures.move_to_end(key)
+            self.hits += 1
+            return figure
+
+    def put(self, key: str, figure: Any) -> None:
+        """Store a figure, evicting the least recently used beyond maxsize"""
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all figures and reset the counters"""
+        with self._lock:
+            self._figures.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._figures),
+                'maxsize': self.maxsize
+            }
+
+    def __len__(self) -> int:
+        return len(self._figures)
+
+
+# Shared by every session in the process; sessions also keep a small private cache
+GLOBAL_FIGURE_CACHE = FigureCache(maxsize=256)
+
+
+def get_or_build(chart: str, inputs: Any, builder: Callable[[], Any],
+                 session_cache: Optional[FigureCache] = None) -> Any:
+    """Return the figure for `inputs`, building it only on a cache miss"""
+    key = content_hash(chart, inputs)
+
+    if session_cache is not None:
+        figure = session_cache.get(key)
+        if figure is not None:
+            return figure
+
+    figure = GLOBAL_FIGURE_CACHE.get(key)
+    if figure is None:
+        figure = builder()
+        GLOBAL_FIGURE_CACHE.put(key, figure)
+
+    if session_cache is not None:
+        session_cache.put(key, figure)
+    return figure
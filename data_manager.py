@@ -1,157 +1,360 @@
-import json
+import atexit
 import os
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+
+from backups import BackupStore
+from itinerary import Itinerary
+from profiling import PROFILER
+from serialization import encode_trip_info
+from storage_backends import DEFAULT_TRIP_ID, JsonFileBackend, StorageBackend
+
+if TYPE_CHECKING:
+    from catalog import TripCatalog
 
 class DataManager:
-    """Simplified data manager for the trip planner"""
+    """Simplified data manager for the trip planner
+    
+    Storage is delegated to a StorageBackend; by default a journaled JSON
+    file at ``data_file`` (``file_format`` "orjson" or "msgpack" for faster
+    snapshots when installed). Pass ``backend=SQLiteBackend(...)`` to keep
+    many trips in one database, and ``trip_id`` to pick which trip this
+    manager reads and writes. Loaded dates are date objects. Managers handed
+    out by TripCatalog.open_trip() keep the catalog's index entry current.
+    
+    backup_data() adds to a deduplicated backup store in ``backup_dir``
+    (``trip_backups`` beside the data file by default).
+    
+    Repeated loads are served from the backend's in-memory copy while the
+    stored trip is unchanged, and get_metadata()/get_last_saved() read a
+    small header instead of the whole trip.
+    """
     
-    def __init__(self, data_file: str = "trip_data.json"):
-        """Initialize data manager with JSON file path"""
+    def __init__(self, data_file: str = "trip_data.json", compact_every: int = 50,
+                 backend: Optional[StorageBackend] = None, trip_id: str = DEFAULT_TRIP_ID,
+                 file_format: str = "json", backup_dir: Optional[str] = None,
+                 catalog: Optional['TripCatalog'] = None):
+        """Initialize data manager with JSON file path or an explicit backend"""
         self.data_file = data_file
+        if backup_dir is None:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(data_file)), "trip_backups")
+        self.backups = BackupStore(backup_dir)
+        self.backend = backend or JsonFileBackend(data_file, compact_every=compact_every,
+                                                  file_format=file_format)
+        self.trip_id = trip_id
+        self.catalog = catalog
+        # Saves may come from the auto-save thread as well as the script thread
+        self._lock = threading.RLock()
         
+    @PROFILER.timed("data_manager.save")
     def save_data(self, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> bool:
-        """Save all trip data to JSON file with error handling"""
+        """Save all trip data through the storage backend with error handling"""
         try:
-            # Prepare data structure
-            data_to_save = {
-                "trip_data": trip_data,
-                "budget_data": budget_data,
-                "trip_info": self._serialize_trip_info(trip_info),
-                "last_saved": datetime.now().isoformat(),
-                "version": "1.0"
-            }
-            
-            # Write to JSON file with proper encoding
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, indent=2, ensure_ascii=False, default=str)
-            
+            trip_info = encode_trip_info(trip_info)
+            with self._lock:
+                self.backend.save(self.trip_id, trip_data, budget_data, trip_info)
+                if self.catalog is not None:
+                    self.catalog.record_save(self.trip_id, trip_data, trip_info)
             return True
             
         except Exception as e:
             print(f"Error saving data: {e}")
             return False
     
+    @PROFILER.timed("data_manager.load")
     def load_data(self) -> Optional[Dict[str, Any]]:
-        """Load trip data from JSON file with error handling"""
+        """Load trip data from the storage backend with error handling"""
         try:
-            if not os.path.exists(self.data_file):
-                return None
-            
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Deserialize trip_info dates
-            if "trip_info" in data:
-                data["trip_info"] = self._deserialize_trip_info(data["trip_info"])
-            
-            return data
+            with self._lock:
+                return self.backend.load(self.trip_id)
             
         except Exception as e:
             print(f"Error loading data: {e}")
             return None
     
+    def delete_data(self) -> bool:
+        """Delete this manager's trip from the backend"""
+        try:
+            with self._lock:
+                if self.catalog is not None:
+                    return self.catalog.delete_trip(self.trip_id)
+                return self.backend.delete(self.trip_id)
+        except Exception as e:
+            print(f"Error deleting data: {e}")
+            return False
+    
+    def list_trips(self) -> List[Dict[str, Any]]:
+        """Summaries of every trip stored in the backend"""
+        try:
+            return self.backend.list_trips()
+        except Exception as e:
+            print(f"Error listing trips: {e}")
+            return []
+    
+    def compact(self) -> bool:
+        """Fold any incremental save log into the main record"""
+        try:
+            with self._lock:
+                return self.backend.compact(self.trip_id)
+        except Exception as e:
+            print(f"Error compacting data: {e}")
+            return False
+    
+    def release(self) -> None:
+        """Drop the backend's in-memory copy of this trip, e.g. after spilling it"""
+        try:
+            with self._lock:
+                self.backend.release(self.trip_id)
+        except Exception as e:
+            print(f"Error releasing data: {e}")
+
+    @PROFILER.timed("data_manager.backup")
     def backup_data(self) -> bool:
-        """Create a timestamped backup of current data"""
+        """Back up the current data, storing only the day chunks that changed"""
         try:
-            if not os.path.exists(self.data_file):
+            with self._lock:
+                data = self.backend.load(self.trip_id)
+            if data is None:
                 return False
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = f"trip_data_backup_{timestamp}.json"
-            
-            # Copy current file to backup
-            with open(self.data_file, 'r', encoding='utf-8') as src:
-                with open(backup_file, 'w', encoding='utf-8') as dst:
-                    dst.write(src.read())
-            
+            # backup() returns None when the latest backup already holds this
+            # state: nothing new is written, but the data is backed up all the same
+            self.backups.backup(self.trip_id, data)
             return True
             
         except Exception as e:
             print(f"Error creating backup: {e}")
             return False
     
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """This trip's backups, newest first"""
+        try:
+            return self.backups.list_backups(self.trip_id)
+        except Exception as e:
+            print(f"Error listing backups: {e}")
+            return []
+    
+    def restore_backup(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        """Load a backup in load_data() form; it is not written back until saved"""
+        try:
+            return self.backups.restore(backup_id)
+        except Exception as e:
+            print(f"Error restoring backup: {e}")
+            return None
+    
     def data_exists(self) -> bool:
         """Check if saved data file exists"""
-        return os.path.exists(self.data_file)
+        return self.backend.exists(self.trip_id)
+    
+    @PROFILER.timed("data_manager.metadata")
+    def get_metadata(self) -> Optional[Dict[str, Any]]:
+        """last_saved, version and day_count without loading the trip's days"""
+        try:
+            return self.backend.read_header(self.trip_id)
+        except Exception as e:
+            print(f"Error reading metadata: {e}")
+            return None
     
     def get_last_saved(self) -> Optional[str]:
         """Get the last saved timestamp"""
-        data = self.load_data()
-        if data and "last_saved" in data:
-            return data["last_saved"]
+        metadata = self.get_metadata()
+        if metadata:
+            return metadata.get("last_saved")
         return None
+
+# ============================================================================
+# BACKGROUND AUTO-SAVE
+# ============================================================================
+
+AUTO_SAVE_DEBOUNCE_SECONDS = 1.0
+# Upper bound on how long continuous editing can postpone a write
+AUTO_SAVE_MAX_DELAY_SECONDS = 10.0
+# How long process exit, session end or clearing waits for a write in progress
+AUTO_SAVE_EXIT_TIMEOUT_SECONDS = 5.0
+
+class AutoSaveWorker:
+    """Background thread that writes the latest submitted trip state
     
-    def _serialize_trip_info(self, trip_info: Dict) -> Dict:
-        """Convert date objects to strings for JSON serialization"""
-        if not trip_info:
-            return {}
-            
-        serialized = trip_info.copy()
-        
-        # Handle start_date
-        if "start_date" in serialized and serialized["start_date"]:
-            try:
-                if hasattr(serialized["start_date"], 'isoformat'):
-                    serialized["start_date"] = serialized["start_date"].isoformat()
-                else:
-                    serialized["start_date"] = str(serialized["start_date"])
-            except Exception:
-                serialized["start_date"] = None
-        
-        # Handle end_date
-        if "end_date" in serialized and serialized["end_date"]:
-            try:
-                if hasattr(serialized["end_date"], 'isoformat'):
-                    serialized["end_date"] = serialized["end_date"].isoformat()
-                else:
-                    serialized["end_date"] = str(serialized["end_date"])
-            except Exception:
-                serialized["end_date"] = None
+    submit() only snapshots the state and returns. Submissions arriving
+    within ``debounce`` seconds of each other are coalesced and only the
+    newest is written, at most ``max_delay`` seconds after the first one.
+    """
+    
+    def __init__(self, manager: 'DataManager', debounce: float = AUTO_SAVE_DEBOUNCE_SECONDS,
+                 max_delay: float = AUTO_SAVE_MAX_DELAY_SECONDS):
+        self.manager = manager
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._pending = None
+        self._queue_depth = 0
+        self._first_submit = 0.0
+        self._last_submit = 0.0
+        self._flush_requested = False
+        self._writing = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._saves_written = 0
+        self._saves_coalesced = 0
+        self._last_flush_latency: Optional[float] = None
+        self._last_flush_at: Optional[str] = None
+        self._last_error: Optional[str] = None
+    
+    def submit(self, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        """Queue a state to be written, replacing any not yet written"""
+        # Snapshot now: the caller keeps editing while the worker writes
+        if isinstance(trip_data, Itinerary):
+            days = trip_data.copy()
+        else:
+            days = [dict(day) for day in trip_data]
+        state = (days, dict(budget_data), dict(trip_info))
         
-        return serialized
+        with self._cond:
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_submit = now
+            else:
+                self._saves_coalesced += 1
+            self._pending = state
+            self._queue_depth += 1
+            self._last_submit = now
+            self._ensure_thread()
+            self._cond.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write any pending state now and wait for it; False on timeout"""
+        with self._cond:
+            if self._pending is None and not self._writing:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._pending is None and not self._writing, timeout)
+    
+    def discard(self, timeout: Optional[float] = None) -> bool:
+        """Drop any state not yet written and wait out a write in progress; False on timeout"""
+        with self._cond:
+            self._pending = None
+            self._queue_depth = 0
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._writing, timeout)
+    
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Flush pending state and end the worker thread"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return flushed
     
-    def _deserialize_trip_info(self, trip_info: Dict) -> Dict:
-        """Convert date strings back to date objects"""
-        if not trip_info:
-            return {}
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, write counters and the latency of the last flush"""
+        with self._cond:
+            return {
+                'queue_depth': self._queue_depth,
+                'pending': self._pending is not None,
+                'saves_written': self._saves_written,
+                'saves_coalesced': self._saves_coalesced,
+                'last_flush_latency': self._last_flush_latency,
+                'last_flush_at': self._last_flush_at,
+                'last_error': self._last_error
+            }
+    
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="trip-auto-save", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                
+                # Wait for a quiet period, unless asked to flush
+                while not (self._flush_requested or self._stopping):
+                    due = min(self._last_submit + self.debounce, self._first_submit + self.max_delay)
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                state = self._pending
+                self._flush_requested = False
+                if state is None:
+                    # Discarded while waiting for the quiet period
+                    continue
+                self._pending = None
+                self._queue_depth = 0
+                self._writing = True
             
-        deserialized = trip_info.copy()
-        
-        # Handle start_date
-        if "start_date" in deserialized and deserialized["start_date"]:
-            try:
-                deserialized["start_date"] = datetime.fromisoformat(deserialized["start_date"]).date()
-            except (ValueError, TypeError, AttributeError):
-                deserialized["start_date"] = None
-        
-        # Handle end_date
-        if "end_date" in deserialized and deserialized["end_date"]:
-            try:
-                deserialized["end_date"] = datetime.fromisoformat(deserialized["end_date"]).date()
-            except (ValueError, TypeError, AttributeError):
-                deserialized["end_date"] = None
-        
-        return deserialized
+            started = time.perf_counter()
+            saved = self.manager.save_data(*state)
+            latency = time.perf_counter() - started
+            
+            with self._cond:
+                self._writing = False
+                self._last_flush_latency = latency
+                self._last_flush_at = datetime.now().isoformat()
+                if saved:
+                    self._saves_written += 1
+                    self._last_error = None
+                else:
+                    self._last_error = "save failed"
+                self._cond.notify_all()
+
+# Convenience functions for direct use. They share one manager so that
+# repeated saves can be written as journal deltas.
+_default_manager: Optional[DataManager] = None
+
+def get_default_manager() -> DataManager:
+    """Return the shared default data manager"""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = DataManager()
+    return _default_manager
 
-# Convenience functions for direct use
 def save_trip_data(trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> bool:
     """Save trip data using default data manager"""
-    dm = DataManager()
-    return dm.save_data(trip_data, budget_data, trip_info)
+    return get_default_manager().save_data(trip_data, budget_data, trip_info)
 
 def load_trip_data() -> Optional[Dict[str, Any]]:
     """Load trip data using default data manager"""
-    dm = DataManager()
-    return dm.load_data()
+    return get_default_manager().load_data()
+
+_auto_save_worker: Optional[AutoSaveWorker] = None
+_auto_save_lock = threading.Lock()
+
+def get_auto_save_worker() -> AutoSaveWorker:
+    """Return the shared auto-save worker for the default data manager"""
+    global _auto_save_worker
+    with _auto_save_lock:
+        if _auto_save_worker is None:
+            _auto_save_worker = AutoSaveWorker(get_default_manager())
+            # Write whatever is still pending when the process exits
+            atexit.register(_auto_save_worker.stop, AUTO_SAVE_EXIT_TIMEOUT_SECONDS)
+        return _auto_save_worker
 
 def auto_save(trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
-    """Auto-save function for Streamlit callbacks with error handling"""
+    """Auto-save function for Streamlit callbacks; writes in the background"""
     try:
-        save_trip_data(trip_data, budget_data, trip_info)
+        get_auto_save_worker().submit(trip_data, budget_data, trip_info)
     except Exception as e:
         print(f"Auto-save failed: {e}")
 
+def flush_auto_save(timeout: Optional[float] = None) -> bool:
+    """Write any pending auto-save now, e.g. when a session ends"""
+    if _auto_save_worker is None:
+        return True
+    return _auto_save_worker.flush(timeout)
+
 def initialize_from_saved_data():
     """Initialize session state from saved data if it exists"""
     try:
@@ -169,12 +372,12 @@ def initialize_from_saved_data():
     return None
 
 def clear_saved_data() -> bool:
-    """Clear saved data file"""
+    """Clear saved data file, along with any auto-save not yet written"""
     try:
-        if os.path.exists("trip_data.json"):
-            os.remove("trip_data.json")
-            return True
-        return False
+        # Otherwise a queued auto-save writes the trip straight back
+        if _auto_save_worker is not None:
+            _auto_save_worker.discard(AUTO_SAVE_EXIT_TIMEOUT_SECONDS)
+        return get_default_manager().backend.delete(DEFAULT_TRIP_ID)
     except Exception as e:
         print(f"Error clearing saved data: {e}")
         return False
@@ -0,0 +1,173 @@
+import csv
+import gzip
+import io
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+from itinerary import DAY_FIELDS, Itinerary
+
+# Fixed column order for CSV exports, independent of how rows were built
+CSV_COLUMNS = list(DAY_FIELDS)
+CSV_CHUNK_ROWS = 1000
+
+
+def iter_csv_chunks(itinerary: Itinerary, columns: Iterable[str] = CSV_COLUMNS,
+                    chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[str]:
+    """Yield the CSV export as text chunks of at most `chunk_rows` rows"""
+    columns = list(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+
+    for start in range(0, len(itinerary), chunk_rows):
+        writer.writerows(itinerary.iter_rows(columns, start, start + chunk_rows))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_csv(itinerary: Itinerary, compress: bool = False,
+               columns: Iterable[str] = CSV_COLUMNS) -> io.BytesIO:
+    """Write the itinerary as CSV (optionally gzipped) into a binary buffer"""
+    output = io.BytesIO()
+    if compress:
+        with gzip.GzipFile(fileobj=output, mode='wb', mtime=0) as stream:
+            for chunk in iter_csv_chunks(itinerary, columns):
+                stream.write(chunk.encode('utf-8'))
+    else:
+        for chunk in iter_csv_chunks(itinerary, columns):
+            output.write(chunk.encode('utf-8'))
+    output.seek(0)
+    return output
+
+
+# ============================================================================
+# TEXT ITINERARY
+# ============================================================================
+
+# One template set per target; each entry is compiled to a bound str.format
+# once at import. Lines marked optional are skipped when their field is empty.
+TEXT_TEMPLATES = {
+    'plain': {
+        'title': "🎒 {name}\n" + "=" * 50 + "\n\n",
+        'date_range': "📅 {start} → {end}\n",
+        'day_count': "🌍 {days} days of adventure\n\n",
+        'heading': "📍 Day {day} - {location}\n",
+        'date': "📅 Date: {date}\n",
+        'transport': "🚌 Transport: {transport_from} → {transport_to}\n",
+        'transport_type': "   Type: {transport_type}\n",
+        'transport_time': "   Time: {transport_time}\n",
+        'accommodation': "🏨 Accommodation: {accommodation_type}\n",
+        'accommodation_name': "   Place: {accommodation_name}\n",
+        'notes': "📝 Notes: {notes}\n",
+        'day_cost': "💰 Daily Cost: £{cost:.2f}\n",
+        'separator': "-" * 50 + "\n\n",
+        'total_cost': "💰 Total Trip Cost: £{total:.2f}\n",
+        'total_days': "🎒 Total Days: {days}\n",
+        'average_cost': "📊 Average Daily Cost: £{average:.2f}\n",
+        'closing': "\n🌟 Have an amazing adventure! Safe travels! 🎒"
+    },
+    'markdown': {
+        'title': "# 🎒 {name}\n\n",
+        'date_range': "**📅 {start} → {end}**  \n",
+        'day_count': "🌍 {days} days of adventure\n\n",
+        'heading': "## 📍 Day {day} - {location}\n\n",
+        'date': "- **📅 Date:** {date}\n",
+        'transport': "- **🚌 Transport:** {transport_from} → {transport_to}\n",
+        'transport_type': "  - Type: {transport_type}\n",
+        'transport_time': "  - Time: {transport_time}\n",
+        'accommodation': "- **🏨 Accommodation:** {accommodation_type}\n",
+        'accommodation_name': "  - Place: {accommodation_name}\n",
+        'notes': "- **📝 Notes:** {notes}\n",
+        'day_cost': "- **💰 Daily Cost:** £{cost:.2f}\n",
+        'separator': "\n---\n\n",
+        'total_cost': "- **💰 Total Trip Cost:** £{total:.2f}\n",
+        'total_days': "- **🎒 Total Days:** {days}\n",
+        'average_cost': "- **📊 Average Daily Cost:** £{average:.2f}\n",
+        'closing': "\n🌟 Have an amazing adventure! Safe travels! 🎒\n"
+    }
+}
+
+# Day block layout shared by all targets: (template, field that must be non-empty)
+DAY_BLOCK_LINES = [
+    ('heading', None),
+    ('date', None),
+    ('transport', None),
+    ('transport_type', None),
+    ('transport_time', 'transport_time'),
+    ('accommodation', None),
+    ('accommodation_name', 'accommodation_name'),
+    ('notes', 'notes'),
+    ('day_cost', None),
+    ('separator', None)
+]
+
+COMPILED_TEXT_TEMPLATES = {
+    target: {name: template.format for name, template in templates.items()}
+    for target, templates in TEXT_TEMPLATES.items()
+}
+
+
+class TextItineraryRenderer:
+    """Renders itineraries to text, caching each day's block until that day changes"""
+
+    def __init__(self):
+        # (target, row revision, day number) -> rendered block
+        self._blocks: Dict[Tuple[str, int, int], str] = {}
+
+    def render_day(self, day: Dict[str, Any], cost: float, target: str = 'plain') -> str:
+        """Render one day block from a day dict"""
+        templates = COMPILED_TEXT_TEMPLATES[target]
+        return ''.join(
+            templates[name](cost=cost, **day)
+            for name, required in DAY_BLOCK_LINES
+            if required is None or day.get(required)
+        )
+
+    def iter_render(self, itinerary: Itinerary, trip_info: Dict[str, Any],
+                    target: str = 'plain') -> Iterator[str]:
+        """Yield the document piece by piece: header, one block per day, footer"""
+        templates = COMPILED_TEXT_TEMPLATES[target]
+        total_days = len(itinerary)
+
+        yield templates['title'](name=trip_info.get('name', 'My Adventure'))
+        start_date = trip_info.get('start_date', '')
+        end_date = trip_info.get('end_date', '')
+        if start_date and end_date:
+            yield templates['date_range'](start=start_date, end=end_date)
+        yield templates['day_count'](days=total_days)
+
+        daily_costs = itinerary.daily_costs()
+        revisions = itinerary.column('revision')
+        blocks = {}
+        for i in range(total_days):
+            key = (target, int(revisions[i]), i + 1)
+            block = self._blocks.get(key)
+            if block is None:
+                block = self.render_day(itinerary.get_day(i), float(daily_costs[i]), target)
+            blocks[key] = block
+            yield block
+        # Keep only blocks still in use, so the cache never outgrows the trip
+        self._blocks = {k: v for k, v in self._blocks.items() if k[0] != target}
+        self._blocks.update(blocks)
+
+        total_cost = float(daily_costs.sum())
+        yield templates['total_cost'](total=total_cost)
+        yield templates['total_days'](days=total_days)
+        if total_days > 0:
+            yield templates['average_cost'](average=total_cost / total_days)
+        yield templates['closing']()
+
+    def render(self, itinerary: Itinerary, trip_info: Dict[str, Any], target: str = 'plain') -> str:
+        """Render the whole document with a single join"""
+        return ''.join(self.iter_render(itinerary, trip_info, target))
+
+    def export(self, itinerary: Itinerary, trip_info: Dict[str, Any], target: str = 'plain') -> io.BytesIO:
+        """Stream the rendered document into a UTF-8 buffer for download"""
+        output = io.BytesIO()
+        for piece in self.iter_render(itinerary, trip_info, target):
+            output.write(piece.encode('utf-8'))
+        output.seek(0)
+        return output
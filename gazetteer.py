@@ -0,0 +1,234 @@
+import bisect
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.tsv")
+GAZETTEER_COLUMNS = ('id', 'name', 'kind', 'country', 'lat', 'lon', 'aliases')
+
+# Match quality of an index key, best first: the place's own name, one of its
+# aliases (codes, local spellings), or a later word of the name ("mai" for
+# "Chiang Mai")
+RANK_NAME = 0
+RANK_ALIAS = 1
+RANK_WORD = 2
+
+DEFAULT_SUGGESTIONS = 8
+NORMALIZER_CACHE_SIZE = 2048
+
+# Letters NFKD does not split into a base letter plus accent
+_FOLD_LETTERS = str.maketrans({'đ': 'd', 'ł': 'l', 'ø': 'o', 'æ': 'ae', 'œ': 'oe', 'ı': 'i', 'þ': 'th'})
+_APOSTROPHES = re.compile(r"['’`]")
+_SEPARATORS = re.compile(r"[\W_]+")
+# Qualifiers people add after a place name: "Bangkok, Thailand", "Hanoi (Old Quarter)"
+_QUALIFIER = re.compile(r"\s*[,(].*$")
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, accents and punctuation so spellings of a name compare equal"""
+    text = unicodedata.normalize('NFKD', text.casefold()).translate(_FOLD_LETTERS)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = _APOSTROPHES.sub('', text)
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+class Place:
+    """One gazetteer entry"""
+
+    __slots__ = ('id', 'name', 'kind', 'country', 'lat', 'lon', 'aliases')
+
+    def __init__(self, place_id: str, name: str, kind: str, country: str, lat: float, lon: float,
+                 aliases: Tuple[str, ...] = ()):
+        self.id = place_id
+        self.name = name
+        self.kind = kind
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.aliases = aliases
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.country}"
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'id': self.id, 'name': self.name, 'kind': self.kind, 'country': self.country,
+                'lat': self.lat, 'lon': self.lon}
+
+    def __repr__(self) -> str:
+        return f"Place({self.id!r}, {self.name!r})"
+
+
+# ============================================================================
+# GAZETTEER
+# ============================================================================
+
+class Gazetteer:
+    """Places with an exact-match table and a sorted key index for prefix search
+
+    Every normalized name, alias and name word becomes one entry of a sorted
+    key list; all keys starting with a prefix are a contiguous run found with
+    two bisections, so autocomplete cost depends on the number of matches,
+    not the size of the gazetteer.
+    """
+
+    def __init__(self, places: Iterable[Place]):
+        self._places: Dict[str, Place] = {}
+        self._exact: Dict[str, str] = {}
+        entries = []
+        for place in places:
+            if place.id in self._places:
+                raise ValueError(f"duplicate place id: {place.id}")
+            self._places[place.id] = place
+            name = normalize_text(place.name)
+            entries.append((name, RANK_NAME, place.id))
+            for alias in place.aliases:
+                entries.append((normalize_text(alias), RANK_ALIAS, place.id))
+            words = name.split(' ')
+            for start in range(1, len(words)):
+                entries.append((' '.join(words[start:]), RANK_WORD, place.id))
+
+        entries = [entry for entry in entries if entry[0]]
+        # Names win over aliases when both spell the same text
+        for key, rank, place_id in sorted(entries, key=lambda entry: entry[1], reverse=True):
+            if rank != RANK_WORD:
+                self._exact[key] = place_id
+
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [(rank, place_id) for _, rank, place_id in entries]
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> 'Gazetteer':
+        """Read a tab-separated gazetteer; '#' lines are comments, the first other line the header"""
+        places = []
+        with open(path, encoding='utf-8') as f:
+            rows = (line.rstrip('\r\n').split('\t') for line in f if line.strip() and not line.startswith('#'))
+            header = next(rows, None)
+            if header is None or tuple(header) != GAZETTEER_COLUMNS:
+                raise ValueError(f"{path}: expected columns {', '.join(GAZETTEER_COLUMNS)}")
+            for place_id, name, kind, country, lat, lon, aliases in rows:
+                places.append(Place(place_id, name, kind, country, float(lat), float(lon),
+                                    tuple(alias for alias in aliases.split('|') if alias)))
+        return cls(places)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def __iter__(self):
+        return iter(self._places.values())
+
+    def get(self, place_id: str) -> Optional[Place]:
+        return self._places.get(place_id)
+
+    def lookup(self, text: str) -> Optional[Place]:
+        """The place `text` names exactly (ignoring case, accents and qualifiers), or None"""
+        key = normalize_text(text)
+        place_id = self._exact.get(key)
+        if place_id is None and key:
+            # "Bangkok, Thailand" or "Hanoi (Old Quarter)": try the part before the qualifier
+            head = normalize_text(_QUALIFIER.sub('', text))
+            if head and head != key:
+                place_id = self._exact.get(head)
+        return self._places[place_id] if place_id is not None else None
+
+    def complete(self, prefix: str, limit: int = DEFAULT_SUGGESTIONS) -> List[Place]:
+        """Places with a name, alias or name word starting with `prefix`, best matches first"""
+        key = normalize_text(prefix)
+        if not key or limit <= 0:
+            return []
+        start = bisect.bisect_left(self._keys, key)
+        stop = bisect.bisect_right(self._keys, key + '\uffff', start)
+
+        # Best rank per place; an exact hit beats any longer key
+        best: Dict[str, Tuple[int, int]] = {}
+        for position in range(start, stop):
+            rank, place_id = self._entries[position]
+            score = (0 if self._keys[position] == key else 1, rank)
+            if place_id not in best or score < best[place_id]:
+                best[place_id] = score
+
+        places = self._places
+        ranked = sorted(best, key=lambda place_id: (best[place_id], places[place_id].kind != 'city',
+                                                      len(places[place_id].name), places[place_id].name))
+        return [places[place_id] for place_id in ranked[:limit]]
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """Return the process-wide gazetteer, loading the bundled data on first use"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer.load()
+        return _gazetteer
+
+
+# ============================================================================
+# PER-SESSION NORMALIZATION
+# ============================================================================
+
+class PlaceNormalizer:
+    """Maps free-text place names to gazetteer places, with an LRU cache of results
+
+    Sessions re-resolve the same handful of names on every rerun; the cache
+    keeps that to one dictionary lookup per distinct text.
+    """
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None, maxsize: int = NORMALIZER_CACHE_SIZE):
+        self.gazetteer = gazetteer or get_gazetteer()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._resolved: "OrderedDict[str, Optional[str]]" = OrderedDict()
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """The gazetteer place `text` names, or None if it is unknown or empty"""
+        try:
+            place_id = self._resolved[text]
+        except KeyError:
+            self.misses += 1
+            place = self.gazetteer.lookup(text)
+            place_id = place.id if place is not None else None
+            self._resolved[text] = place_id
+            if len(self._resolved) > self.maxsize:
+                self._resolved.popitem(last=False)
+            return place
+        self.hits += 1
+        self._resolved.move_to_end(text)
+        return self.gazetteer.get(place_id) if place_id is not None else None
+
+    def place_key(self, text: str) -> str:
+        """Canonical place id, or the normalized text for places the gazetteer does not know"""
+        place = self.resolve(text)
+        return place.id if place is not None else normalize_text(text)
+
+    def group_counts(self, counts: Dict[str, int]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Merge {text: days} by place: returns days per place id and per unrecognized name
+
+        Unrecognized names are grouped by their normalized form and reported
+        under their most common spelling.
+        """
+        known: Dict[str, int] = {}
+        unknown: Dict[str, Tuple[int, Dict[str, int]]] = {}
+        for text, count in counts.items():
+            if not text.strip():
+                continue
+            place = self.resolve(text)
+            if place is not None:
+                known[place.id] = known.get(place.id, 0) + count
+                continue
+            key = normalize_text(text)
+            total, spellings = unknown.get(key, (0, {}))
+            spellings[text.strip()] = spellings.get(text.strip(), 0) + count
+            unknown[key] = (total + count, spellings)
+        unrecognized = {max(spellings, key=spellings.get): total for total, spellings in unknown.values()}
+        return known, unrecognized
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._resolved), 'maxsize': self.maxsize}
@@ -0,0 +1,226 @@
+import codecs
+import csv
+import gzip
+import io
+import json
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from itinerary import DAY_DEFAULTS, Itinerary
+from schema import DAY_SCHEMA
+
+# Rows are validated and appended to the store this many at a time, so memory
+# stays bounded by one chunk whatever the file size
+IMPORT_CHUNK_ROWS = 5000
+READ_BLOCK_BYTES = 1 << 16
+MAX_REPORTED_ERRORS = 200
+
+IMPORT_FORMATS = ['csv', 'json']
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_JSON_SEPARATORS = frozenset('[], \t\r\n')
+# A record still undecodable with this much buffered is treated as malformed
+MAX_RECORD_CHARS = 1 << 20
+
+
+class RowError:
+    """One problem found in one imported row"""
+
+    __slots__ = ('row', 'field', 'message')
+
+    def __init__(self, row: int, field: str, message: str):
+        self.row = row
+        self.field = field
+        self.message = message
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'row': self.row, 'field': self.field, 'message': self.message}
+
+    def __repr__(self) -> str:
+        return f"RowError(row={self.row}, field={self.field!r}, message={self.message!r})"
+
+
+class ImportReport:
+    """Outcome of an import: row counts and the first errors found"""
+
+    def __init__(self, max_errors: int = MAX_REPORTED_ERRORS):
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.rows_rejected = 0
+        self.error_count = 0
+        self.errors: List[RowError] = []
+        self.max_errors = max_errors
+        # Set when the file itself could not be read past some point
+        self.fatal: Optional[str] = None
+
+    def add_error(self, error: RowError) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+
+    @property
+    def ok(self) -> bool:
+        return self.fatal is None and not self.error_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rows_read': self.rows_read,
+            'rows_imported': self.rows_imported,
+            'rows_rejected': self.rows_rejected,
+            'error_count': self.error_count,
+            'errors': [error.to_dict() for error in self.errors],
+            'fatal': self.fatal
+        }
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def validate_chunk(records: List[Tuple[int, Dict[str, Any]]],
+                   report: ImportReport) -> Dict[str, List[Any]]:
+    """Check (row number, record) pairs against DAY_SCHEMA; return the valid rows as columns"""
+    rows = []
+    errors: List[RowError] = []
+    columns: Dict[str, List[Any]] = {field: [] for field in DAY_DEFAULTS}
+    for row, record in records:
+        if not isinstance(record, dict):
+            reason = "not an object"
+        elif not record.keys() & DAY_DEFAULTS.keys():
+            reason = "no day fields"
+        else:
+            rows.append(row)
+            for field, values in columns.items():
+                values.append(record.get(field))
+            continue
+        errors.append(RowError(row, '', reason))
+        report.rows_rejected += 1
+
+    # One pass per column; any problem rejects the whole row
+    columns, problems = DAY_SCHEMA.coerce_columns(columns)
+    rejected = set()
+    for position, field, message in problems:
+        errors.append(RowError(rows[position], field, message))
+        rejected.add(position)
+    report.rows_rejected += len(rejected)
+
+    # Shape errors were found first; report in row order so the kept errors are the earliest
+    for error in sorted(errors, key=lambda error: error.row):
+        report.add_error(error)
+    if not rejected:
+        return columns
+    return {field: [value for i, value in enumerate(values) if i not in rejected]
+            for field, values in columns.items()}
+
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def _open_binary(stream: BinaryIO) -> BinaryIO:
+    """Transparently decompress gzip input (e.g. a compressed CSV export)"""
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    if stream.peek(2)[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    return stream
+
+
+def detect_format(stream: BinaryIO) -> str:
+    """'json' if the input starts with '[' or '{', otherwise 'csv'"""
+    head = stream.peek(READ_BLOCK_BYTES)[:READ_BLOCK_BYTES].lstrip(b"\xef\xbb\xbf \t\r\n")
+    return 'json' if head[:1] in (b"[", b"{") else 'csv'
+
+
+def iter_csv_records(stream: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, record) from a CSV with a header row, e.g. an export_csv() file"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    for row, record in enumerate(csv.DictReader(text), start=1):
+        yield row, record
+
+
+def iter_json_records(stream: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row number, record) from a JSON array of day objects or JSON Lines
+
+    Objects are decoded one at a time from a sliding buffer, so the whole
+    document is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    row = 0
+    eof = False
+    while True:
+        # Skip array brackets, separators and whitespace between objects
+        while position < len(buffer) and buffer[position] in _JSON_SEPARATORS:
+            position += 1
+        if position < len(buffer):
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Most likely an object cut at the end of the block: read more
+                if eof or len(buffer) - position > MAX_RECORD_CHARS:
+                    raise ValueError(f"invalid JSON after row {row}: {e.msg}") from None
+            else:
+                row += 1
+                yield row, record
+                continue
+        elif eof:
+            return
+
+        block = stream.read(READ_BLOCK_BYTES)
+        eof = not block
+        buffer = buffer[position:] + reader.decode(block, final=eof)
+        position = 0
+
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def _load_chunk(records: List[Tuple[int, Dict[str, Any]]], target: Itinerary, report: ImportReport) -> None:
+    report.rows_read += len(records)
+    columns = validate_chunk(records, report)
+    rows = len(columns['date'])
+    try:
+        target.extend_columns(columns)
+    except Exception:
+        # Valid rows that could not be stored still count, as rejected
+        report.rows_rejected += rows
+        raise
+    report.rows_imported += rows
+
+
+def import_days(stream: BinaryIO, target: Itinerary, file_format: Optional[str] = None,
+                chunk_rows: int = IMPORT_CHUNK_ROWS, max_errors: int = MAX_REPORTED_ERRORS) -> ImportReport:
+    """Stream days from CSV or JSON (optionally gzipped) into `target`
+
+    Valid rows are appended chunk by chunk; invalid ones are skipped and
+    reported by row number. Rows read before an unreadable part of the file
+    are kept, and the report's `fatal` says where reading stopped.
+    """
+    report = ImportReport(max_errors)
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    try:
+        stream = _open_binary(stream)
+        file_format = file_format or detect_format(stream)
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"unsupported import format: {file_format}")
+        records = iter_csv_records(stream) if file_format == 'csv' else iter_json_records(stream)
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                # Handed over before loading, so a chunk that fails is not loaded again below
+                loading, chunk = chunk, []
+                _load_chunk(loading, target, report)
+        loading, chunk = chunk, []
+        _load_chunk(loading, target, report)
+    except (ValueError, csv.Error, OSError, EOFError) as e:
+        report.fatal = str(e)
+        if chunk:
+            # Reading failed: keep the rows read before the failure
+            try:
+                _load_chunk(chunk, target, report)
+            except (ValueError, OSError) as e:
+                print(f"Error importing rows: {e}")
+    return report
@@ -0,0 +1,858 @@
+import sys
+import threading
+from collections import Counter
+from collections.abc import MutableMapping
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# ============================================================================
+# DAY SCHEMA
+# ============================================================================
+
+# Column order matches the dict built by add_new_day(); 'day' is derived from
+# the row position and never stored.
+DAY_FIELDS = [
+    'day', 'date', 'location', 'transport_type', 'transport_from', 'transport_to',
+    'transport_time', 'transport_cost', 'accommodation_type', 'accommodation_name',
+    'accommodation_cost', 'notes'
+]
+
+COST_FIELDS = ['transport_cost', 'accommodation_cost']
+CATEGORY_FIELDS = ['transport_type', 'accommodation_type']
+TEXT_FIELDS = ['location', 'transport_from', 'transport_to', 'transport_time',
+               'accommodation_name', 'notes']
+
+# Choices offered by the day planner; their order fixes the category codes, so
+# new values go at the end
+TRANSPORT_TYPES = ['Bus', 'Train', 'Plane', 'Ferry', 'Car/Taxi', 'Walking',
+                   'Bus (overnight)', 'Train (overnight)', 'Local Transport', 'Cycling']
+ACCOMMODATION_TYPES = ['Hostel', 'Hotel', 'Guesthouse', 'Camping', 'Airbnb', 'None',
+                       'Bus (sleeping)', 'Train (sleeping)', 'Couchsurfing', "Friend's place",
+                       'None (transit day)']
+
+DAY_DEFAULTS = {
+    'date': '',
+    'location': '',
+    'transport_type': 'Bus',
+    'transport_from': '',
+    'transport_to': '',
+    'transport_time': '',
+    'transport_cost': 0.0,
+    'accommodation_type': 'Hostel',
+    'accommodation_name': '',
+    'accommodation_cost': 0.0,
+    'notes': ''
+}
+
+# Fields scored by calculate_day_completion(): required ones carry 70% of the
+# score, optional ones 30%
+REQUIRED_FIELDS = ['location', 'transport_from', 'transport_to', 'accommodation_type']
+OPTIONAL_FIELDS = ['date', 'transport_time', 'accommodation_name', 'notes']
+PRESENCE_FIELDS = REQUIRED_FIELDS + OPTIONAL_FIELDS
+
+# Score for every (required filled, optional filled) combination
+COMPLETION_SCORES = (
+    np.arange(len(REQUIRED_FIELDS) + 1)[:, None] / len(REQUIRED_FIELDS) * 0.7
+    + np.arange(len(OPTIONAL_FIELDS) + 1)[None, :] / len(OPTIONAL_FIELDS) * 0.3
+)
+
+# Place names repeat a lot across legs, so they are interned to share storage
+_INTERNED_FIELDS = {'location', 'transport_from', 'transport_to'}
+
+# Process-wide so a (revision) value identifies one row state across itineraries
+_revision_lock = threading.Lock()
+_last_revision = 0
+_last_day_id = 0
+
+
+def _next_revisions(count: int = 1) -> int:
+    """Reserve `count` consecutive revision numbers and return the first"""
+    global _last_revision
+    with _revision_lock:
+        first = _last_revision + 1
+        _last_revision += count
+    return first
+
+
+def _next_day_ids(count: int = 1) -> int:
+    """Reserve `count` consecutive day ids and return the first"""
+    global _last_day_id
+    with _revision_lock:
+        first = _last_day_id + 1
+        _last_day_id += count
+    return first
+
+_NAT = np.datetime64('NaT', 'D')
+_INITIAL_CAPACITY = 16
+
+
+def _to_datetime64(value) -> np.datetime64:
+    """Convert a date, ISO string or empty value to datetime64[D]"""
+    if value is None or value == '':
+        return _NAT
+    if isinstance(value, datetime):
+        value = value.date()
+    try:
+        if isinstance(value, date):
+            return np.datetime64(value, 'D')
+        return np.datetime64(str(value)[:10], 'D')
+    except ValueError:
+        return _NAT
+
+
+def _from_datetime64(value: np.datetime64) -> str:
+    """Convert datetime64[D] back to the ISO string used by the UI"""
+    if np.isnat(value):
+        return ''
+    return str(value)
+
+
+class CategoryIndex:
+    """Interned category values mapped to small integer codes"""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        """Return the code for a value, registering it if unseen"""
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(sys.intern(value))
+            self._codes[value] = code
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+# ============================================================================
+# ROW VIEW
+# ============================================================================
+
+class DayView(MutableMapping):
+    """Dict-like view of a single itinerary row"""
+
+    __slots__ = ('_itinerary', '_index')
+
+    def __init__(self, itinerary: 'Itinerary', index: int):
+        self._itinerary = itinerary
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self._itinerary.get_value(self._index, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._itinerary.update_day(self._index, {key: value})
+
+    def __delitem__(self, key: str) -> None:
+        if key not in DAY_DEFAULTS:
+            raise KeyError(key)
+        self._itinerary.update_day(self._index, {key: DAY_DEFAULTS[key]})
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(DAY_FIELDS)
+
+    def __len__(self) -> int:
+        return len(DAY_FIELDS)
+
+    def update(self, other=(), **kwargs) -> None:
+        """Write several fields in one call"""
+        fields = dict(other, **kwargs)
+        self._itinerary.update_day(self._index, fields)
+
+    def copy(self) -> Dict[str, Any]:
+        """Return a detached plain-dict copy of the row"""
+        return self._itinerary.get_day(self._index)
+
+    def __repr__(self) -> str:
+        return f"DayView({self.copy()!r})"
+
+
+# ============================================================================
+# ITINERARY STORE
+# ============================================================================
+
+class Itinerary:
+    """Array-backed list of itinerary days with a dict-like row interface"""
+
+    def __init__(self, days: Optional[Iterable[Dict[str, Any]]] = None):
+        # Bumped on every mutation so derived data (exports, renders) can be reused
+        self.version = 0
+        self._size = 0
+        self._capacity = _INITIAL_CAPACITY
+        self._costs = {field: np.zeros(self._capacity, dtype=np.float64) for field in COST_FIELDS}
+        self._dates = np.full(self._capacity, _NAT, dtype='datetime64[D]')
+        self._categories = {
+            'transport_type': CategoryIndex(TRANSPORT_TYPES),
+            'accommodation_type': CategoryIndex(ACCOMMODATION_TYPES)
+        }
+        self._codes = {field: np.zeros(self._capacity, dtype=np.int16) for field in CATEGORY_FIELDS}
+        self._revisions = np.zeros(self._capacity, dtype=np.int64)
+        # Stable per-row ids: they follow a day through inserts, moves and deletes
+        self._ids = np.zeros(self._capacity, dtype=np.int64)
+        self._text: Dict[str, List[str]] = {field: [] for field in TEXT_FIELDS}
+
+        # Running aggregates, kept in step with every row write
+        self._reset_aggregates()
+        # (version, per-row scores) from the last completion_scores() call
+        self._completion_cache: Optional[Tuple[int, np.ndarray]] = None
+
+        if days:
+            self.extend(days)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'Itinerary':
+        """Build an itinerary from a list of day dicts"""
+        return cls(records)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> 'Itinerary':
+        """Build an itinerary from per-field value lists in one vectorized pass"""
+        itinerary = cls()
+        itinerary.extend_columns(columns)
+        return itinerary
+
+    def extend_columns(self, columns: Dict[str, List[Any]]) -> None:
+        """Append rows given as per-field value lists; missing fields take their defaults"""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("itinerary columns have different lengths")
+        size = lengths.pop() if lengths else 0
+        if not size:
+            return
+
+        start = self._size
+        self.version += 1
+        self._open_rows(start, size)
+        stop = self._size
+        for field in COST_FIELDS:
+            values = columns.get(field)
+            if values is not None:
+                self._costs[field][start:stop] = np.array(
+                    [0.0 if v is None else v for v in values], dtype=np.float64)
+            else:
+                self._costs[field][start:stop] = 0.0
+        if 'date' in columns:
+            self._dates[start:stop] = np.array(
+                [None if v == '' else v for v in columns['date']], dtype='datetime64[D]')
+        else:
+            self._dates[start:stop] = _NAT
+        for field in CATEGORY_FIELDS:
+            categories = self._categories[field]
+            values = columns.get(field, [DAY_DEFAULTS[field]] * size)
+            # Look each distinct value up once, in first-seen order
+            codes = {value: categories.code(self._category(field, value)) for value in dict.fromkeys(values)}
+            self._codes[field][start:stop] = [codes[value] for value in values]
+        for field in TEXT_FIELDS:
+            values = columns.get(field)
+            if values is None:
+                continue
+            if not all(type(value) is str for value in values):
+                values = [self._intern(field, v) for v in values]
+            elif field in _INTERNED_FIELDS:
+                values = list(map(sys.intern, values))
+            self._text[field][start:stop] = values
+        self._account_range(start, stop, 1)
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Per-field value lists (dates as datetime.date or None) for serialization"""
+        columns = {}
+        for field in DAY_DEFAULTS:
+            if field == 'date':
+                columns[field] = self._dates[:self._size].astype(object).tolist()
+            else:
+                columns[field] = list(self._column_values(field, 0, self._size))
+        return columns
+
+    def copy(self) -> 'Itinerary':
+        """Independent copy with the same rows, ids, revisions and aggregates"""
+        duplicate = Itinerary()
+        duplicate._grow(self._size)
+        duplicate._size = self._size
+        for field in COST_FIELDS:
+            duplicate._costs[field][:self._size] = self._costs[field][:self._size]
+        for field in CATEGORY_FIELDS:
+            duplicate._categories[field] = CategoryIndex(self._categories[field].values)
+            duplicate._codes[field][:self._size] = self._codes[field][:self._size]
+        duplicate._dates[:self._size] = self._dates[:self._size]
+        duplicate._revisions[:self._size] = self._revisions[:self._size]
+        duplicate._ids[:self._size] = self._ids[:self._size]
+        duplicate._text = {field: list(values) for field, values in self._text.items()}
+
+        duplicate._totals = dict(self._totals)
+        duplicate._category_counts = {field: counts.copy() for field, counts in self._category_counts.items()}
+        duplicate._missing = dict(self._missing)
+        duplicate._completion_hist = self._completion_hist.copy()
+        return duplicate
+
+    # ------------------------------------------------------------------
+    # Sequence protocol
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[DayView]:
+        for i in range(self._size):
+            yield DayView(self, i)
+
+    def __getitem__(self, index: int) -> DayView:
+        return DayView(self, self._check_index(index))
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("itinerary index out of range")
+        return index
+
+    # ------------------------------------------------------------------
+    # Row access
+    # ------------------------------------------------------------------
+
+    def get_value(self, index: int, field: str) -> Any:
+        """Read one field of one row"""
+        index = self._check_index(index)
+        if field == 'day':
+            return index + 1
+        if field == 'date':
+            return _from_datetime64(self._dates[index])
+        if field in self._costs:
+            return float(self._costs[field][index])
+        if field in self._codes:
+            return self._categories[field].values[self._codes[field][index]]
+        if field in self._text:
+            return self._text[field][index]
+        raise KeyError(field)
+
+    def day_id(self, index: int) -> int:
+        """Stable id of the row at `index`"""
+        return int(self._ids[self._check_index(index)])
+
+    def index_of(self, day_id: int) -> int:
+        """Current position of the row with `day_id`"""
+        matches = np.flatnonzero(self._ids[:self._size] == day_id)
+        if not len(matches):
+            raise KeyError(day_id)
+        return int(matches[0])
+
+    def row_keys(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the row ids and revisions, for restore_row_keys()"""
+        return self._ids[:self._size].copy(), self._revisions[:self._size].copy()
+
+    def restore_row_keys(self, ids: np.ndarray, revisions: np.ndarray) -> None:
+        """Give rows back the ids and revisions row_keys() returned before a save and reload
+
+        Saved trips keep only the day fields, so a reloaded trip has fresh
+        ids; restoring them keeps id references and widget keys valid.
+        """
+        if len(ids) != self._size or len(revisions) != self._size:
+            raise ValueError("row keys do not match the itinerary length")
+        self.version += 1
+        self._ids[:self._size] = ids
+        self._revisions[:self._size] = revisions
+
+    def get_day(self, index: int) -> Dict[str, Any]:
+        """Return a row as a plain dict in add_new_day() field order"""
+        index = self._check_index(index)
+        return {field: self.get_value(index, field) for field in DAY_FIELDS}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a plain dict"""
+        return [self.get_day(i) for i in range(self._size)]
+
+    def update_day(self, index: int, fields: Dict[str, Any]) -> None:
+        """Write a subset of fields into a row"""
+        index = self._check_index(index)
+        self.version += 1
+        self._account(index, -1)
+        try:
+            self._write(index, fields)
+        finally:
+            self._account(index, 1)
+
+    def commit_changes(self, index: int, fields: Dict[str, Any]) -> List[str]:
+        """Write only the fields whose value differs from the row; return their names"""
+        index = self._check_index(index)
+        changed = {field: value for field, value in fields.items()
+                   if field != 'day' and self._normalize(field, value) != self.get_value(index, field)}
+        if changed:
+            self.update_day(index, changed)
+        return list(changed)
+
+    @staticmethod
+    def _normalize(field: str, value: Any) -> Any:
+        """Convert a value to the form get_value() returns for that field"""
+        if field == 'date':
+            return _from_datetime64(_to_datetime64(value))
+        if field in COST_FIELDS:
+            return float(value or 0.0)
+        if field in CATEGORY_FIELDS:
+            return Itinerary._category(field, value)
+        if field in TEXT_FIELDS:
+            return '' if value is None else str(value)
+        raise KeyError(field)
+
+    def _write(self, index: int, fields: Dict[str, Any]) -> None:
+        """Store field values without touching the aggregates"""
+        self._revisions[index] = _next_revisions()
+        for field, value in fields.items():
+            if field == 'day':
+                continue
+            if field == 'date':
+                self._dates[index] = _to_datetime64(value)
+            elif field in self._costs:
+                self._costs[field][index] = float(value or 0.0)
+            elif field in self._codes:
+                self._codes[field][index] = self._categories[field].code(self._category(field, value))
+            elif field in self._text:
+                self._text[field][index] = self._intern(field, value)
+            else:
+                raise KeyError(field)
+
+    def _is_present(self, index: int, field: str) -> bool:
+        if field == 'date':
+            return not np.isnat(self._dates[index])
+        if field in self._codes:
+            return bool(self._categories[field].values[self._codes[field][index]])
+        return bool(self._text[field][index])
+
+    def _presence_mask(self, field: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Boolean array of rows start..stop where a completion field is filled in"""
+        stop = self._size if stop is None else stop
+        if field == 'date':
+            return ~np.isnat(self._dates[start:stop])
+        if field in self._codes:
+            filled = np.array([bool(value) for value in self._categories[field].values], dtype=bool)
+            return filled[self._codes[field][start:stop]]
+        values = self._text[field] if start == 0 and stop == self._size else self._text[field][start:stop]
+        return np.fromiter(map(bool, values), dtype=bool, count=stop - start)
+
+    def _presence_counts(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-row number of required and of optional completion fields filled in"""
+        stop = self._size if stop is None else stop
+        required = np.zeros(stop - start, dtype=np.int64)
+        optional = np.zeros(stop - start, dtype=np.int64)
+        for field in REQUIRED_FIELDS:
+            required += self._presence_mask(field, start, stop)
+        for field in OPTIONAL_FIELDS:
+            optional += self._presence_mask(field, start, stop)
+        return required, optional
+
+    def _reset_aggregates(self) -> None:
+        """Zero every running aggregate"""
+        self._totals = {field: 0.0 for field in COST_FIELDS}
+        self._category_counts = {field: np.zeros(len(self._categories[field]), dtype=np.int64)
+                                 for field in CATEGORY_FIELDS}
+        self._missing = {field: 0 for field in PRESENCE_FIELDS}
+        self._completion_hist = np.zeros(COMPLETION_SCORES.shape, dtype=np.int64)
+
+    def _account_range(self, start: int, stop: int, sign: int) -> None:
+        """Vectorized _account() for rows start..stop"""
+        for field in COST_FIELDS:
+            total = self._totals[field] + sign * float(self._costs[field][start:stop].sum())
+            self._totals[field] = 0.0 if abs(total) < 1e-9 else total
+
+        for field in CATEGORY_FIELDS:
+            size = len(self._categories[field])
+            counts = self._category_counts[field]
+            if len(counts) < size:
+                counts = np.concatenate([counts, np.zeros(size - len(counts), dtype=np.int64)])
+            self._category_counts[field] = counts + sign * np.bincount(self._codes[field][start:stop], minlength=size)
+
+        for field in PRESENCE_FIELDS:
+            self._missing[field] += sign * int(stop - start - self._presence_mask(field, start, stop).sum())
+        required, optional = self._presence_counts(start, stop)
+        columns = COMPLETION_SCORES.shape[1]
+        self._completion_hist += sign * np.bincount(
+            required * columns + optional, minlength=COMPLETION_SCORES.size
+        ).reshape(COMPLETION_SCORES.shape)
+
+    def _account(self, index: int, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a row's contribution to the aggregates"""
+        for field in COST_FIELDS:
+            total = self._totals[field] + sign * float(self._costs[field][index])
+            # Snap float residue from repeated add/subtract back to zero
+            self._totals[field] = 0.0 if abs(total) < 1e-9 else total
+
+        for field in CATEGORY_FIELDS:
+            code = self._codes[field][index]
+            counts = self._category_counts[field]
+            if code >= len(counts):
+                counts = np.resize(counts, len(self._categories[field]))
+                counts[len(self._category_counts[field]):] = 0
+                self._category_counts[field] = counts
+            counts[code] += sign
+
+        required = optional = 0
+        for field in PRESENCE_FIELDS:
+            if self._is_present(index, field):
+                if field in REQUIRED_FIELDS:
+                    required += 1
+                else:
+                    optional += 1
+            else:
+                self._missing[field] += sign
+        self._completion_hist[required, optional] += sign
+
+    def _completion_cell(self, index: int):
+        required = sum(1 for field in REQUIRED_FIELDS if self._is_present(index, field))
+        optional = sum(1 for field in OPTIONAL_FIELDS if self._is_present(index, field))
+        return required, optional
+
+    @staticmethod
+    def _category(field: str, value: Any) -> str:
+        """A category value; None means the field's default, not the text 'None'"""
+        return DAY_DEFAULTS[field] if value is None else str(value)
+
+    @staticmethod
+    def _intern(field: str, value: Any) -> str:
+        value = '' if value is None else str(value)
+        return sys.intern(value) if field in _INTERNED_FIELDS else value
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def _row_arrays(self) -> List[np.ndarray]:
+        """Every fixed-width array that is indexed by row position"""
+        return list(self._costs.values()) + list(self._codes.values()) + [self._dates, self._revisions, self._ids]
+
+    def _grow(self, needed: int) -> None:
+        """Grow the column arrays geometrically to hold `needed` rows"""
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for field, column in self._costs.items():
+            self._costs[field] = np.resize(column, capacity)
+        for field, column in self._codes.items():
+            self._codes[field] = np.resize(column, capacity)
+        self._dates = np.resize(self._dates, capacity)
+        self._revisions = np.resize(self._revisions, capacity)
+        self._ids = np.resize(self._ids, capacity)
+        self._capacity = capacity
+
+    def append(self, day: Optional[Dict[str, Any]] = None) -> None:
+        """Append a day, filling missing fields with defaults"""
+        self.insert(self._size, day)
+
+    def extend(self, days: Iterable[Dict[str, Any]]) -> None:
+        """Append several days"""
+        for day in days:
+            self.append(day)
+
+    def insert(self, index: int, day: Optional[Dict[str, Any]] = None) -> None:
+        """Insert a day before position `index`"""
+        index = max(0, min(index, self._size))
+        self.version += 1
+        self._open_rows(index, 1)
+
+        row = dict(DAY_DEFAULTS)
+        if day:
+            row.update({k: v for k, v in dict(day).items() if k in DAY_DEFAULTS})
+        self._write(index, row)
+        self._account(index, 1)
+
+    def _open_rows(self, index: int, count: int) -> None:
+        """Make room for `count` blank rows before position `index`, with fresh ids"""
+        self._grow(self._size + count)
+        end = self._size
+        if index < end:
+            for column in self._row_arrays():
+                column[index + count:end + count] = column[index:end]
+        for field in TEXT_FIELDS:
+            self._text[field][index:index] = [''] * count
+        self._size += count
+        self._ids[index:index + count] = np.arange(count) + _next_day_ids(count)
+        self._touch(index, index + count)
+
+    def _touch(self, start: int, stop: int) -> None:
+        """Stamp rows start..stop with fresh revisions"""
+        self._revisions[start:stop] = np.arange(stop - start) + _next_revisions(stop - start)
+
+    def _check_range(self, start: int, stop: Optional[int]) -> Tuple[int, int]:
+        stop = self._size if stop is None else max(0, min(stop, self._size))
+        return max(0, min(start, stop)), stop
+
+    def move(self, index: int, before: int) -> int:
+        """Move a day to just before position `before` (len() moves it last); return its new position"""
+        index = self._check_index(index)
+        target = max(0, min(before, self._size))
+        if target > index:
+            target -= 1
+        if target == index:
+            return index
+
+        # Only the rows between the old and new position shift by one; the row
+        # contents are untouched, so aggregates and revisions stay as they are
+        self.version += 1
+        step = 1 if target > index else -1
+        start, stop = min(index, target), max(index, target) + 1
+        for column in self._row_arrays():
+            column[start:stop] = np.roll(column[start:stop], -step)
+        for field in TEXT_FIELDS:
+            values = self._text[field]
+            values.insert(target, values.pop(index))
+        return target
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:
+        """Remove a day and return it as a plain dict"""
+        index = self._check_index(index)
+        removed = self.get_day(index)
+        self.version += 1
+        self._account(index, -1)
+
+        end = self._size
+        for column in self._row_arrays():
+            column[index:end - 1] = column[index + 1:end]
+        for field in TEXT_FIELDS:
+            del self._text[field][index]
+        self._size -= 1
+        return removed
+
+    # ------------------------------------------------------------------
+    # Bulk operations (one vectorized pass per call)
+    # ------------------------------------------------------------------
+
+    def generate_days(self, count: int, template: Optional[Dict[str, Any]] = None,
+                      first_date: Any = None) -> None:
+        """Append `count` copies of a template day; with `first_date` they get consecutive dates"""
+        if count <= 0:
+            return
+        row = dict(DAY_DEFAULTS)
+        if template:
+            row.update({k: v for k, v in dict(template).items() if k in DAY_DEFAULTS})
+        start = self._size
+        self.version += 1
+        self._open_rows(start, count)
+        stop = self._size
+
+        for field in COST_FIELDS:
+            self._costs[field][start:stop] = float(row[field] or 0.0)
+        for field in CATEGORY_FIELDS:
+            self._codes[field][start:stop] = self._categories[field].code(self._category(field, row[field]))
+        if first_date is not None:
+            self._dates[start:stop] = _to_datetime64(first_date) + np.arange(count)
+        else:
+            self._dates[start:stop] = _to_datetime64(row['date'])
+        for field in TEXT_FIELDS:
+            self._text[field][start:stop] = [self._intern(field, row[field])] * count
+        self._account_range(start, stop, 1)
+
+    def duplicate_range(self, start: int, stop: Optional[int] = None, before: Optional[int] = None,
+                        clear_dates: bool = True) -> int:
+        """Insert copies of rows start..stop before `before` (default: right after the block); return where"""
+        start, stop = self._check_range(start, stop)
+        count = stop - start
+        at = stop if before is None else max(0, min(before, self._size))
+        if not count:
+            return at
+
+        # Snapshot first: opening the gap may shift the block itself
+        costs = {field: column[start:stop].copy() for field, column in self._costs.items()}
+        codes = {field: column[start:stop].copy() for field, column in self._codes.items()}
+        dates = self._dates[start:stop].copy()
+        text = {field: values[start:stop] for field, values in self._text.items()}
+
+        self.version += 1
+        self._open_rows(at, count)
+        for field, values in costs.items():
+            self._costs[field][at:at + count] = values
+        for field, values in codes.items():
+            self._codes[field][at:at + count] = values
+        self._dates[at:at + count] = _NAT if clear_dates else dates
+        for field, values in text.items():
+            self._text[field][at:at + count] = values
+        self._account_range(at, at + count, 1)
+        return at
+
+    def shift_dates(self, days: int, start: int = 0, stop: Optional[int] = None) -> None:
+        """Move the dates of rows start..stop by `days`; undated rows stay undated"""
+        start, stop = self._check_range(start, stop)
+        if not days or start == stop:
+            return
+        self.version += 1
+        self._dates[start:stop] += np.timedelta64(int(days), 'D')
+        self._touch(start, stop)
+
+    def adjust_costs(self, fields: Iterable[str], start: int = 0, stop: Optional[int] = None,
+                     amount: float = 0.0, percent: float = 0.0) -> None:
+        """Scale costs of rows start..stop by `percent`, then add `amount`; never below zero"""
+        start, stop = self._check_range(start, stop)
+        if start == stop:
+            return
+        self.version += 1
+        for field in fields:
+            column = self._costs[field]
+            old = float(column[start:stop].sum())
+            column[start:stop] = np.maximum(
+                np.round(column[start:stop] * (1 + percent / 100) + amount, 2), 0.0)
+            total = self._totals[field] + float(column[start:stop].sum()) - old
+            self._totals[field] = 0.0 if abs(total) < 1e-9 else total
+        self._touch(start, stop)
+
+    def truncate(self, length: int) -> None:
+        """Drop every day from position `length` onwards"""
+        length = max(length, 0)
+        if length >= self._size:
+            return
+        self.version += 1
+        # Trailing rows need no shifting: take them out of the aggregates and
+        # shrink the size; the arrays keep their capacity
+        self._account_range(length, self._size, -1)
+        self._size = length
+        for field in TEXT_FIELDS:
+            del self._text[field][length:]
+
+    def clear(self) -> None:
+        """Remove all days"""
+        self.version += 1
+        self._size = 0
+        for field in TEXT_FIELDS:
+            self._text[field].clear()
+        self._reset_aggregates()
+
+    # ------------------------------------------------------------------
+    # Columnar access
+    # ------------------------------------------------------------------
+
+    def column(self, field: str) -> np.ndarray:
+        """Return a read-only array view of a numeric or date column"""
+        if field == 'day':
+            column = np.arange(1, self._size + 1)
+        elif field == 'date':
+            column = self._dates[:self._size]
+        elif field in self._costs:
+            column = self._costs[field][:self._size]
+        elif field in self._codes:
+            column = self._codes[field][:self._size]
+        elif field == 'revision':
+            # Changes whenever the row is written; used to key per-day caches
+            column = self._revisions[:self._size]
+        elif field == 'id':
+            column = self._ids[:self._size]
+        else:
+            raise KeyError(field)
+        column = column.view()
+        column.flags.writeable = False
+        return column
+
+    def daily_costs(self) -> np.ndarray:
+        """Transport plus accommodation cost per day"""
+        return self.column('transport_cost') + self.column('accommodation_cost')
+
+    # ------------------------------------------------------------------
+    # Running aggregates (O(1) reads)
+    # ------------------------------------------------------------------
+
+    def total(self, field: str) -> float:
+        """Sum of a cost column"""
+        return self._totals[field]
+
+    def total_cost(self) -> float:
+        """Sum of transport and accommodation costs"""
+        return sum(self._totals.values())
+
+    def value_counts(self, field: str) -> Dict[str, int]:
+        """Count days per category value, in category order"""
+        values = self._categories[field].values
+        return {values[code]: int(count) for code, count in enumerate(self._category_counts[field]) if count}
+
+    def text_counts(self, field: str) -> Dict[str, int]:
+        """Count days per distinct value of a text field"""
+        return dict(Counter(self._text[field]))
+
+    def count_missing(self, field: str) -> int:
+        """Number of days where a completion field is empty"""
+        return self._missing[field]
+
+    def completion(self, index: int) -> float:
+        """Completion score of one row, as calculate_day_completion() would give"""
+        index = self._check_index(index)
+        return float(COMPLETION_SCORES[self._completion_cell(index)])
+
+    def completion_scores(self) -> np.ndarray:
+        """Read-only array of every row's completion score, cached until the next change"""
+        if self._completion_cache is not None and self._completion_cache[0] == self.version:
+            return self._completion_cache[1]
+        scores = COMPLETION_SCORES[self._presence_counts()]
+        scores.flags.writeable = False
+        self._completion_cache = (self.version, scores)
+        return scores
+
+    def completion_summary(self, threshold: float = 0.8) -> Tuple[np.ndarray, int]:
+        """Per-row completion scores and the number of rows reaching `threshold`"""
+        scores = self.completion_scores()
+        return scores, int(np.count_nonzero(scores >= threshold - 1e-9))
+
+    def completion_histogram(self) -> Dict[float, int]:
+        """Number of days at each completion score"""
+        histogram: Dict[float, int] = {}
+        for (required, optional), count in np.ndenumerate(self._completion_hist):
+            if count:
+                score = round(float(COMPLETION_SCORES[required, optional]), 6)
+                histogram[score] = histogram.get(score, 0) + int(count)
+        return dict(sorted(histogram.items()))
+
+    def completed_days(self, threshold: float = 0.8) -> int:
+        """Number of days whose completion score reaches `threshold`"""
+        return int(self._completion_hist[COMPLETION_SCORES >= threshold - 1e-9].sum())
+
+    def search(self, field: str, text: str) -> List[int]:
+        """Positions of rows whose text field contains `text`, ignoring case"""
+        needle = text.strip().casefold()
+        return [i for i, value in enumerate(self._text[field]) if needle in value.casefold()]
+
+    def iter_rows(self, fields: Iterable[str] = DAY_FIELDS, start: int = 0,
+                  stop: Optional[int] = None) -> Iterator[tuple]:
+        """Yield rows start..stop as tuples of the requested fields"""
+        stop = self._size if stop is None else min(stop, self._size)
+        start = max(0, min(start, stop))
+        return zip(*(self._column_values(field, start, stop) for field in fields))
+
+    def _column_values(self, field: str, start: int, stop: int) -> List[Any]:
+        """Plain Python values of one column slice"""
+        if field == 'day':
+            return list(range(start + 1, stop + 1))
+        if field == 'date':
+            return [_from_datetime64(value) for value in self._dates[start:stop]]
+        if field in self._costs:
+            return self._costs[field][start:stop].tolist()
+        if field in self._codes:
+            values = self._categories[field].values
+            return [values[code] for code in self._codes[field][start:stop]]
+        if field in self._text:
+            return self._text[field][start:stop]
+        raise KeyError(field)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the rows: column buffers plus text values"""
+        size = sum(array.nbytes for array in self._row_arrays())
+        for values in self._text.values():
+            size += sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+        return size
+
+    def to_frame(self):
+        """Build a pandas DataFrame straight from the columns"""
+        import pandas as pd
+
+        data = {field: self._column_values(field, 0, self._size) for field in DAY_FIELDS}
+        return pd.DataFrame(data, columns=DAY_FIELDS)
+
+
+def normalize_day(day: Dict[str, Any]) -> Dict[str, Any]:
+    """A day's stored fields in the form Itinerary rows return them ('day' excluded)"""
+    return {field: Itinerary._normalize(field, day.get(field, default))
+            for field, default in DAY_DEFAULTS.items()}
@@ -0,0 +1,230 @@
+import functools
+import json
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Set to 1 to profile every session; otherwise sessions opt in with ?profile=1
+PROFILE_ENV_VAR = "PLANNER_PROFILE"
+PROFILE_QUERY_PARAM = "profile"
+
+# Buckets (seconds) for the Prometheus section duration histogram
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def profiling_forced() -> bool:
+    """Whether the environment turns profiling on for every session"""
+    return os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+
+class SectionStats:
+    """Running count, total, max and histogram of one section's durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else 0.0,
+            'max_seconds': self.max
+        }
+
+
+class Profiler:
+    """Opt-in section timer shared by every session in the process
+
+    Nothing is timed until some session calls start_run(); until then
+    instrumented code pays one attribute check. After that every timing feeds
+    the process-wide aggregates (including DataManager I/O on the auto-save
+    thread), and timings on a thread with an active run are also attributed
+    to that run.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sections: Dict[str, SectionStats] = {}
+        self._last_run: Dict[str, Any] = {}
+        self.runs = 0
+        # Set once any session profiles; gates all timing
+        self.in_use = False
+
+    @property
+    def active(self) -> bool:
+        return getattr(self._local, 'run', None) is not None
+
+    def start_run(self) -> None:
+        """Begin collecting timings for the script run on this thread"""
+        self.in_use = True
+        self._local.run = {}
+        self._local.started = time.perf_counter()
+
+    def end_run(self, **gauges: Any) -> Dict[str, Any]:
+        """Finish the run on this thread and return its report"""
+        run = getattr(self._local, 'run', None)
+        if run is None:
+            return {}
+        self._local.run = None
+        report = {
+            'total_seconds': time.perf_counter() - self._local.started,
+            'sections': run,
+            'gauges': gauges
+        }
+        with self._lock:
+            self.runs += 1
+            self._last_run = report
+        self.record('run', report['total_seconds'], per_run=False)
+        return report
+
+    def record(self, name: str, seconds: float, per_run: bool = True) -> None:
+        """Add one timing to the current run and the process aggregates"""
+        run = getattr(self._local, 'run', None)
+        if per_run and run is not None:
+            entry = run.setdefault(name, {'count': 0, 'seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += seconds
+        with self._lock:
+            stats = self._sections.get(name)
+            if stats is None:
+                stats = self._sections[name] = SectionStats()
+            stats.add(seconds)
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Time a block once profiling is in use"""
+        if not self.in_use:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator form of section(), named after the function by default"""
+        def decorator(func: Callable) -> Callable:
+            label = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.in_use:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(label, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        """Drop the process-wide aggregates"""
+        with self._lock:
+            self._sections.clear()
+            self._last_run = {}
+            self.runs = 0
+
+    # ------------------------------------------------------------------
+    # Exports
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregates and the most recent run, as plain data"""
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'sections': {name: stats.to_dict() for name, stats in sorted(self._sections.items())},
+                'last_run': self._last_run
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, default=str)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines: List[str] = [
+            "# HELP planner_section_duration_seconds Time spent in instrumented sections",
+            "# TYPE planner_section_duration_seconds histogram"
+        ]
+        with self._lock:
+            sections = sorted(self._sections.items())
+            last_run = dict(self._last_run)
+            runs = self.runs
+
+        for name, stats in sections:
+            label = _label(name)
+            for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                lines.append(f'planner_section_duration_seconds_bucket{{section="{label}",le="{bound}"}} {count}')
+            lines.append(f'planner_section_duration_seconds_bucket{{section="{label}",le="+Inf"}} {stats.count}')
+            lines.append(f'planner_section_duration_seconds_sum{{section="{label}"}} {stats.total}')
+            lines.append(f'planner_section_duration_seconds_count{{section="{label}"}} {stats.count}')
+
+        lines += [
+            "# HELP planner_section_duration_seconds_max Longest single duration per section",
+            "# TYPE planner_section_duration_seconds_max gauge"
+        ]
+        lines += [f'planner_section_duration_seconds_max{{section="{_label(name)}"}} {stats.max}'
+                  for name, stats in sections]
+
+        lines += ["# HELP planner_profiled_runs_total Script runs profiled",
+                  "# TYPE planner_profiled_runs_total counter",
+                  f"planner_profiled_runs_total {runs}"]
+        for gauge, value in sorted(last_run.get('gauges', {}).items()):
+            if isinstance(value, (int, float)):
+                lines += [f"# TYPE planner_last_run_{gauge} gauge", f"planner_last_run_{gauge} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def session_state_size(state: Any) -> Dict[str, int]:
+    """Key count and approximate pickled size of a session state mapping"""
+    size = 0
+    for key in list(state.keys()):
+        try:
+            size += len(pickle.dumps(state[key], protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # Unpicklable values (locks, figures with callbacks) are skipped
+            continue
+    return {'session_state_keys': len(state), 'session_state_bytes': size}
+
+
+def widgets_this_run() -> Optional[int]:
+    """Widgets registered so far in the current Streamlit run, if the runtime exposes it"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    # Moved under ctx.shared in newer Streamlit releases
+    widget_ids = getattr(getattr(ctx, 'shared', ctx), 'widget_ids_this_run', None)
+    if widget_ids is None:
+        return None
+    if hasattr(widget_ids, 'snapshot'):
+        return len(widget_ids.snapshot())
+    return len(widget_ids)
+
+
+# Shared by the app and DataManager
+PROFILER = Profiler()
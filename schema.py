@@ -0,0 +1,280 @@
+import math
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from itinerary import ACCOMMODATION_TYPES, COST_FIELDS, DAY_DEFAULTS, TRANSPORT_TYPES
+
+# Problems found while coercing, as (row or None, field, message)
+Problem = Tuple[Optional[int], str, str]
+
+# How many problems a load prints before summarizing the rest
+MAX_LOGGED_PROBLEMS = 5
+
+
+# ============================================================================
+# FIELD TYPES
+# ============================================================================
+# Each field compiles its checks once; coerce() handles a single value and
+# coerce_column() a whole column, taking a vectorized or per-distinct-value
+# fast path when it can. Invalid values raise ValueError in coerce() and come
+# back as the field default plus an error in coerce_column().
+
+class Field(ABC):
+    """A typed field with a default"""
+
+    def __init__(self, default: Any):
+        self.default = default
+
+    @abstractmethod
+    def coerce(self, value: Any) -> Any:
+        """The value as this field's type; raises TypeError or ValueError if it cannot be"""
+
+    def coerce_column(self, values: List[Any]) -> Tuple[List[Any], Dict[int, str]]:
+        """Coerce every value; returns the values and error messages by position"""
+        coerce = self.coerce
+        result = []
+        errors = {}
+        for i, value in enumerate(values):
+            try:
+                result.append(coerce(value))
+            except (TypeError, ValueError) as e:
+                errors[i] = str(e)
+                result.append(self.default)
+        return result, errors
+
+
+class Number(Field):
+    """Finite number within [minimum, maximum]; empty values take the default"""
+
+    def __init__(self, default: float = 0.0, minimum: Optional[float] = 0.0,
+                 maximum: Optional[float] = None, integer: bool = False):
+        super().__init__(default)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.integer = integer
+
+    def coerce(self, value: Any) -> Any:
+        if value is None or value == '':
+            return self.default
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise TypeError(f"expected a number, got {type(value).__name__}")
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError("must be a finite number")
+        if self.minimum is not None and number < self.minimum:
+            raise ValueError("must not be negative" if self.minimum == 0 else f"must be at least {self.minimum:g}")
+        if self.maximum is not None and number > self.maximum:
+            raise ValueError(f"must be at most {self.maximum:g}")
+        if self.integer:
+            if not number.is_integer():
+                raise ValueError("must be a whole number")
+            return int(number)
+        return number
+
+    def coerce_column(self, values: List[Any]) -> Tuple[List[Any], Dict[int, str]]:
+        # Saved columns are plain floats: check them all at once
+        if not self.integer and all(type(value) is float for value in values):
+            array = np.asarray(values, dtype=np.float64)
+            bad = ~np.isfinite(array)
+            if self.minimum is not None:
+                bad |= array < self.minimum
+            if self.maximum is not None:
+                bad |= array > self.maximum
+            if not bad.any():
+                return list(values), {}
+        return super().coerce_column(values)
+
+
+class Date(Field):
+    """Calendar date, from a date, datetime or ISO string; empty is None"""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def coerce(self, value: Any) -> Optional[date]:
+        if value is None or value == '':
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if not isinstance(value, str):
+            raise TypeError(f"expected a date, got {type(value).__name__}")
+        return date.fromisoformat(value.strip()[:10])
+
+    def coerce_column(self, values: List[Any]) -> Tuple[List[Any], Dict[int, str]]:
+        if all(value is None or type(value) is date for value in values):
+            return list(values), {}
+        return super().coerce_column(values)
+
+
+class Choice(Field):
+    """One of a fixed set of values, matched ignoring case and surrounding spaces"""
+
+    def __init__(self, choices: Iterable[str], default: str):
+        super().__init__(default)
+        self.choices = list(choices)
+        self._lookup = {choice.casefold(): choice for choice in self.choices}
+
+    def coerce(self, value: Any) -> str:
+        if value is None or value == '':
+            return self.default
+        if not isinstance(value, str):
+            raise TypeError(f"expected text, got {type(value).__name__}")
+        choice = self._lookup.get(value.strip().casefold())
+        if choice is None:
+            raise ValueError(f"unknown value {value!r}")
+        return choice
+
+    def coerce_column(self, values: List[Any]) -> Tuple[List[Any], Dict[int, str]]:
+        # Columns hold few distinct values: check each of them once
+        try:
+            distinct = dict.fromkeys(values)
+        except TypeError:
+            return super().coerce_column(values)
+        mapping = {}
+        invalid = {}
+        for value in distinct:
+            try:
+                mapping[value] = self.coerce(value)
+            except (TypeError, ValueError) as e:
+                invalid[value] = str(e)
+        if not invalid:
+            return [mapping[value] for value in values], {}
+        errors = {i: invalid[value] for i, value in enumerate(values) if value in invalid}
+        return [mapping.get(value, self.default) for value in values], errors
+
+
+class Text(Field):
+    """Free text; numbers are accepted and converted, containers are not"""
+
+    def __init__(self, default: str = ''):
+        super().__init__(default)
+
+    def coerce(self, value: Any) -> str:
+        if value is None:
+            return self.default
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        raise TypeError(f"expected text, got {type(value).__name__}")
+
+    def coerce_column(self, values: List[Any]) -> Tuple[List[Any], Dict[int, str]]:
+        if all(type(value) is str for value in values):
+            return list(values), {}
+        return super().coerce_column(values)
+
+
+# ============================================================================
+# RECORD SCHEMAS
+# ============================================================================
+
+class RecordSchema:
+    """Named fields of a record; keys outside the schema are kept as they are"""
+
+    def __init__(self, name: str, fields: Dict[str, Field]):
+        self.name = name
+        self.fields = fields
+
+    def defaults(self) -> Dict[str, Any]:
+        """A fresh record holding every field's default"""
+        return {name: field.default for name, field in self.fields.items()}
+
+    def coerce(self, record: Any) -> Tuple[Dict[str, Any], List[Problem]]:
+        """Coerce one record; missing or invalid fields take their defaults"""
+        if not isinstance(record, dict):
+            return self.defaults(), [(None, '', f"{self.name} is not an object")]
+        result = dict(record)
+        problems = []
+        for name, field in self.fields.items():
+            try:
+                result[name] = field.coerce(record.get(name, field.default))
+            except (TypeError, ValueError) as e:
+                result[name] = field.default
+                problems.append((None, name, str(e)))
+        return result, problems
+
+    def coerce_columns(self, columns: Dict[str, List[Any]]) -> Tuple[Dict[str, List[Any]], List[Problem]]:
+        """Coerce per-field value lists, one pass per column; missing columns are filled with defaults"""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"{self.name} columns have different lengths")
+        size = lengths.pop() if lengths else 0
+
+        result = {}
+        problems = []
+        for name, field in self.fields.items():
+            values = columns.get(name)
+            if values is None:
+                result[name] = [field.default] * size
+                continue
+            result[name], errors = field.coerce_column(values)
+            problems.extend((row, name, message) for row, message in errors.items())
+        problems.sort(key=lambda problem: problem[0])
+        return result, problems
+
+
+DAY_FIELD_TYPES = {
+    'date': Date(),
+    'transport_type': Choice(TRANSPORT_TYPES, DAY_DEFAULTS['transport_type']),
+    'accommodation_type': Choice(ACCOMMODATION_TYPES, DAY_DEFAULTS['accommodation_type'])
+}
+DAY_FIELD_TYPES.update({field: Number() for field in COST_FIELDS})
+
+DAY_SCHEMA = RecordSchema('day', {
+    field: DAY_FIELD_TYPES.get(field) or Text(default) for field, default in DAY_DEFAULTS.items()
+})
+
+BUDGET_SCHEMA = RecordSchema('budget_data', {
+    'total_budget': Number(1000.0),
+    'food_budget': Number(),
+    'activities_budget': Number(),
+    'shopping_budget': Number(),
+    'misc_costs': Number(),
+    'emergency_budget': Number(),
+    'insurance_cost': Number(),
+    'currency': Text('GBP')
+})
+
+# Bounds match the trip overview inputs, which reject out-of-range values
+TRIP_INFO_SCHEMA = RecordSchema('trip_info', {
+    'name': Text(),
+    'start_date': Date(),
+    'end_date': Date(),
+    'destinations': Text(),
+    'travel_style': Text('🎒 Budget Backpacker (£25-40/day)'),
+    'group_size': Number(1, minimum=1, maximum=20, integer=True),
+    'transport_preference': Text('🚌 Bus'),
+    'accommodation_preference': Text('🏠 Hostels')
+})
+
+
+# ============================================================================
+# WHOLE TRIPS
+# ============================================================================
+
+def coerce_trip(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Coerce a migrated trip (trip_columns, budget_data, trip_info) in place; return what was fixed"""
+    messages = []
+    if "trip_columns" in data:
+        data["trip_columns"], problems = DAY_SCHEMA.coerce_columns(data["trip_columns"])
+        messages.extend(f"day {row + 1} {field}: {message}" for row, field, message in problems)
+    for key, schema in (("budget_data", BUDGET_SCHEMA), ("trip_info", TRIP_INFO_SCHEMA)):
+        if key in data:
+            data[key], problems = schema.coerce(data[key])
+            messages.extend(f"{key}.{field}: {message}" if field else message for _, field, message in problems)
+    return data, messages
+
+
+def coerce_loaded_trip(data: Dict[str, Any]) -> Dict[str, Any]:
+    """coerce_trip() for data read from storage: invalid values are replaced and logged"""
+    data, messages = coerce_trip(data)
+    if messages:
+        shown = "; ".join(messages[:MAX_LOGGED_PROBLEMS])
+        more = f" (and {len(messages) - MAX_LOGGED_PROBLEMS} more)" if len(messages) > MAX_LOGGED_PROBLEMS else ""
+        print(f"Warning: replaced {len(messages)} invalid values in saved trip with defaults: {shown}{more}")
+    return data
@@ -0,0 +1,214 @@
+import json
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+from itinerary import DAY_DEFAULTS
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: compact binary snapshots
+    msgpack = None
+
+# ============================================================================
+# SAVED DATA FORMAT
+# ============================================================================
+
+# 1.0: 'trip_data' is a list of day dicts, dates are ISO strings ('' if unset)
+# 2.0: 'trip_columns' holds one value list per day field; dates (per day and
+#      trip_info start/end) are date objects or None, stored natively by the codec
+FORMAT_VERSION = "2.0"
+
+TRIP_INFO_DATE_FIELDS = ('start_date', 'end_date')
+
+
+def to_date(value: Any) -> Optional[date]:
+    """Coerce a date, datetime, ISO string or empty value to a date or None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date()
+    except ValueError:
+        return None
+
+
+def encode_trip_info(trip_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy trip info into its stored form, with native dates"""
+    if not trip_info:
+        return {}
+    encoded = dict(trip_info)
+    for field in TRIP_INFO_DATE_FIELDS:
+        if field in encoded:
+            encoded[field] = to_date(encoded[field])
+    return encoded
+
+
+def revive(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn ISO date strings from text codecs back into dates (idempotent)
+
+    The per-day date column needs no reviving: the day schema coerces ISO
+    strings and dates alike when the trip is loaded.
+    """
+    if "trip_info" in data:
+        data["trip_info"] = encode_trip_info(data["trip_info"])
+    return data
+
+
+# ============================================================================
+# MIGRATIONS
+# ============================================================================
+
+def _migrate_1_0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """1.0 -> 2.0: day dicts become columns, date strings become dates"""
+    if "trip_data" in data:
+        days = data.pop("trip_data")
+        if not isinstance(days, list):
+            raise ValueError("1.0 trip_data is not a list of days")
+        blank = sum(not isinstance(day, dict) for day in days)
+        if blank:
+            print(f"Warning: replaced {blank} days that were not objects in 1.0 trip with blank days")
+        # Raw values only: the day schema checks them on load, as for 2.0 files
+        data["trip_columns"] = {
+            field: [day.get(field) if isinstance(day, dict) else None for day in days] for field in DAY_DEFAULTS
+        }
+    revive(data)
+    data["version"] = "2.0"
+    return data
+
+
+# Keyed by the version a migration upgrades from
+MIGRATIONS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "1.0": _migrate_1_0,
+}
+
+
+def migrate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Upgrade loaded data to FORMAT_VERSION, one version step at a time"""
+    version = data.get("version", "1.0")
+    while version != FORMAT_VERSION:
+        if version not in MIGRATIONS:
+            raise ValueError(f"Unsupported trip data version: {version}")
+        data = MIGRATIONS[version](data)
+        version = data["version"]
+    return revive(data)
+
+
+# ============================================================================
+# CODECS
+# ============================================================================
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class Codec(ABC):
+    """Encodes whole documents to bytes and back"""
+
+    name = ""
+    binary = False
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Encode one document"""
+
+    @abstractmethod
+    def loads(self, raw: bytes) -> Any:
+        """Decode one document"""
+
+
+class JSONCodec(Codec):
+    """Standard library JSON; readable, and the slowest"""
+
+    name = "json"
+
+    def __init__(self, indent: Optional[int] = None):
+        self.indent = indent
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, indent=self.indent, ensure_ascii=False, default=_json_default).encode('utf-8')
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class OrjsonCodec(Codec):
+    """orjson: compact JSON with native date support"""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_json_default)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+
+_MSGPACK_DATE = 1
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return msgpack.ExtType(_MSGPACK_DATE, value.toordinal().to_bytes(4, 'big'))
+    return str(value)
+
+
+def _msgpack_ext_hook(code: int, payload: bytes) -> Any:
+    if code == _MSGPACK_DATE:
+        return date.fromordinal(int.from_bytes(payload, 'big'))
+    return msgpack.ExtType(code, payload)
+
+
+class MsgpackCodec(Codec):
+    """msgpack: binary, dates stored as a 4-byte ordinal extension type"""
+
+    name = "msgpack"
+    binary = True
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+    def loads(self, raw: bytes) -> Any:
+        return msgpack.unpackb(raw, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+def available_formats() -> Dict[str, bool]:
+    """Which formats can be used in this environment"""
+    return {"json": True, "orjson": orjson is not None, "msgpack": msgpack is not None}
+
+
+def get_codec(name: str = "json", indent: Optional[int] = None) -> Codec:
+    """Codec for a format name, falling back to stdlib JSON if its library is missing"""
+    if name == "msgpack" and msgpack is not None:
+        return MsgpackCodec()
+    if name == "orjson" and orjson is not None:
+        return OrjsonCodec()
+    if name not in available_formats():
+        raise ValueError(f"Unknown format: {name}")
+    return JSONCodec(indent=indent)
+
+
+def fast_json_codec() -> Codec:
+    """The quickest available JSON codec, used for journal lines"""
+    return OrjsonCodec() if orjson is not None else JSONCodec()
+
+
+def sniff_codec(raw: bytes) -> Codec:
+    """Pick a decoder from a file's first byte, whatever format wrote it"""
+    if raw.lstrip()[:1] in (b'{', b'['):
+        return fast_json_codec()
+    if msgpack is None:
+        raise ValueError("Trip file is in msgpack format but msgpack is not installed")
+    return MsgpackCodec()
@@ -0,0 +1,370 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from data_manager import AUTO_SAVE_EXIT_TIMEOUT_SECONDS, DataManager, flush_auto_save
+from itinerary import Itinerary
+from storage_backends import JsonFileBackend
+
+# Environment overrides for the process-wide store
+IDLE_TIMEOUT_ENV_VAR = "PLANNER_SESSION_IDLE_SECONDS"
+MEMORY_BUDGET_ENV_VAR = "PLANNER_SESSION_MEMORY_MB"
+SPILL_DIR_ENV_VAR = "PLANNER_SESSION_SPILL_DIR"
+
+SESSION_IDLE_TIMEOUT_SECONDS = 15 * 60
+SESSION_MEMORY_BUDGET_BYTES = 512 * 1024 * 1024
+SESSION_SWEEP_INTERVAL_SECONDS = 30.0
+# Streamlit keeps a disconnected session for a couple of minutes so the browser
+# can reconnect; one not seen for this long after leaving the runtime is gone
+SESSION_CLOSED_GRACE_SECONDS = 10 * 60
+
+# Written to disk on spill and restored on the next run
+SPILLED_KEYS = ('trip_data', 'budget_data', 'trip_info')
+# Caches and per-run outputs dropped on spill; they are rebuilt on demand
+DROPPED_KEYS = ('figure_cache', 'text_renderer', 'place_normalizer', 'csv_export', 'text_export',
+                'import_report', 'profile_report')
+# Left in a spilled session's state in place of its trip
+SPILL_MARKER = 'spilled_trip'
+
+
+class SessionRecord:
+    """What the store knows about one Streamlit session"""
+
+    def __init__(self, session_id: str, state: Any):
+        self.session_id = session_id
+        # Strong: Streamlit hands each run a fresh wrapper around the same
+        # session state, so a weak reference would die with the run. The
+        # record is dropped once the session is closed (see sweep()).
+        self.state = state
+        self.lock = threading.Lock()
+        self.running = False
+        self.spilled = False
+        self.last_active = time.monotonic()
+        self.nbytes = 0
+        self.measured: Optional[Tuple[int, int]] = None
+        # Row ids and revisions of the spilled trip (16 bytes a day), restored
+        # on rehydrate so day ids held by widgets and callbacks stay valid
+        self.row_keys: Optional[Tuple[Any, Any]] = None
+
+
+class SessionStore:
+    """Spills idle sessions' trips to disk and brings them back on demand
+
+    Each run is bracketed by checkin() and checkout(). A session whose last
+    run ended more than ``idle_timeout`` seconds ago has its ``trip_data``,
+    ``budget_data`` and ``trip_info`` saved through a DataManager under
+    ``spill_dir`` and removed from its session state; when resident trips
+    exceed ``memory_budget`` bytes the least recently active sessions are
+    spilled first. checkin() restores a spilled trip before the script uses
+    it. Idle sessions are swept by a background thread every
+    ``sweep_interval`` seconds.
+
+    ``session_exists(session_id)`` tells whether the app still has a session;
+    records of sessions that no longer exist are forgotten along with their
+    spilled trips. Without it every session is assumed to stay open.
+    """
+
+    def __init__(self, spill_dir: str, idle_timeout: float = SESSION_IDLE_TIMEOUT_SECONDS,
+                 memory_budget: int = SESSION_MEMORY_BUDGET_BYTES,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL_SECONDS, file_format: str = "json",
+                 session_exists: Optional[Callable[[str], bool]] = None):
+        self.spill_dir = spill_dir
+        self.idle_timeout = idle_timeout
+        self.memory_budget = memory_budget
+        self.sweep_interval = sweep_interval
+        self.session_exists = session_exists
+        self.backend = JsonFileBackend(os.path.join(spill_dir, "sessions.json"), file_format=file_format)
+        self._records: Dict[str, SessionRecord] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._spills = 0
+        self._rehydrations = 0
+        self._last_error: Optional[str] = None
+
+    def manager_for(self, session_id: str) -> DataManager:
+        """DataManager holding a session's spilled trip"""
+        # Session ids are not guaranteed to be valid file names
+        digest = hashlib.blake2b(session_id.encode('utf-8'), digest_size=16).hexdigest()
+        return DataManager(backend=self.backend, trip_id=f"session-{digest}",
+                           backup_dir=os.path.join(self.spill_dir, "backups"))
+
+    # ------------------------------------------------------------------
+    # Run bracketing
+    # ------------------------------------------------------------------
+
+    def checkin(self, session_id: str, state: Any) -> bool:
+        """Mark a session as running, restoring its trip if it was spilled; True if restored"""
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None:
+                record = self._records[session_id] = SessionRecord(session_id, state)
+            self._ensure_thread()
+
+        with record.lock:
+            # Same session state, seen through this run's wrapper
+            record.state = state
+            record.running = True
+            record.last_active = time.monotonic()
+            if not record.spilled and SPILL_MARKER not in state:
+                return False
+            return self._rehydrate(record, state)
+
+    def checkout(self, session_id: str, state: Any) -> None:
+        """Mark a session idle after a run and measure its trip"""
+        with self._lock:
+            record = self._records.get(session_id)
+        if record is None:
+            return
+
+        with record.lock:
+            record.running = False
+            record.last_active = time.monotonic()
+            trip_data = state['trip_data'] if 'trip_data' in state else None
+            if isinstance(trip_data, Itinerary):
+                # Measuring walks the text columns, so only after the trip changed
+                measured = (id(trip_data), trip_data.version)
+                if measured != record.measured:
+                    record.nbytes = trip_data.nbytes()
+                    record.measured = measured
+            else:
+                record.nbytes = 0
+                record.measured = None
+
+        if self.resident_bytes() > self.memory_budget:
+            self.sweep()
+
+    # ------------------------------------------------------------------
+    # Spilling
+    # ------------------------------------------------------------------
+
+    def sweep(self) -> int:
+        """Spill sessions idle past the timeout, then the oldest while over budget; returns spills"""
+        now = time.monotonic()
+        with self._lock:
+            # Forget sessions Streamlit has closed, with whatever they left on disk
+            closed = [record for record in self._records.values() if self._is_closed(record)]
+            for record in closed:
+                del self._records[record.session_id]
+            resident = [record for record in self._records.values() if not record.spilled]
+        for record in closed:
+            if record.spilled:
+                self.manager_for(record.session_id).delete_data()
+        if closed:
+            # A closed session's last edits may still be queued for auto-save
+            flush_auto_save(AUTO_SAVE_EXIT_TIMEOUT_SECONDS)
+
+        resident = [record for record in resident if record not in closed]
+        resident.sort(key=lambda record: record.last_active)
+        resident_bytes = sum(record.nbytes for record in resident)
+        spilled = 0
+        for record in resident:
+            idle = now - record.last_active >= self.idle_timeout
+            if not idle and resident_bytes <= self.memory_budget:
+                # Sorted oldest first, so every later session is more recent still
+                break
+            size = record.nbytes
+            if self.spill(record):
+                resident_bytes -= size
+                spilled += 1
+        return spilled
+
+    def _is_closed(self, record: SessionRecord) -> bool:
+        """True once the app no longer has the session (store lock held)"""
+        if record.running or self.session_exists is None:
+            return False
+        return not self.session_exists(record.session_id)
+
+    def spill(self, record: SessionRecord) -> bool:
+        """Write one idle session's trip to disk and drop it from the session state"""
+        with record.lock:
+            state = record.state
+            if record.running or record.spilled:
+                return False
+            try:
+                values = {key: state[key] for key in SPILLED_KEYS}
+            except KeyError:
+                # Never ran far enough to initialize its trip
+                return False
+
+            manager = self.manager_for(record.session_id)
+            if not manager.save_data(values['trip_data'], values['budget_data'], values['trip_info']):
+                self._last_error = f"spill failed for session {record.session_id}"
+                return False
+            manager.release()
+
+            trip_data = values['trip_data']
+            record.row_keys = trip_data.row_keys() if isinstance(trip_data, Itinerary) else None
+            for key in SPILLED_KEYS + DROPPED_KEYS:
+                if key in state:
+                    del state[key]
+            state[SPILL_MARKER] = manager.trip_id
+            record.spilled = True
+            record.nbytes = 0
+            record.measured = None
+            self._spills += 1
+            return True
+
+    def _rehydrate(self, record: SessionRecord, state: Any) -> bool:
+        """Load a spilled trip back into the session state (record lock held)"""
+        manager = self.manager_for(record.session_id)
+        data = manager.load_data()
+        if data is None:
+            # Leave the keys missing so init_session_state() starts an empty trip
+            self._last_error = f"spilled trip missing for session {record.session_id}"
+        else:
+            if record.row_keys is not None and isinstance(data['trip_data'], Itinerary):
+                try:
+                    data['trip_data'].restore_row_keys(*record.row_keys)
+                except ValueError:
+                    # The spill file no longer matches; fresh ids are all we can offer
+                    pass
+            for key in SPILLED_KEYS:
+                state[key] = data[key]
+        record.row_keys = None
+        manager.delete_data()
+        manager.release()
+
+        if SPILL_MARKER in state:
+            del state[SPILL_MARKER]
+        record.spilled = False
+        self._rehydrations += 1
+        return data is not None
+
+    # ------------------------------------------------------------------
+    # Background sweeping
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                self._last_error = str(e)
+                print(f"Error sweeping sessions: {e}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """End the background sweeper"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def resident_bytes(self) -> int:
+        """Approximate memory held by resident sessions' trips"""
+        with self._lock:
+            return sum(record.nbytes for record in self._records.values() if not record.spilled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Resident and spilled session counts, resident trip bytes and spill counters"""
+        with self._lock:
+            records = list(self._records.values())
+            return {
+                'resident_sessions': sum(not record.spilled for record in records),
+                'spilled_sessions': sum(record.spilled for record in records),
+                'resident_bytes': sum(record.nbytes for record in records if not record.spilled),
+                'memory_budget_bytes': self.memory_budget,
+                'idle_timeout_seconds': self.idle_timeout,
+                'spills': self._spills,
+                'rehydrations': self._rehydrations,
+                'last_error': self._last_error
+            }
+
+
+# ============================================================================
+# STREAMLIT INTEGRATION
+# ============================================================================
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store, configured from the environment"""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            spill_dir = os.environ.get(SPILL_DIR_ENV_VAR)
+            if spill_dir:
+                os.makedirs(spill_dir, exist_ok=True)
+            else:
+                # Spilled trips die with the process, like the sessions they belong to
+                spill_dir = tempfile.mkdtemp(prefix="planner_sessions_")
+                atexit.register(shutil.rmtree, spill_dir, True)
+            _session_store = SessionStore(
+                spill_dir,
+                session_exists=_session_exists,
+                idle_timeout=float(os.environ.get(IDLE_TIMEOUT_ENV_VAR, SESSION_IDLE_TIMEOUT_SECONDS)),
+                memory_budget=int(float(os.environ.get(MEMORY_BUDGET_ENV_VAR, 0)) * 1024 * 1024)
+                              or SESSION_MEMORY_BUDGET_BYTES
+            )
+            atexit.register(_session_store.stop, 1.0)
+        return _session_store
+
+# Monotonic time each session was last seen connected, for _session_exists()
+_sessions_last_seen: Dict[str, float] = {}
+
+def _session_exists(session_id: str) -> bool:
+    """False once the Streamlit runtime has dropped the session (and its reconnect window passed)"""
+    try:
+        from streamlit.runtime import Runtime
+    except ImportError:
+        return True
+    if not Runtime.exists():
+        # Bare mode or AppTest: no runtime tracks sessions, keep them all
+        return True
+    now = time.monotonic()
+    if Runtime.instance().is_active_session(session_id):
+        _sessions_last_seen[session_id] = now
+        return True
+    last_seen = _sessions_last_seen.setdefault(session_id, now)
+    if now - last_seen < SESSION_CLOSED_GRACE_SECONDS:
+        return True
+    del _sessions_last_seen[session_id]
+    return False
+
+def _current_session() -> Optional[Tuple[str, Any]]:
+    """The running script's session id and session state, if inside Streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return ctx.session_id, ctx.session_state
+
+def checkin_current_session() -> bool:
+    """Start-of-run hook: restore this session's trip if it was spilled"""
+    session = _current_session()
+    if session is None:
+        return False
+    try:
+        return get_session_store().checkin(*session)
+    except Exception as e:
+        print(f"Error restoring session: {e}")
+        return False
+
+def checkout_current_session() -> None:
+    """End-of-run hook: mark this session idle"""
+    session = _current_session()
+    if session is None:
+        return
+    try:
+        get_session_store().checkout(*session)
+    except Exception as e:
+        print(f"Error releasing session: {e}")
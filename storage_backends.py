@@ -0,0 +1,653 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from itinerary import DAY_DEFAULTS, Itinerary, normalize_day
+from schema import BUDGET_SCHEMA, DAY_SCHEMA, TRIP_INFO_SCHEMA, coerce_loaded_trip
+from serialization import (FORMAT_VERSION, Codec, encode_trip_info, fast_json_codec,
+                           get_codec, migrate, sniff_codec)
+
+DEFAULT_TRIP_ID = "default"
+_TRIP_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}")
+
+# Trips whose last saved state is kept in memory per backend; older ones are
+# dropped least recently used first and re-read on demand
+MAX_CACHED_TRIPS = 64
+
+
+class StorageBackend(ABC):
+    """Interface for persisting trips
+
+    Backends receive an Itinerary (or a list of day dicts), the budget dict
+    and trip info as produced by serialization.encode_trip_info() (dates as
+    date objects). ``load`` returns a dict with ``trip_data`` (an
+    Itinerary), ``budget_data``, ``trip_info``, ``last_saved`` and
+    ``version`` keys, migrated to the current format version, or None when
+    the trip does not exist.
+    """
+
+    @abstractmethod
+    def load(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        """Load one trip"""
+
+    @abstractmethod
+    def save(self, trip_id: str, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        """Persist one trip, writing only what changed where the backend can"""
+
+    @abstractmethod
+    def delete(self, trip_id: str) -> bool:
+        """Remove one trip; returns False if it did not exist"""
+
+    @abstractmethod
+    def list_trips(self) -> List[Dict[str, Any]]:
+        """Summaries (trip_id, last_saved, day_count) of every stored trip"""
+
+    def exists(self, trip_id: str) -> bool:
+        """Check whether a trip has been saved"""
+        return self.load(trip_id) is not None
+
+    def read_header(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        """A trip's ``last_saved``, ``version`` and ``day_count`` without its days
+
+        Backends override this to avoid loading the trip.
+        """
+        data = self.load(trip_id)
+        if data is None:
+            return None
+        return {'last_saved': data.get('last_saved'), 'version': data.get('version'),
+                'day_count': len(data['trip_data'])}
+
+    def compact(self, trip_id: str) -> bool:
+        """Fold any incremental log into the main record"""
+        return True
+
+    def release(self, trip_id: str) -> None:
+        """Drop any in-memory copy of a trip; the stored trip is untouched"""
+
+
+# ============================================================================
+# CHANGE TRACKING
+# ============================================================================
+
+def as_itinerary(trip_data: List[Dict]) -> Itinerary:
+    """The given days as an Itinerary, converting a plain list of dicts"""
+    return trip_data if isinstance(trip_data, Itinerary) else Itinerary(trip_data)
+
+
+class SavedState:
+    """Last persisted copy of a trip, used to work out what a save has to write
+
+    Days are held as an Itinerary; changed days are exchanged as
+    normalize_day() dicts (ISO date strings) so journal lines stay plain JSON.
+    """
+
+    def __init__(self, days: Itinerary, budget_data: Dict, trip_info: Dict):
+        self.days = days
+        self.budget_data = budget_data
+        self.trip_info = trip_info
+        self.revisions = None
+
+    def changed_days(self, trip_data: List[Dict]) -> Dict[int, Dict]:
+        """Days that differ from the saved copy, keyed by index"""
+        # An Itinerary stamps each row write with a revision, so only rows whose
+        # revision moved need to be materialized and compared
+        if self.revisions is not None and hasattr(trip_data, 'column'):
+            revisions = trip_data.column('revision')
+            common = min(len(revisions), len(self.revisions))
+            candidates = [int(i) for i in (revisions[:common] != self.revisions[:common]).nonzero()[0]]
+            candidates.extend(range(common, len(revisions)))
+        else:
+            candidates = range(len(trip_data))
+
+        changed = {}
+        for i in candidates:
+            day = normalize_day(trip_data[i])
+            if i >= len(self.days) or day != normalize_day(self.days.get_day(i)):
+                changed[i] = day
+        return changed
+
+    def apply(self, length: int, days: Dict[int, Dict]) -> None:
+        """Resize to `length` days and overwrite the changed ones"""
+        self.days.truncate(length)
+        while len(self.days) < length:
+            self.days.append()
+        for index, day in days.items():
+            self.days.update_day(int(index), day)
+
+    def remember_revisions(self, trip_data: List[Dict]) -> None:
+        self.revisions = trip_data.column('revision').copy() if hasattr(trip_data, 'column') else None
+
+
+def _coerce_entry(entry: Dict) -> Dict:
+    """A journal entry read back from disk, checked against the same schemas as snapshots"""
+    entry = dict(entry)
+    entry["days"] = {index: DAY_SCHEMA.coerce(day)[0] for index, day in entry["days"].items()}
+    for key, schema in (("budget_data", BUDGET_SCHEMA), ("trip_info", TRIP_INFO_SCHEMA)):
+        if key in entry:
+            entry[key] = schema.coerce(entry[key])[0]
+    return entry
+
+
+def atomic_write_bytes(path: str, payload: bytes) -> None:
+    """Write `payload` to `path` via a fsynced temp file and an atomic rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Persist the rename itself; directories can't be opened on Windows
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+# ============================================================================
+# JSON FILES
+# ============================================================================
+
+class JournaledJsonFile:
+    """One trip stored as a JSON snapshot plus an append-only journal
+
+    The first save writes a full snapshot and later saves append only the
+    changed days (plus budget and trip info when they differ) to
+    ``<path>.journal``. Every write is fsynced, snapshots are replaced
+    atomically, and the journal is compacted back into a fresh snapshot every
+    ``compact_every`` entries. Snapshots use the given codec; journal lines
+    are always JSON. Loading detects the snapshot format from its content.
+
+    A small JSON header beside the snapshot (``<path>.meta``) records
+    last_saved, version and day count together with the size and mtime of
+    the files it describes, so status checks never parse the payload. The
+    parsed state is kept in memory and handed out again (as copies) while
+    the files on disk are unchanged.
+    """
+
+    def __init__(self, path: str, compact_every: int = 50, codec: Optional[Codec] = None):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.meta_path = f"{path}.meta"
+        self.compact_every = compact_every
+        self.codec = codec or get_codec("json")
+        self._journal_codec = fast_json_codec()
+        self.saved: Optional[SavedState] = None
+        self._journal_seq = 0
+        self._snapshot_seq = 0
+        self._header: Optional[Dict[str, Any]] = None
+        # (mtime_ns, size) of the snapshot and journal when self.saved last matched them
+        self._stamp: Optional[List] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def save(self, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        """Append a journal delta, or write a snapshot if there is none yet"""
+        if self.saved is None or not os.path.exists(self.path):
+            self.write_snapshot(trip_data, budget_data, trip_info)
+            return
+        # Another writer changed the files: diff against what is on disk now
+        if self._file_stamp() != self._stamp:
+            self.load()
+
+        changed_days = self.saved.changed_days(trip_data)
+        entry = {
+            "seq": self._journal_seq + 1,
+            "length": len(trip_data),
+            "days": {str(i): day for i, day in changed_days.items()},
+            "last_saved": datetime.now().isoformat()
+        }
+        if budget_data != self.saved.budget_data:
+            entry["budget_data"] = dict(budget_data)
+        if trip_info != self.saved.trip_info:
+            entry["trip_info"] = trip_info
+
+        # Nothing changed since the last save
+        if (not changed_days and len(trip_data) == len(self.saved.days)
+                and "budget_data" not in entry and "trip_info" not in entry):
+            return
+
+        self._append_journal(entry)
+        self._apply_entry(entry)
+        self.saved.remember_revisions(trip_data)
+        self._write_header(entry["last_saved"])
+
+        if self._journal_seq - self._snapshot_seq >= self.compact_every:
+            self.compact()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the snapshot and replay any journal entries written after it"""
+        if not os.path.exists(self.path):
+            return None
+
+        # Served from memory unless another writer touched the files
+        if self.saved is not None and self._file_stamp() == self._stamp:
+            return self._current_data()
+
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = coerce_loaded_trip(migrate(sniff_codec(raw).loads(raw)))
+
+        self._snapshot_seq = data.get("journal_seq", 0)
+        self._journal_seq = self._snapshot_seq
+        self.saved = SavedState(Itinerary.from_columns(data.pop("trip_columns", {})),
+                                data.get("budget_data", {}), data.get("trip_info", {}))
+
+        last_saved = data.get("last_saved")
+        for entry in self._read_journal():
+            if entry["seq"] > self._journal_seq:
+                self._apply_entry(_coerce_entry(entry))
+                last_saved = entry.get("last_saved", last_saved)
+
+        self._write_header(last_saved)
+        return self._current_data()
+
+    def read_header(self) -> Optional[Dict[str, Any]]:
+        """last_saved, version and day_count, from the sidecar header if it is current"""
+        stamp = self._file_stamp()
+        if stamp[0] is None:
+            return None
+        if self._header is not None and stamp == self._stamp:
+            return dict(self._header)
+
+        try:
+            with open(self.meta_path, 'rb') as f:
+                header = json.loads(f.read())
+        except (OSError, ValueError):
+            header = None
+        if header is not None and header.pop("stamp", None) == stamp:
+            return header
+
+        # Missing or stale header (e.g. a crash between the journal and header
+        # writes): load the trip, which rewrites it
+        if self.load() is None:
+            return None
+        return dict(self._header)
+
+    def compact(self) -> bool:
+        """Fold the journal into a fresh snapshot and drop the journal"""
+        if self.saved is None and self.load() is None:
+            return False
+        self.write_snapshot(self.saved.days, self.saved.budget_data, self.saved.trip_info)
+        return True
+
+    def delete(self) -> bool:
+        existed = False
+        for path in (self.path, self.journal_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+                existed = True
+        self.saved = None
+        self._header = None
+        self._stamp = None
+        return existed
+
+    def write_snapshot(self, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        """Atomically replace the snapshot with the given state and reset the journal"""
+        itinerary = as_itinerary(trip_data)
+
+        # Prepare data structure; days are stored column-wise
+        data_to_save = {
+            "trip_columns": itinerary.to_columns(),
+            "day_count": len(itinerary),
+            "budget_data": budget_data,
+            "trip_info": trip_info,
+            "last_saved": datetime.now().isoformat(),
+            "version": FORMAT_VERSION,
+            # Journal entries up to this sequence number are already folded in
+            "journal_seq": self._journal_seq
+        }
+
+        # Write to a temp file, fsync, then rename over the old snapshot
+        atomic_write_bytes(self.path, self.codec.dumps(data_to_save))
+
+        # The journal is only dropped once the snapshot that covers it is durable
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        self._snapshot_seq = self._journal_seq
+        self.saved = SavedState(itinerary.copy(), dict(budget_data), dict(trip_info))
+        self.saved.remember_revisions(itinerary)
+        self._write_header(data_to_save["last_saved"])
+
+    def _current_data(self) -> Dict[str, Any]:
+        """The saved state in load() form, as copies the caller may modify"""
+        # The copy keeps row revisions, so the next save only compares rows edited since
+        trip_data = self.saved.days.copy()
+        self.saved.remember_revisions(trip_data)
+        return {
+            "trip_data": trip_data,
+            "budget_data": dict(self.saved.budget_data),
+            "trip_info": dict(self.saved.trip_info),
+            "last_saved": self._header["last_saved"],
+            "version": FORMAT_VERSION
+        }
+
+    def _file_stamp(self) -> List:
+        """[mtime_ns, size] of the snapshot and the journal, None for a missing file"""
+        stamp = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamp.append(None)
+            else:
+                stamp.append([stat.st_mtime_ns, stat.st_size])
+        return stamp
+
+    def _write_header(self, last_saved: Optional[str]) -> None:
+        """Record the state now on disk in memory and in the sidecar header"""
+        self._header = {
+            "last_saved": last_saved,
+            "version": FORMAT_VERSION,
+            "day_count": len(self.saved.days),
+            "journal_seq": self._journal_seq
+        }
+        self._stamp = self._file_stamp()
+        atomic_write_bytes(self.meta_path, json.dumps(dict(self._header, stamp=self._stamp)).encode('utf-8'))
+
+    def _apply_entry(self, entry: Dict) -> None:
+        """Apply one journal entry to the in-memory copy of the saved state"""
+        self.saved.apply(entry["length"], entry["days"])
+        if "budget_data" in entry:
+            self.saved.budget_data = entry["budget_data"]
+        if "trip_info" in entry:
+            self.saved.trip_info = encode_trip_info(entry["trip_info"])
+        self._journal_seq = entry["seq"]
+
+    def _append_journal(self, entry: Dict) -> None:
+        """Append one entry to the journal as a single fsynced JSON line"""
+        line = self._journal_codec.dumps(entry) + b"\n"
+        with open(self.journal_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_journal(self) -> List[Dict]:
+        """Read journal entries, cutting off a torn final line left by a crash"""
+        entries = []
+        if not os.path.exists(self.journal_path):
+            return entries
+
+        valid_end = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete journal line")
+                    entries.append(self._journal_codec.loads(line))
+                except ValueError:
+                    break
+                valid_end += len(line)
+            torn = f.seek(0, os.SEEK_END) > valid_end
+
+        # Drop the torn tail so the next append starts on a clean line
+        if torn:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_end)
+                os.fsync(f.fileno())
+        return entries
+
+
+class JsonFileBackend(StorageBackend):
+    """Journaled trip files: the default trip in `data_file`, others beside it
+
+    `file_format` picks the snapshot codec: "json" (compact, the default),
+    "orjson" or "msgpack" when those libraries are installed. At most
+    `max_cached_trips` trips are kept open in memory.
+    """
+
+    TRIP_SUFFIX = ".trip.json"
+
+    def __init__(self, data_file: str = "trip_data.json", compact_every: int = 50,
+                 file_format: str = "json", max_cached_trips: int = MAX_CACHED_TRIPS):
+        self.data_file = data_file
+        self.directory = os.path.dirname(os.path.abspath(data_file))
+        self.compact_every = compact_every
+        self.codec = get_codec(file_format)
+        self.max_cached_trips = max_cached_trips
+        self._files: "OrderedDict[str, JournaledJsonFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, trip_id: str) -> str:
+        """File holding a trip's snapshot"""
+        if trip_id == DEFAULT_TRIP_ID:
+            return self.data_file
+        # Trip ids become file names, so they must not reach outside the directory
+        if not _TRIP_ID_PATTERN.fullmatch(trip_id):
+            raise ValueError(f"Invalid trip id: {trip_id!r}")
+        return os.path.join(self.directory, f"{trip_id}{self.TRIP_SUFFIX}")
+
+    def _file(self, trip_id: str) -> JournaledJsonFile:
+        with self._lock:
+            if trip_id not in self._files:
+                self._files[trip_id] = JournaledJsonFile(self.path_for(trip_id), self.compact_every, self.codec)
+                while len(self._files) > self.max_cached_trips:
+                    self._files.popitem(last=False)
+            self._files.move_to_end(trip_id)
+            return self._files[trip_id]
+
+    def load(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        return self._file(trip_id).load()
+
+    def save(self, trip_id: str, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        self._file(trip_id).save(trip_data, budget_data, trip_info)
+
+    def delete(self, trip_id: str) -> bool:
+        return self._file(trip_id).delete()
+
+    def exists(self, trip_id: str) -> bool:
+        return self._file(trip_id).exists()
+
+    def compact(self, trip_id: str) -> bool:
+        return self._file(trip_id).compact()
+
+    def read_header(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        return self._file(trip_id).read_header()
+
+    def release(self, trip_id: str) -> None:
+        with self._lock:
+            self._files.pop(trip_id, None)
+
+    def list_trips(self) -> List[Dict[str, Any]]:
+        trip_ids = []
+        if os.path.exists(self.data_file):
+            trip_ids.append(DEFAULT_TRIP_ID)
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(self.TRIP_SUFFIX):
+                trip_ids.append(name[:-len(self.TRIP_SUFFIX)])
+
+        trips = []
+        for trip_id in trip_ids:
+            header = self.read_header(trip_id)
+            if header is not None:
+                trips.append({
+                    'trip_id': trip_id,
+                    'last_saved': header['last_saved'],
+                    'day_count': header['day_count']
+                })
+        return trips
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+# Day columns stored in the days table; 'day' is the 1-based position
+SQLITE_DAY_COLUMNS = list(DAY_DEFAULTS)
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trips (
+    trip_id TEXT PRIMARY KEY,
+    budget_data TEXT NOT NULL,
+    trip_info TEXT NOT NULL,
+    day_count INTEGER NOT NULL,
+    last_saved TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS days (
+    trip_id TEXT NOT NULL REFERENCES trips(trip_id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    {', '.join(f"{column} {'REAL' if column.endswith('_cost') else 'TEXT'}" for column in SQLITE_DAY_COLUMNS)},
+    PRIMARY KEY (trip_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_days_trip_date ON days (trip_id, date);
+"""
+
+# Fixed statement texts, so sqlite3's per-connection statement cache reuses
+# the prepared statements across calls
+_SQL_UPSERT_TRIP = (
+    "INSERT INTO trips (trip_id, budget_data, trip_info, day_count, last_saved, version) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(trip_id) DO UPDATE SET budget_data = excluded.budget_data, "
+    "trip_info = excluded.trip_info, day_count = excluded.day_count, "
+    "last_saved = excluded.last_saved, version = excluded.version"
+)
+_SQL_UPSERT_DAY = (
+    f"INSERT OR REPLACE INTO days (trip_id, day, {', '.join(SQLITE_DAY_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in SQLITE_DAY_COLUMNS)})"
+)
+_SQL_TRUNCATE_DAYS = "DELETE FROM days WHERE trip_id = ? AND day > ?"
+_SQL_SELECT_TRIP = "SELECT budget_data, trip_info, last_saved, version FROM trips WHERE trip_id = ?"
+_SQL_SELECT_DAYS = f"SELECT day, {', '.join(SQLITE_DAY_COLUMNS)} FROM days WHERE trip_id = ? ORDER BY day"
+_SQL_DELETE_TRIP = "DELETE FROM trips WHERE trip_id = ?"
+_SQL_DELETE_DAYS = "DELETE FROM days WHERE trip_id = ?"
+_SQL_SELECT_HEADER = "SELECT last_saved, version, day_count FROM trips WHERE trip_id = ?"
+_SQL_LIST_TRIPS = "SELECT trip_id, last_saved, day_count FROM trips ORDER BY last_saved DESC"
+
+
+class SQLiteBackend(StorageBackend):
+    """Trips in a SQLite database with one row per day
+
+    Runs in WAL mode so readers never block the writer, and a save only
+    upserts the days that changed since the previous save of that trip.
+    Only the columns of the add_new_day() schema are stored per day.
+    """
+
+    def __init__(self, db_path: str = "trips.db", max_cached_trips: int = MAX_CACHED_TRIPS):
+        self.db_path = db_path
+        self.max_cached_trips = max_cached_trips
+        self._lock = threading.Lock()
+        self._saved: "OrderedDict[str, SavedState]" = OrderedDict()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SQLITE_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _day_row(trip_id: str, index: int, day: Dict) -> tuple:
+        return (trip_id, index + 1) + tuple(day[column] for column in SQLITE_DAY_COLUMNS)
+
+    def _remember(self, trip_id: str, saved: SavedState) -> None:
+        """Keep a trip's saved state as most recently used, evicting the oldest"""
+        self._saved[trip_id] = saved
+        self._saved.move_to_end(trip_id)
+        while len(self._saved) > self.max_cached_trips:
+            self._saved.popitem(last=False)
+
+    def load(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        # Held until the state is remembered: a save slipping in between would
+        # otherwise be shadowed by this older state, and the next diff lose rows
+        with self._lock:
+            trip = self._conn.execute(_SQL_SELECT_TRIP, (trip_id,)).fetchone()
+            if trip is None:
+                return None
+            rows = self._conn.execute(_SQL_SELECT_DAYS, (trip_id,)).fetchall()
+
+            # Transpose rows into columns; the leading 'day' position is implied by order
+            values = list(zip(*rows))[1:] if rows else [[] for _ in SQLITE_DAY_COLUMNS]
+            data = coerce_loaded_trip(migrate({
+                "trip_columns": {column: list(vals) for column, vals in zip(SQLITE_DAY_COLUMNS, values)},
+                "budget_data": json.loads(trip[0]),
+                "trip_info": json.loads(trip[1]),
+                "last_saved": trip[2],
+                "version": trip[3]
+            }))
+
+            saved = SavedState(Itinerary.from_columns(data.pop("trip_columns")), dict(data["budget_data"]),
+                               dict(data["trip_info"]))
+            data["trip_data"] = saved.days.copy()
+            saved.remember_revisions(data["trip_data"])
+            self._remember(trip_id, saved)
+        return data
+
+    def save(self, trip_id: str, trip_data: List[Dict], budget_data: Dict, trip_info: Dict) -> None:
+        with self._lock:
+            saved = self._saved.get(trip_id)
+            if saved is None:
+                # Unknown baseline: rewrite every day of this trip once
+                changed = {i: normalize_day(day) for i, day in enumerate(trip_data)}
+            else:
+                changed = saved.changed_days(trip_data)
+
+            with self._conn:
+                self._conn.execute(_SQL_UPSERT_TRIP, (
+                    trip_id,
+                    json.dumps(budget_data, default=str),
+                    json.dumps(trip_info, default=_isoformat),
+                    len(trip_data),
+                    datetime.now().isoformat(),
+                    FORMAT_VERSION
+                ))
+                self._conn.execute(_SQL_TRUNCATE_DAYS, (trip_id, len(trip_data)))
+                self._conn.executemany(_SQL_UPSERT_DAY,
+                                       (self._day_row(trip_id, i, day) for i, day in changed.items()))
+
+            if saved is None:
+                saved = SavedState(Itinerary(), {}, {})
+            self._remember(trip_id, saved)
+            saved.apply(len(trip_data), changed)
+            saved.budget_data = dict(budget_data)
+            saved.trip_info = dict(trip_info)
+            saved.remember_revisions(trip_data)
+
+    def delete(self, trip_id: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_DELETE_DAYS, (trip_id,))
+            deleted = self._conn.execute(_SQL_DELETE_TRIP, (trip_id,)).rowcount > 0
+            self._saved.pop(trip_id, None)
+        return deleted
+
+    def exists(self, trip_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM trips WHERE trip_id = ?", (trip_id,)).fetchone() is not None
+
+    def read_header(self, trip_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(_SQL_SELECT_HEADER, (trip_id,)).fetchone()
+        if row is None:
+            return None
+        return {'last_saved': row[0], 'version': row[1], 'day_count': row[2]}
+
+    def release(self, trip_id: str) -> None:
+        with self._lock:
+            self._saved.pop(trip_id, None)
+
+    def list_trips(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(_SQL_LIST_TRIPS).fetchall()
+        return [{'trip_id': row[0], 'last_saved': row[1], 'day_count': row[2]} for row in rows]
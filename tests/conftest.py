@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The planner is a set of top-level modules; make them importable from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from itinerary import Itinerary  # noqa: E402
+from tests.helpers import make_days  # noqa: E402
+
+
+@pytest.fixture
+def days():
+    return make_days(20)
+
+
+@pytest.fixture
+def trip(days):
+    return Itinerary(days)
@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+
+import pytest
+
+from itinerary import Itinerary
+
+CITIES = ["Lisbon", "Porto", "Madrid", "", "Seville", "Lyon", "Paris"]
+TRANSPORT = ["Bus", "Train", "Plane", "Ferry"]
+
+
+def make_days(count: int, start: date = date(2024, 1, 1)):
+    """Varied day dicts: some fields empty, costs and categories mixed"""
+    return [{
+        'date': str(start + timedelta(days=i)) if i % 4 else '',
+        'location': CITIES[i % len(CITIES)],
+        'transport_type': TRANSPORT[i % len(TRANSPORT)],
+        'transport_from': CITIES[(i + 1) % len(CITIES)],
+        'transport_to': CITIES[(i + 2) % len(CITIES)] if i % 3 else '',
+        'transport_cost': round(i * 3.25, 2),
+        'accommodation_type': 'Hotel' if i % 2 else 'Hostel',
+        'accommodation_name': f"Stay {i}" if i % 5 else '',
+        'accommodation_cost': float(i % 7) * 10,
+        'notes': f"note {i}" if i % 2 else ''
+    } for i in range(count)]
+
+
+def assert_aggregates_match(trip: Itinerary) -> None:
+    """Running aggregates equal those of a trip rebuilt from the same rows"""
+    fresh = Itinerary(trip.to_records())
+    for field in ('transport_cost', 'accommodation_cost'):
+        assert trip.total(field) == pytest.approx(fresh.total(field))
+    for field in ('transport_type', 'accommodation_type'):
+        assert trip.value_counts(field) == fresh.value_counts(field)
+    for field in ('location', 'transport_from', 'transport_to', 'accommodation_type', 'accommodation_name',
+                  'notes'):
+        assert trip.count_missing(field) == fresh.count_missing(field)
+    assert trip.completion_histogram() == fresh.completion_histogram()
+    assert trip.completion_scores().tolist() == pytest.approx(fresh.completion_scores().tolist())
@@ -0,0 +1,120 @@
+import os
+import warnings
+from datetime import date
+import pytest
+
+import data_manager
+import session_store
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backpacking_planner.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The planner on the Day Planning tab, saving into tmp_path"""
+    warnings.filterwarnings("ignore")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_manager, "_default_manager", data_manager.DataManager(str(tmp_path / "trip_data.json")))
+    monkeypatch.setattr(data_manager, "_auto_save_worker", None)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    run(at)
+    tabs = at.radio(key="active_tab")
+    tabs.set_value(next(option for option in tabs.options if "Day Planning" in option))
+    run(at)
+    at.number_input(key="days_to_add_input").set_value(3)
+    run(at)
+    button(at, "add_multiple_days_btn").click()
+    run(at)
+    yield at
+    if data_manager._auto_save_worker is not None:
+        data_manager._auto_save_worker.stop(data_manager.AUTO_SAVE_EXIT_TIMEOUT_SECONDS)
+
+
+def run(at):
+    at.run()
+    assert not at.exception, at.exception
+
+
+def button(at, key):
+    return next(widget for widget in at.button if widget.key == key)
+
+
+def day_widget(widgets, prefix, day_id):
+    """The widget for one day's field; form keys carry the day id and row revision"""
+    return next(widget for widget in widgets if widget.key.startswith(f"{prefix}{day_id}_"))
+
+
+def save_day(at, day_id):
+    button(at, next(widget.key for widget in at.button
+                    if widget.key.startswith(f"FormSubmitter:day_form_{day_id}_"))).click()
+    run(at)
+
+
+def test_move_to_day_after_the_trip_was_spilled(app, monkeypatch):
+    trip = app.session_state.trip_data
+    ids = trip.column('id').tolist()
+    locations = ['Lisbon', 'Porto', 'Madrid']
+    for day_id, location in zip(ids, locations):
+        day_widget(app.text_input, "location_", day_id).input(location)
+        save_day(app, day_id)
+    keys = [widget.key for widget in app.text_input if widget.key.startswith("location_")]
+
+    store = session_store.get_session_store()
+    monkeypatch.setattr(store, "idle_timeout", 0)
+    assert store.sweep() >= 1
+    assert 'trip_data' not in app.session_state
+
+    # The input was rendered before the spill and still carries the old day id
+    app.number_input(key=f"move_to_{ids[0]}").set_value(3)
+    run(app)
+    trip = app.session_state.trip_data
+    assert trip.column('id').tolist() == [ids[1], ids[2], ids[0]]
+    assert [trip.get_value(i, 'location') for i in range(3)] == ['Porto', 'Madrid', 'Lisbon']
+    # Rows kept their revisions too, so the day forms kept their widget keys
+    assert sorted(widget.key for widget in app.text_input if widget.key.startswith("location_")) == sorted(keys)
+
+
+def test_move_to_day_for_a_removed_day_is_ignored(app):
+    trip = app.session_state.trip_data
+    day_id = int(trip.column('id')[0])
+    trip.pop(0)
+    app.number_input(key=f"move_to_{day_id}").set_value(2)
+    run(app)
+    assert len(app.session_state.trip_data) == 2
+
+
+def test_bulk_date_shift_survives_saving_the_day_form(app):
+    trip = app.session_state.trip_data
+    day_id = int(trip.column('id')[0])
+    day_widget(app.date_input, "date_", day_id).set_value(date(2024, 1, 1))
+    save_day(app, day_id)
+    assert trip.get_value(0, 'date') == '2024-01-01'
+
+    app.number_input(key="bulk_shift_input").set_value(5)
+    button(app, "FormSubmitter:bulk_range_form-📅 Shift dates").click()
+    run(app)
+    assert trip.get_value(0, 'date') == '2024-01-06'
+    assert day_widget(app.date_input, "date_", day_id).value == date(2024, 1, 6)
+
+    # Saving the untouched form must not write the pre-shift date back
+    save_day(app, day_id)
+    assert trip.get_value(0, 'date') == '2024-01-06'
+
+
+def test_bulk_cost_change_survives_saving_the_day_form(app):
+    trip = app.session_state.trip_data
+    day_id = int(trip.column('id')[0])
+
+    app.number_input(key="bulk_cost_change_input").set_value(7.5)
+    button(app, "FormSubmitter:bulk_range_form-💷 Apply cost change").click()
+    run(app)
+    cost = trip.get_value(0, 'transport_cost')
+    assert cost > 0
+    assert day_widget(app.number_input, "transport_cost_", day_id).value == cost
+
+    save_day(app, day_id)
+    assert trip.get_value(0, 'transport_cost') == cost
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+import data_manager
+from data_manager import AutoSaveWorker, DataManager
+from itinerary import Itinerary
+from tests.helpers import make_days
+
+BUDGET = {'total_budget': 500.0}
+TRIP_INFO = {'name': 'Auto'}
+
+
+class RecordingManager:
+    """Stands in for a DataManager; remembers what was written"""
+
+    def __init__(self, block: threading.Event = None):
+        self.saved = []
+        self.block = block
+        self.started = threading.Event()
+
+    def save_data(self, trip_data, budget_data, trip_info):
+        self.started.set()
+        if self.block is not None:
+            self.block.wait(5)
+        self.saved.append((trip_data.to_records(), budget_data, trip_info))
+        return True
+
+
+@pytest.fixture
+def make_worker():
+    workers = []
+
+    def make(manager, **kwargs):
+        worker = AutoSaveWorker(manager, **kwargs)
+        workers.append(worker)
+        return worker
+    yield make
+    for worker in workers:
+        worker.stop(5)
+
+
+def test_submissions_are_coalesced_and_flushed(make_worker):
+    manager = RecordingManager()
+    worker = make_worker(manager, debounce=60, max_delay=60)
+    trip = Itinerary(make_days(3))
+    for i in range(5):
+        trip.update_day(0, {'notes': f"edit {i}"})
+        worker.submit(trip, BUDGET, TRIP_INFO)
+    assert manager.saved == []
+
+    assert worker.flush(5)
+    assert len(manager.saved) == 1
+    assert manager.saved[0][0][0]['notes'] == "edit 4"
+    stats = worker.stats()
+    assert stats['saves_written'] == 1 and stats['saves_coalesced'] == 4
+    assert stats['queue_depth'] == 0 and not stats['pending']
+
+
+def test_submit_snapshots_the_trip(make_worker):
+    manager = RecordingManager()
+    worker = make_worker(manager, debounce=60, max_delay=60)
+    trip = Itinerary(make_days(2))
+    worker.submit(trip, BUDGET, TRIP_INFO)
+    trip.update_day(1, {'location': 'changed after submit'})
+    worker.flush(5)
+    assert manager.saved[0][0][1]['location'] != 'changed after submit'
+
+
+def test_quiet_period_writes_without_a_flush(make_worker):
+    manager = RecordingManager()
+    worker = make_worker(manager, debounce=0.01, max_delay=1)
+    worker.submit(Itinerary(make_days(1)), BUDGET, TRIP_INFO)
+    assert manager.started.wait(5)
+    assert worker.flush(5)
+    assert len(manager.saved) == 1
+
+
+def test_discard_drops_pending_state(make_worker):
+    manager = RecordingManager()
+    worker = make_worker(manager, debounce=60, max_delay=60)
+    worker.submit(Itinerary(make_days(2)), BUDGET, TRIP_INFO)
+    assert worker.discard(5)
+    assert worker.flush(5)
+    assert manager.saved == []
+
+
+def test_discard_waits_for_a_write_in_progress(make_worker):
+    release = threading.Event()
+    manager = RecordingManager(block=release)
+    worker = make_worker(manager, debounce=0, max_delay=0)
+    worker.submit(Itinerary(make_days(2)), BUDGET, TRIP_INFO)
+    assert manager.started.wait(5)
+    assert not worker.discard(0.05)
+    release.set()
+    assert worker.discard(5)
+    assert len(manager.saved) == 1
+
+
+def test_clear_saved_data_cancels_a_queued_auto_save(tmp_path, monkeypatch):
+    manager = DataManager(str(tmp_path / "trip_data.json"))
+    worker = AutoSaveWorker(manager, debounce=60, max_delay=60)
+    monkeypatch.setattr(data_manager, "_default_manager", manager)
+    monkeypatch.setattr(data_manager, "_auto_save_worker", worker)
+
+    trip = Itinerary(make_days(4))
+    assert manager.save_data(trip, BUDGET, TRIP_INFO)
+    worker.submit(trip, BUDGET, TRIP_INFO)
+    assert data_manager.clear_saved_data()
+    assert worker.stop(5)
+    assert DataManager(str(tmp_path / "trip_data.json")).load_data() is None
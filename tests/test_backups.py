@@ -0,0 +1,133 @@
+import os
+import threading
+
+import pytest
+
+import backups
+from backups import BackupStore
+from data_manager import DataManager
+from itinerary import Itinerary
+from tests.helpers import make_days
+
+BUDGET = {'total_budget': 700.0}
+TRIP_INFO = {'name': 'Backed up', 'start_date': None}
+
+
+def loaded(trip):
+    return {'trip_data': trip, 'budget_data': BUDGET, 'trip_info': TRIP_INFO, 'version': '2.0'}
+
+
+def object_count(store):
+    if not os.path.isdir(store.objects_dir):
+        return 0
+    return sum(len(os.listdir(os.path.join(store.objects_dir, prefix))) for prefix in os.listdir(store.objects_dir))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BackupStore(str(tmp_path / "backups"), keep_last=3, keep_daily=0)
+
+
+def test_backup_and_restore(store):
+    trip = Itinerary(make_days(100))
+    backup_id = store.backup("iberia", loaded(trip))
+    restored = store.restore(backup_id)
+    assert restored['trip_data'].to_records() == trip.to_records()
+    assert restored['budget_data'] == BUDGET
+    assert [entry['backup_id'] for entry in store.list_backups("iberia")] == [backup_id]
+    assert store.restore("iberia-missing") is None
+
+
+def test_unchanged_state_is_not_backed_up_twice(store):
+    trip = Itinerary(make_days(10))
+    assert store.backup("iberia", loaded(trip)) is not None
+    assert store.backup("iberia", loaded(trip)) is None
+    assert len(store.list_backups()) == 1
+
+
+def test_only_changed_chunks_are_written(store):
+    trip = Itinerary(make_days(400))
+    store.backup("iberia", loaded(trip))
+    before = object_count(store)
+    trip.update_day(200, {'notes': 'one edit'})
+    store.backup("iberia", loaded(trip))
+    assert object_count(store) - before == 1
+
+
+def test_retention_keeps_the_newest_per_trip(store):
+    trip = Itinerary(make_days(5))
+    ids = []
+    for i in range(5):
+        trip.update_day(0, {'notes': f"version {i}"})
+        ids.append(store.backup("iberia", loaded(trip)))
+    other = store.backup("lisbon", loaded(Itinerary(make_days(2))))
+
+    assert [entry['backup_id'] for entry in store.list_backups("iberia")] == ids[:1:-1]
+    assert store.restore(ids[-1])['trip_data'].get_value(0, 'notes') == "version 4"
+    assert store.restore(other) is not None
+
+
+def test_keep_daily_keeps_one_backup_per_day(tmp_path):
+    store = BackupStore(str(tmp_path / "backups"), keep_last=1, keep_daily=5)
+    trip = Itinerary(make_days(3))
+    for i in range(3):
+        trip.update_day(0, {'notes': f"version {i}"})
+        store.backup("iberia", loaded(trip))
+    # All three were made today: the newest is both the last and the day's backup
+    assert len(store.list_backups("iberia")) == 1
+
+
+def test_gc_deletes_unreferenced_chunks_after_the_grace_period(store, monkeypatch):
+    trip = Itinerary(make_days(40))
+    first = store.backup("iberia", loaded(trip))
+    for i in range(3):
+        trip.update_day(i, {'location': f"Changed {i}"})
+        store.backup("iberia", loaded(trip))
+    # Within the grace period the expired backup's chunks stay
+    assert store.restore(first) is None
+    kept = object_count(store)
+
+    monkeypatch.setattr(backups, "GC_GRACE_SECONDS", -1)
+    trip.update_day(0, {'notes': 'once more'})
+    store.backup("iberia", loaded(trip))
+    assert object_count(store) < kept
+    for entry in store.list_backups("iberia"):
+        assert store.restore(entry['backup_id']) is not None
+
+
+def test_empty_trip_with_expired_backups(tmp_path, monkeypatch):
+    monkeypatch.setattr(backups, "GC_GRACE_SECONDS", -1)
+    store = BackupStore(str(tmp_path / "backups"), keep_last=1, keep_daily=0)
+    assert store.backup("empty", loaded(Itinerary())) is not None
+    assert store.backup("empty", dict(loaded(Itinerary()), budget_data={'total_budget': 1.0})) is not None
+    assert len(store.list_backups()) == 1
+
+    manager = DataManager(str(tmp_path / "trip_data.json"), backup_dir=str(tmp_path / "manager_backups"))
+    manager.backups.keep_last, manager.backups.keep_daily = 1, 0
+    for name in ("a", "b"):
+        assert manager.save_data(Itinerary(), BUDGET, dict(TRIP_INFO, name=name))
+        assert manager.backup_data()
+
+
+def test_stores_sharing_a_directory_do_not_collect_each_others_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(backups, "GC_GRACE_SECONDS", -1)
+    directory = str(tmp_path / "backups")
+    errors = []
+
+    def run(trip_id):
+        store = BackupStore(directory, keep_last=1, keep_daily=0)
+        trip = Itinerary(make_days(60))
+        try:
+            for i in range(15):
+                trip.update_day(i % 60, {'notes': f"{trip_id} {i}"})
+                backup_id = store.backup(trip_id, loaded(trip))
+                assert store.restore(backup_id)['trip_data'].to_records() == trip.to_records()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(trip_id,)) for trip_id in ("a", "b", "c")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+from catalog import TripCatalog
+from itinerary import Itinerary
+from storage_backends import SQLiteBackend
+from tests.helpers import make_days
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = TripCatalog(SQLiteBackend(str(tmp_path / "trips.db")), str(tmp_path / "catalog.db"))
+    yield catalog
+    catalog.close()
+
+
+def names(entries):
+    return sorted(entry['name'] for entry in entries)
+
+
+def test_saves_through_an_opened_trip_update_the_index(catalog):
+    trip_id = catalog.create_trip("ana", "Iberia")
+    assert catalog.get(trip_id)['day_count'] == 0
+
+    manager = catalog.open_trip(trip_id)
+    trip = Itinerary(make_days(10))
+    assert manager.save_data(trip, {'total_budget': 1.0}, {'name': 'Iberia'})
+
+    entry = catalog.get(trip_id)
+    assert entry['owner'] == "ana"
+    assert entry['day_count'] == 10
+    assert entry['total_cost'] == pytest.approx(trip.total_cost())
+    # No overview dates, so the index takes the span of the day dates
+    assert (entry['start_date'], entry['end_date']) == ('2024-01-02', '2024-01-10')
+    assert manager.load_data()['trip_data'].to_records() == trip.to_records()
+
+    with pytest.raises(KeyError):
+        catalog.open_trip("missing")
+
+
+def test_search_by_owner_name_and_dates(catalog):
+    catalog.create_trip("ana", "Japan spring", trip_info={'start_date': date(2024, 3, 1), 'end_date': date(2024, 3, 20)})
+    catalog.create_trip("ana", "Portugal", trip_info={'start_date': date(2024, 6, 1), 'end_date': date(2024, 6, 9)})
+    catalog.create_trip("ben", "Japan autumn", trip_info={'start_date': date(2024, 10, 1), 'end_date': date(2024, 10, 9)})
+
+    assert names(catalog.search(text="japan")) == ["Japan autumn", "Japan spring"]
+    assert names(catalog.search(owner="ana", text="japan")) == ["Japan spring"]
+    assert names(catalog.search(starts_after=date(2024, 5, 1))) == ["Japan autumn", "Portugal"]
+    assert names(catalog.search(owner="ana", ends_before="2024-06-30")) == ["Japan spring", "Portugal"]
+    assert catalog.count() == 3 and catalog.count("ben") == 1
+    assert len(catalog.list_trips(limit=2)) == 2
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("100%", ["100% Italy"]),
+    ("a_b", ["a_b trip"]),
+    ("\\", ["back\\slash"]),
+    ("%", ["100% Italy"]),
+])
+def test_like_wildcards_in_search_text_match_literally(catalog, text, expected):
+    for name in ("100% Italy", "1000 Islands", "a_b trip", "axb trip", "back\\slash"):
+        catalog.create_trip("ana", name)
+    assert names(catalog.search(text=text)) == expected
+
+
+def test_delete_and_rebuild(catalog):
+    trip_id = catalog.create_trip("ana", "Gone")
+    assert catalog.delete_trip(trip_id)
+    assert catalog.get(trip_id) is None
+    assert catalog.backend.load(trip_id) is None
+    assert not catalog.delete_trip(trip_id)
+
+    catalog.backend.save("unindexed", Itinerary(make_days(3)), {}, {'name': 'Found'})
+    assert catalog.rebuild("ana") == 1
+    assert catalog.get("unindexed")['day_count'] == 3
+    assert catalog.rebuild("ana") == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+import chart_cache
+from chart_cache import FigureCache, content_hash, get_or_build
+
+
+@pytest.fixture(autouse=True)
+def global_cache(monkeypatch):
+    cache = FigureCache(maxsize=8)
+    monkeypatch.setattr(chart_cache, "GLOBAL_FIGURE_CACHE", cache)
+    return cache
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'figure': self.calls}
+
+
+def test_content_hash_follows_values_and_types():
+    costs = np.array([1.0, 2.5])
+    assert content_hash("pie", {'a': costs}) == content_hash("pie", {'a': costs.copy()})
+    assert content_hash("pie", {'a': costs}) != content_hash("pie", {'a': np.array([1.0, 2.6])})
+    assert content_hash([1]) != content_hash("[1]")
+    assert content_hash(1) != content_hash("1")
+    assert content_hash([[1], 2]) != content_hash([1, [2]])
+
+
+def test_lru_eviction_and_stats():
+    cache = FigureCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'hit_rate': 0.75, 'size': 2, 'maxsize': 2}
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()['hits'] == 0
+
+
+def test_get_or_build_builds_once_per_input(global_cache):
+    builder = Builder()
+    inputs = {'costs': np.array([10.0, 20.0])}
+    first = get_or_build("costs", inputs, builder)
+    assert get_or_build("costs", {'costs': np.array([10.0, 20.0])}, builder) is first
+    assert builder.calls == 1
+
+    get_or_build("costs", {'costs': np.array([10.0, 21.0])}, builder)
+    get_or_build("other chart", inputs, builder)
+    assert builder.calls == 3
+    assert len(global_cache) == 3
+
+
+def test_session_cache_is_checked_first_and_filled_from_the_shared_one(global_cache):
+    builder = Builder()
+    session = FigureCache(maxsize=4)
+    figure = get_or_build("costs", [1, 2], builder)
+
+    assert get_or_build("costs", [1, 2], builder, session_cache=session) is figure
+    assert session.stats()['misses'] == 1 and len(session) == 1
+
+    global_cache.clear()
+    assert get_or_build("costs", [1, 2], builder, session_cache=session) is figure
+    assert builder.calls == 1
+    assert session.stats()['hits'] == 1
@@ -0,0 +1,95 @@
+import pytest
+
+from gazetteer import Gazetteer, Place, PlaceNormalizer, get_gazetteer, normalize_text
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return get_gazetteer()
+
+
+def ids(places):
+    return [place.id for place in places]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Kraków", "krakow"),
+    ("  SÃO   paulo ", "sao paulo"),
+    ("King's Cross", "kings cross"),
+    ("Hà Nội", "ha noi"),
+    ("Chiang-Mai_", "chiang mai"),
+])
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize("text, place_id", [
+    ("Bangkok", "th-bangkok"),
+    ("bangkok, Thailand", "th-bangkok"),
+    ("BKK", "th-bangkok"),
+    ("Krakow", "pl-krakow"),
+    ("Saigon", "vn-ho-chi-minh-city"),
+    ("Hanoi (Old Quarter)", "vn-hanoi"),
+    ("Kings Cross", "gb-london-kings-cross"),
+])
+def test_lookup(gazetteer, text, place_id):
+    assert gazetteer.lookup(text).id == place_id
+
+
+@pytest.mark.parametrize("text", ["", "Atlantis", "Bang", "Mai"])
+def test_lookup_needs_a_whole_name(gazetteer, text):
+    assert gazetteer.lookup(text) is None
+
+
+def test_complete_ranks_names_before_aliases_and_words(gazetteer):
+    assert ids(gazetteer.complete("chiang m"))[0] == "th-chiang-mai"
+    assert "th-chiang-mai" in ids(gazetteer.complete("mai"))
+    assert ids(gazetteer.complete("bkk")) == ["th-bangkok"]
+    assert gazetteer.complete("") == [] and gazetteer.complete("ba", limit=0) == []
+    assert len(gazetteer.complete("s", limit=3)) == 3
+
+
+def test_complete_prefers_cities_over_stations(gazetteer):
+    places = gazetteer.complete("london")
+    kinds = [place.kind for place in places]
+    assert kinds == sorted(kinds, key=lambda kind: kind != 'city')
+
+
+def test_small_gazetteer():
+    gazetteer = Gazetteer([
+        Place("a", "Port Alpha", "city", "XX", 0.0, 0.0, ("PA",)),
+        Place("b", "Alpha", "station", "XX", 0.0, 0.0),
+    ])
+    assert len(gazetteer) == 2
+    # An exact key beats a longer one; a name beats a word of another name
+    assert ids(gazetteer.complete("alpha")) == ["b", "a"]
+    assert ids(gazetteer.complete("pa")) == ["a"]
+    with pytest.raises(ValueError):
+        Gazetteer([Place("a", "One", "city", "XX", 0, 0), Place("a", "Two", "city", "XX", 0, 0)])
+
+
+def test_load_checks_the_header(tmp_path):
+    path = tmp_path / "places.tsv"
+    path.write_text("# comment\nid\tname\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        Gazetteer.load(str(path))
+
+    path.write_text("id\tname\tkind\tcountry\tlat\tlon\taliases\nx-y\tY\tcity\tXX\t1.5\t2\tYY|\n", encoding="utf-8")
+    place = Gazetteer.load(str(path)).get("x-y")
+    assert (place.lat, place.aliases, place.label) == (1.5, ("YY",), "Y, XX")
+
+
+def test_normalizer_caches_and_groups(gazetteer):
+    normalizer = PlaceNormalizer(gazetteer, maxsize=2)
+    assert normalizer.resolve("BKK").id == "th-bangkok"
+    assert normalizer.resolve("BKK").id == "th-bangkok"
+    assert normalizer.resolve("Atlantis") is None
+    normalizer.resolve("Hanoi")
+    assert normalizer.stats() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+    known, unknown = normalizer.group_counts({"Bangkok": 3, "BKK": 2, "krung thep": 1, "atlantis": 1,
+                                              "Atlantis": 2, "": 4})
+    assert known == {"th-bangkok": 6}
+    assert unknown == {"Atlantis": 3}
+    assert normalizer.place_key("Sài Gòn") == "vn-ho-chi-minh-city"
+    assert normalizer.place_key("Atlantis ") == "atlantis"
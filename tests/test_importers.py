@@ -0,0 +1,134 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from exporters import export_csv
+from importers import import_days
+from itinerary import Itinerary
+from tests.helpers import make_days
+
+HEADER = "location,date,transport_type,transport_cost\n"
+
+
+def csv_bytes(rows):
+    return (HEADER + "".join(f"{row}\n" for row in rows)).encode('utf-8')
+
+
+def assert_counts_add_up(report):
+    assert report.rows_read == report.rows_imported + report.rows_rejected
+
+
+def test_exported_csv_round_trips():
+    trip = Itinerary(make_days(25))
+    target = Itinerary()
+    report = import_days(io.BytesIO(export_csv(trip).getvalue()), target)
+    assert report.ok
+    assert report.rows_imported == 25
+    assert target.to_records() == trip.to_records()
+
+
+@pytest.mark.parametrize("encode", [
+    lambda days: gzip.compress(json.dumps(days).encode('utf-8')),
+    lambda days: "\n".join(json.dumps(day) for day in days).encode('utf-8'),
+], ids=["gzipped-array", "json-lines"])
+def test_json_inputs(encode):
+    days = make_days(9)
+    target = Itinerary()
+    report = import_days(io.BytesIO(encode(days)), target)
+    assert report.ok
+    assert [day['location'] for day in target.to_records()] == [day['location'] for day in days]
+
+
+def test_row_errors_reject_only_their_rows():
+    raw = csv_bytes([
+        "Lisbon,2024-01-01,Bus,10",
+        "Porto,2024-13-01,Train,5",
+        "Madrid,2024-01-03,Hovercraft,5",
+        "Seville,2024-01-04,Plane,-3",
+        "Lyon,,train,2.5",
+    ])
+    target = Itinerary()
+    report = import_days(io.BytesIO(raw), target)
+
+    assert [day['location'] for day in target.to_records()] == ['Lisbon', 'Lyon']
+    assert target.get_value(1, 'transport_type') == 'Train'
+    assert report.rows_rejected == 3
+    assert [(error.row, error.field) for error in report.errors] == [
+        (2, 'date'), (3, 'transport_type'), (4, 'transport_cost')]
+    assert report.fatal is None
+    assert_counts_add_up(report)
+
+
+def test_json_records_that_are_not_days():
+    raw = json.dumps([{"location": "Faro"}, "Porto", {"colour": "blue"}, 7]).encode('utf-8')
+    target = Itinerary()
+    report = import_days(io.BytesIO(raw), target)
+    assert len(target) == 1
+    assert [(error.row, error.message) for error in report.errors] == [
+        (2, "not an object"), (3, "no day fields"), (4, "not an object")]
+    assert_counts_add_up(report)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 4, 10, 100])
+def test_chunk_boundaries(chunk_rows):
+    rows = [f"City {i},2024-01-{i % 28 + 1:02d},Bus,{'x' if i % 4 == 3 else i}" for i in range(10)]
+    target = Itinerary()
+    report = import_days(io.BytesIO(csv_bytes(rows)), target, chunk_rows=chunk_rows)
+
+    assert [day['location'] for day in target.to_records()] == [f"City {i}" for i in range(10) if i % 4 != 3]
+    # Row numbers count from the first data row whatever the chunking
+    assert [error.row for error in report.errors] == [4, 8]
+    assert report.rows_read == 10
+    assert_counts_add_up(report)
+
+
+def test_truncated_json_keeps_rows_read_before():
+    target = Itinerary()
+    report = import_days(io.BytesIO(b'[{"location": "a"}, {"location": "b"}, {"loc'), target, chunk_rows=1)
+    assert len(target) == 2
+    assert report.fatal is not None
+    assert report.rows_read == 2
+
+
+def test_failed_chunk_is_not_loaded_twice():
+    class FailingSecondChunk(Itinerary):
+        calls = 0
+
+        def extend_columns(self, columns):
+            FailingSecondChunk.calls += 1
+            if FailingSecondChunk.calls == 2:
+                raise ValueError("disk full")
+            super().extend_columns(columns)
+
+    rows = [f"City {i},,Bus,{i}" for i in range(10)]
+    target = FailingSecondChunk()
+    report = import_days(io.BytesIO(csv_bytes(rows)), target, chunk_rows=4)
+
+    assert FailingSecondChunk.calls == 2
+    assert len(target) == 4
+    assert report.fatal == "disk full"
+    assert report.rows_read == 8
+    assert report.rows_imported == 4
+    assert_counts_add_up(report)
+
+
+def test_unsupported_format():
+    report = import_days(io.BytesIO(b"a,b\n1,2\n"), Itinerary(), file_format='xml')
+    assert report.fatal == "unsupported import format: xml"
+    assert report.rows_read == 0
+
+
+def test_errors_are_reported_in_row_order():
+    raw = json.dumps([{"location": "Faro", "transport_cost": "x"}, {"location": "Beja"},
+                      "Porto", {"colour": "blue"}, {"date": "soon"}]).encode('utf-8')
+    report = import_days(io.BytesIO(raw), Itinerary())
+    assert [error.row for error in report.errors] == [1, 3, 4, 5]
+
+
+def test_reported_errors_are_the_earliest_when_capped():
+    raw = json.dumps([{"transport_cost": "x"}] * 3 + [7] * 3).encode('utf-8')
+    report = import_days(io.BytesIO(raw), Itinerary(), max_errors=2)
+    assert [error.row for error in report.errors] == [1, 2]
+    assert report.error_count == 6
@@ -0,0 +1,243 @@
+import numpy as np
+import pytest
+
+from itinerary import DAY_DEFAULTS, Itinerary
+from tests.helpers import assert_aggregates_match, make_days
+
+
+def locations(trip):
+    return [day['location'] for day in trip.to_records()]
+
+
+def test_rows_round_trip(days, trip):
+    records = trip.to_records()
+    assert len(records) == len(days)
+    for day, record in zip(days, records):
+        assert {field: record[field] for field in day} == day
+
+
+def test_missing_fields_take_their_defaults():
+    trip = Itinerary([{'location': 'Granada'}])
+    assert trip.get_day(0) == dict(DAY_DEFAULTS, day=1, location='Granada')
+
+
+def test_rows_read_and_write_like_dicts(trip):
+    trip[2]['location'] = 'Faro'
+    trip[2].update(transport_cost='12.5')
+    assert trip.get_value(2, 'location') == 'Faro'
+    assert trip[2]['transport_cost'] == 12.5
+    with pytest.raises(IndexError):
+        trip[20]
+
+
+def test_pop(days, trip):
+    removed = trip.pop(4)
+    assert removed['location'] == days[4]['location']
+    assert len(trip) == 19
+    assert locations(trip) == [day['location'] for i, day in enumerate(days) if i != 4]
+    assert trip.pop()['location'] == days[-1]['location']
+
+
+# ----------------------------------------------------------------------------
+# Running aggregates
+# ----------------------------------------------------------------------------
+
+def test_aggregates_of_a_new_trip(days, trip):
+    assert trip.total('transport_cost') == pytest.approx(sum(day['transport_cost'] for day in days))
+    assert trip.total_cost() == pytest.approx(sum(day['transport_cost'] + day['accommodation_cost'] for day in days))
+    assert trip.value_counts('accommodation_type') == {'Hostel': 10, 'Hotel': 10}
+    assert trip.count_missing('location') == sum(not day['location'] for day in days)
+    assert_aggregates_match(trip)
+
+
+def test_aggregates_follow_edits(trip):
+    trip.update_day(0, {'transport_cost': 50.0, 'location': '', 'accommodation_type': 'Camping'})
+    trip[3]['notes'] = 'filled in'
+    trip.append({'location': 'Faro', 'transport_cost': 4.0})
+    trip.insert(0, {'transport_type': 'Ferry'})
+    trip.pop(5)
+    assert_aggregates_match(trip)
+
+
+def test_clear_resets_aggregates(trip):
+    trip.clear()
+    assert len(trip) == 0
+    assert trip.total_cost() == 0.0
+    assert trip.value_counts('transport_type') == {}
+    assert_aggregates_match(trip)
+
+
+# ----------------------------------------------------------------------------
+# Form commits
+# ----------------------------------------------------------------------------
+
+def test_commit_changes_reports_only_differences(trip):
+    day = trip.get_day(1)
+    revision = trip.column('revision')[1]
+    assert trip.commit_changes(1, day) == []
+    assert trip.column('revision')[1] == revision
+
+    assert trip.commit_changes(1, dict(day, notes='changed', transport_cost=str(day['transport_cost']))) == ['notes']
+    assert trip.get_value(1, 'notes') == 'changed'
+    assert trip.column('revision')[1] != revision
+    assert_aggregates_match(trip)
+
+
+# ----------------------------------------------------------------------------
+# truncate and None categories
+# ----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("length", [0, 1, 7, 19])
+def test_truncate(days, trip, length):
+    version = trip.version
+    trip.truncate(length)
+    assert len(trip) == length
+    assert locations(trip) == [day['location'] for day in days[:length]]
+    assert trip.version > version
+    assert_aggregates_match(trip)
+
+    # The trip keeps working after shrinking
+    trip.append(days[0])
+    assert_aggregates_match(trip)
+
+
+def test_truncate_past_end_is_a_no_op(trip):
+    version = trip.version
+    trip.truncate(50)
+    assert len(trip) == 20
+    assert trip.version == version
+
+
+def test_none_category_takes_the_default():
+    trip = Itinerary([{'transport_type': None, 'accommodation_type': None}])
+    assert trip.get_value(0, 'transport_type') == DAY_DEFAULTS['transport_type']
+    assert trip.get_value(0, 'accommodation_type') == DAY_DEFAULTS['accommodation_type']
+
+    trip.update_day(0, {'transport_type': 'Train'})
+    assert trip.commit_changes(0, {'transport_type': None}) == ['transport_type']
+    assert trip.get_value(0, 'transport_type') == DAY_DEFAULTS['transport_type']
+    assert 'None' not in trip.value_counts('transport_type')
+
+
+def test_extend_columns_with_none_categories():
+    trip = Itinerary()
+    trip.extend_columns({'location': ['a', 'b'], 'transport_type': [None, 'Train']})
+    assert [day['transport_type'] for day in trip.to_records()] == [DAY_DEFAULTS['transport_type'], 'Train']
+    assert_aggregates_match(trip)
+
+
+# ----------------------------------------------------------------------------
+# Row keys across a save and reload
+# ----------------------------------------------------------------------------
+
+def test_restore_row_keys(trip):
+    ids, revisions = trip.row_keys()
+    reloaded = Itinerary(trip.to_records())
+    assert reloaded.column('id').tolist() != ids.tolist()
+
+    reloaded.restore_row_keys(ids, revisions)
+    assert reloaded.column('id').tolist() == ids.tolist()
+    assert reloaded.column('revision').tolist() == revisions.tolist()
+    assert reloaded.index_of(int(ids[5])) == 5
+    with pytest.raises(ValueError):
+        reloaded.restore_row_keys(ids[:-1], revisions[:-1])
+
+
+# ----------------------------------------------------------------------------
+# Stable ids: move / insert-before
+# ----------------------------------------------------------------------------
+
+@pytest.mark.parametrize("index, before, position", [(0, 3, 2), (3, 0, 0), (5, 5, 5), (2, 20, 19)])
+def test_move(trip, index, before, position):
+    ids = trip.column('id').tolist()
+    revisions = dict(zip(ids, trip.column('revision').tolist()))
+    expected = ids[:index] + ids[index + 1:]
+    expected.insert(position, ids[index])
+
+    assert trip.move(index, before) == position
+    assert trip.column('id').tolist() == expected
+    # Moving rewrites no row
+    assert dict(zip(trip.column('id').tolist(), trip.column('revision').tolist())) == revisions
+    assert_aggregates_match(trip)
+
+
+def test_insert_before_keeps_ids_of_other_days(trip):
+    ids = trip.column('id').tolist()
+    trip.insert(3, {'location': 'Granada', 'transport_cost': 12.5})
+
+    assert len(trip) == 21
+    assert trip.get_value(3, 'location') == 'Granada'
+    assert trip.get_value(3, 'transport_type') == DAY_DEFAULTS['transport_type']
+    new_ids = trip.column('id').tolist()
+    assert new_ids[:3] + new_ids[4:] == ids
+    assert new_ids[3] not in ids
+    assert trip.index_of(ids[3]) == 4
+    assert_aggregates_match(trip)
+
+
+def test_index_of_removed_day(trip):
+    day_id = trip.day_id(0)
+    trip.pop(0)
+    with pytest.raises(KeyError):
+        trip.index_of(day_id)
+
+
+# ----------------------------------------------------------------------------
+# Bulk generation and range operations
+# ----------------------------------------------------------------------------
+
+def test_generate_days_from_a_template(trip):
+    trip.generate_days(5, template={'location': 'Hanoi', 'transport_cost': 4.0, 'id': 99},
+                       first_date='2024-05-30')
+    assert len(trip) == 25
+    new = trip.to_records()[20:]
+    assert [day['date'] for day in new] == ['2024-05-30', '2024-05-31', '2024-06-01', '2024-06-02', '2024-06-03']
+    assert {day['location'] for day in new} == {'Hanoi'}
+    assert len(set(trip.column('id').tolist())) == 25
+    assert_aggregates_match(trip)
+
+
+def test_duplicate_range(days, trip):
+    ids = trip.column('id').tolist()
+    assert trip.duplicate_range(2, 5) == 5
+    assert len(trip) == 23
+    assert locations(trip)[5:8] == [day['location'] for day in days[2:5]]
+    assert [trip.get_value(i, 'date') for i in range(5, 8)] == ['', '', '']
+    assert trip.column('id').tolist()[:5] == ids[:5]
+
+    assert trip.duplicate_range(0, 2, before=0, clear_dates=False) == 0
+    assert trip.get_value(1, 'date') == days[1]['date']
+    assert_aggregates_match(trip)
+
+
+def test_shift_dates_leaves_undated_days(days, trip):
+    revisions = trip.column('revision').tolist()
+    trip.shift_dates(-3, 0, 5)
+    assert [trip.get_value(i, 'date') for i in range(5)] == ['', '2023-12-30', '2023-12-31', '2024-01-01', '']
+    assert trip.get_value(5, 'date') == days[5]['date']
+    # Shifted rows get new revisions so their widgets refresh
+    assert all(a != b for a, b in zip(trip.column('revision').tolist()[:5], revisions[:5]))
+    assert trip.column('revision').tolist()[5:] == revisions[5:]
+
+
+@pytest.mark.parametrize("amount, percent", [(5.0, 0.0), (-100.0, 0.0), (0.0, 10.0), (2.0, -50.0)])
+def test_adjust_costs(days, trip, amount, percent):
+    trip.adjust_costs(['transport_cost'], 4, 10, amount=amount, percent=percent)
+    for i, day in enumerate(days):
+        expected = day['transport_cost']
+        if 4 <= i < 10:
+            expected = max(float(np.round(expected * (1 + percent / 100) + amount, 2)), 0.0)
+        assert trip.get_value(i, 'transport_cost') == pytest.approx(expected)
+    assert_aggregates_match(trip)
+
+
+def test_mutation_sequence_keeps_aggregates(trip):
+    trip.move(0, 10)
+    trip.insert(2, make_days(1)[0])
+    trip.pop(-1)
+    trip.update_day(5, {'transport_cost': 99.0, 'location': '', 'transport_type': 'Ferry'})
+    trip.duplicate_range(3, 6)
+    trip.truncate(15)
+    trip.generate_days(4, template=trip.get_day(0))
+    trip.adjust_costs(['accommodation_cost'], 0, 8, percent=-20)
+    assert_aggregates_match(trip)
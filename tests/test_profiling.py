@@ -0,0 +1,105 @@
+import json
+import threading
+
+import pytest
+
+from profiling import DURATION_BUCKETS, Profiler, profiling_forced, session_state_size
+
+
+@pytest.fixture
+def profiler():
+    return Profiler()
+
+
+def test_nothing_is_timed_until_a_run_starts(profiler):
+    with profiler.section("idle"):
+        pass
+
+    @profiler.timed()
+    def work():
+        return 42
+
+    assert work() == 42
+    assert profiler.snapshot()['sections'] == {}
+
+
+def test_run_report_and_aggregates(profiler):
+    profiler.start_run()
+    assert profiler.active
+    with profiler.section("render"):
+        pass
+    with profiler.section("render"):
+        pass
+
+    @profiler.timed("save")
+    def save():
+        return True
+
+    save()
+    report = profiler.end_run(days=12)
+    assert not profiler.active
+    assert report['sections']['render']['count'] == 2
+    assert report['sections']['save']['count'] == 1
+    assert report['gauges'] == {'days': 12}
+    assert profiler.end_run() == {}
+
+    snapshot = profiler.snapshot()
+    assert snapshot['runs'] == 1
+    assert set(snapshot['sections']) == {'render', 'save', 'run'}
+    assert snapshot['sections']['render']['count'] == 2
+    assert json.loads(profiler.to_json())['last_run']['gauges'] == {'days': 12}
+
+
+def test_timings_on_other_threads_only_feed_the_aggregates(profiler):
+    profiler.start_run()
+    thread = threading.Thread(target=lambda: profiler.record("auto_save", 0.02))
+    thread.start()
+    thread.join()
+    report = profiler.end_run()
+    assert 'auto_save' not in report['sections']
+    assert profiler.snapshot()['sections']['auto_save']['count'] == 1
+
+
+def test_prometheus_output(profiler):
+    profiler.in_use = True
+    for seconds in (0.002, 0.002, 0.3):
+        profiler.record('day "list"', seconds)
+    profiler.start_run()
+    profiler.end_run(days=3, label="not a number")
+    text = profiler.to_prometheus()
+    lines = text.splitlines()
+
+    assert "# TYPE planner_section_duration_seconds histogram" in lines
+    section = 'section="day \\"list\\""'
+    buckets = [line for line in lines if line.startswith(f"planner_section_duration_seconds_bucket{{{section}")]
+    assert len(buckets) == len(DURATION_BUCKETS) + 1
+    # Buckets are cumulative and end at the count
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts) and counts[-1] == 3
+    assert f'planner_section_duration_seconds_bucket{{{section},le="0.005"}} 2' in lines
+    assert f'planner_section_duration_seconds_count{{{section}}} 3' in lines
+    assert f'planner_section_duration_seconds_max{{{section}}} 0.3' in lines
+    assert "planner_profiled_runs_total 1" in lines
+    assert "planner_last_run_days 3" in lines
+    assert "label" not in text
+    assert text.endswith("\n")
+
+
+def test_reset(profiler):
+    profiler.start_run()
+    profiler.end_run()
+    profiler.reset()
+    assert profiler.snapshot() == {'runs': 0, 'sections': {}, 'last_run': {}}
+
+
+def test_profiling_forced(monkeypatch):
+    monkeypatch.setenv("PLANNER_PROFILE", "0")
+    assert not profiling_forced()
+    monkeypatch.setenv("PLANNER_PROFILE", "1")
+    assert profiling_forced()
+
+
+def test_session_state_size_skips_unpicklable_values():
+    size = session_state_size({'trip': list(range(100)), 'lock': threading.Lock()})
+    assert size['session_state_keys'] == 2
+    assert size['session_state_bytes'] > 100
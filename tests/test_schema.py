@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from schema import BUDGET_SCHEMA, DAY_SCHEMA, Choice, Date, Field, Number, Text, coerce_trip
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    (Number(), '12.5', 12.5),
+    (Number(), '', 0.0),
+    (Number(1, minimum=1, maximum=20, integer=True), 3.0, 3),
+    (Date(), '2024-02-29', date(2024, 2, 29)),
+    (Date(), '', None),
+    (Choice(['Bus', 'Train'], 'Bus'), 'train', 'Train'),
+    (Text(), 7, '7'),
+])
+def test_valid_values(field, value, expected):
+    assert field.coerce(value) == expected
+
+
+@pytest.mark.parametrize("field, value", [
+    (Number(), 'abc'),
+    (Number(), -1),
+    (Number(), float('nan')),
+    (Number(), True),
+    (Number(1, minimum=1, maximum=20, integer=True), 21),
+    (Date(), '2024-02-30'),
+    (Choice(['Bus', 'Train'], 'Bus'), 'Hovercraft'),
+    (Text(), ['a']),
+])
+def test_invalid_values(field, value):
+    with pytest.raises((TypeError, ValueError)):
+        field.coerce(value)
+
+
+def test_field_subclasses_must_implement_coerce():
+    class Unfinished(Field):
+        pass
+
+    with pytest.raises(TypeError):
+        Unfinished(0)
+
+
+def test_coerce_columns_reports_problems_by_row():
+    columns, problems = DAY_SCHEMA.coerce_columns({
+        'location': ['a', 'b', 'c'],
+        'transport_cost': [1, 'x', 3],
+        'date': ['2024-01-01', '', 'bad'],
+    })
+    assert columns['transport_cost'] == [1.0, 0.0, 3.0]
+    assert columns['transport_type'] == [DAY_SCHEMA.fields['transport_type'].default] * 3
+    assert [(row, field) for row, field, _ in problems] == [(1, 'transport_cost'), (2, 'date')]
+    with pytest.raises(ValueError):
+        DAY_SCHEMA.coerce_columns({'location': ['a'], 'notes': []})
+
+
+def test_coerce_record_keeps_unknown_keys():
+    record, problems = BUDGET_SCHEMA.coerce({'total_budget': '900', 'food_budget': 'lots', 'extra': 1})
+    assert record['total_budget'] == 900.0
+    assert record['food_budget'] == 0.0
+    assert record['extra'] == 1
+    assert [field for _, field, _ in problems] == ['food_budget']
+    assert BUDGET_SCHEMA.coerce([1])[1][0][2] == "budget_data is not an object"
+
+
+def test_coerce_trip_messages():
+    data, messages = coerce_trip({'trip_columns': {'transport_cost': ['x']}, 'trip_info': {'group_size': 0}})
+    assert messages[0].startswith("day 1 transport_cost:")
+    assert messages[1].startswith("trip_info.group_size:")
+    assert data['trip_info']['group_size'] == 1
@@ -0,0 +1,114 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from itinerary import DAY_DEFAULTS
+from serialization import (FORMAT_VERSION, Codec, available_formats, encode_trip_info, get_codec, migrate,
+                           revive, sniff_codec)
+from storage_backends import DEFAULT_TRIP_ID, JsonFileBackend
+
+DOCUMENT = {'version': FORMAT_VERSION, 'trip_info': {'name': 'Iberia', 'start_date': date(2024, 1, 1)},
+            'last_saved': datetime(2024, 1, 2, 9, 30), 'trip_columns': {'location': ['Lisbon', 'Évora']}}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+def test_codecs_round_trip_dates(name):
+    if not available_formats()[name]:
+        pytest.skip(f"{name} is not installed")
+    codec = get_codec(name)
+    raw = codec.dumps(DOCUMENT)
+    assert sniff_codec(raw).binary == codec.binary
+
+    data = revive(sniff_codec(raw).loads(raw))
+    assert data['trip_info']['start_date'] == date(2024, 1, 1)
+    assert data['trip_columns']['location'] == ['Lisbon', 'Évora']
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_codec_subclasses_must_implement_both_methods():
+    class DumpsOnly(Codec):
+        def dumps(self, obj):
+            return b''
+
+    with pytest.raises(TypeError):
+        DumpsOnly()
+
+
+def test_encode_trip_info_turns_dates_into_date_objects():
+    info = encode_trip_info({'name': 'x', 'start_date': '2024-01-05', 'end_date': datetime(2024, 1, 9, 8)})
+    assert info['start_date'] == date(2024, 1, 5)
+    assert info['end_date'] == date(2024, 1, 9)
+
+
+def test_migrate_1_0_to_columns():
+    data = migrate({'version': '1.0', 'trip_data': [{'location': 'Paris', 'transport_cost': 5},
+                                                    {'location': 'Lyon', 'notes': 'late'}]})
+    assert data['version'] == FORMAT_VERSION
+    assert 'trip_data' not in data
+    assert set(data['trip_columns']) == set(DAY_DEFAULTS)
+    assert data['trip_columns']['location'] == ['Paris', 'Lyon']
+    assert data['trip_columns']['notes'] == [None, 'late']
+
+
+def test_migrate_rejects_unknown_versions():
+    with pytest.raises(ValueError):
+        migrate({'version': '0.3'})
+
+
+# ----------------------------------------------------------------------------
+# 1.0 files with malformed fields
+# ----------------------------------------------------------------------------
+
+LEGACY_DAYS = [
+    {'day': 1, 'date': '2024-01-01', 'location': 'Paris', 'transport_cost': 'abc', 'notes': ['a']},
+    {'day': 2, 'date': 'not a date', 'location': 'Lyon', 'transport_cost': '12.5', 'transport_type': 'train'},
+    {'day': 3, 'date': '', 'location': 'Nice', 'accommodation_type': 'Castle', 'accommodation_cost': 40},
+    'junk'
+]
+
+
+def write_legacy(path, **extra):
+    data = {'version': '1.0', 'trip_data': LEGACY_DAYS, 'budget_data': {'total_budget': 800},
+            'trip_info': {'name': 'Old trip', 'start_date': '2024-01-01'}}
+    data.update(extra)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_legacy_file_with_malformed_fields_loads(tmp_path, capsys):
+    path = str(tmp_path / "trip_data.json")
+    write_legacy(path)
+
+    data = JsonFileBackend(path).load(DEFAULT_TRIP_ID)
+    days = data['trip_data'].to_records()
+    assert [day['location'] for day in days] == ['Paris', 'Lyon', 'Nice', '']
+
+    # Bad values take their defaults; good ones on the same row survive
+    assert days[0]['transport_cost'] == 0.0
+    assert days[0]['date'] == '2024-01-01'
+    assert days[0]['notes'] == ''
+    assert days[1]['date'] == ''
+    assert days[1]['transport_cost'] == 12.5
+    assert days[1]['transport_type'] == 'Train'
+    assert days[2]['accommodation_type'] == DAY_DEFAULTS['accommodation_type']
+    assert days[2]['accommodation_cost'] == 40.0
+
+    assert data['budget_data']['total_budget'] == 800.0
+    assert data['trip_info']['start_date'] == date(2024, 1, 1)
+
+    output = capsys.readouterr().out
+    assert "day 1 transport_cost" in output
+    assert "day 3 accommodation_type" in output
+    assert "not objects" in output
+
+
+def test_legacy_trip_data_must_be_a_list(tmp_path):
+    path = str(tmp_path / "trip_data.json")
+    write_legacy(path, trip_data={'day': 1})
+    with pytest.raises(ValueError):
+        JsonFileBackend(path).load(DEFAULT_TRIP_ID)
@@ -0,0 +1,81 @@
+import pytest
+
+from itinerary import Itinerary
+from session_store import SPILL_MARKER, SessionStore
+from tests.helpers import make_days
+
+BUDGET = {'total_budget': 900.0, 'currency': 'GBP'}
+TRIP_INFO = {'name': 'Spilled', 'start_date': None, 'end_date': None, 'description': ''}
+
+
+@pytest.fixture
+def store(tmp_path):
+    open_sessions = {'a', 'b'}
+    store = SessionStore(str(tmp_path), idle_timeout=0, sweep_interval=3600,
+                         session_exists=lambda session_id: session_id in open_sessions)
+    store.open_sessions = open_sessions
+    yield store
+    store.stop(1.0)
+
+
+def run_once(store, session_id, state):
+    store.checkin(session_id, state)
+    state.setdefault('trip_data', Itinerary(make_days(4)))
+    state.setdefault('budget_data', dict(BUDGET))
+    state.setdefault('trip_info', dict(TRIP_INFO))
+    state['figure_cache'] = object()
+    store.checkout(session_id, state)
+
+
+def test_idle_session_spills_and_comes_back(store):
+    state = {}
+    run_once(store, 'a', state)
+    records = state['trip_data'].to_records()
+    ids = state['trip_data'].column('id').tolist()
+    revisions = state['trip_data'].column('revision').tolist()
+
+    assert store.sweep() == 1
+    assert SPILL_MARKER in state
+    assert 'trip_data' not in state and 'figure_cache' not in state
+
+    assert store.checkin('a', state)
+    assert state['trip_data'].to_records() == records
+    assert state['budget_data']['total_budget'] == 900.0
+    # Day ids and revisions survive, so widgets and callbacks holding them still work
+    assert state['trip_data'].column('id').tolist() == ids
+    assert state['trip_data'].column('revision').tolist() == revisions
+    assert SPILL_MARKER not in state
+
+
+def test_running_sessions_are_not_spilled(store):
+    state = {}
+    run_once(store, 'a', state)
+    store.checkin('a', state)
+    assert store.sweep() == 0
+    assert 'trip_data' in state
+
+
+def test_closed_sessions_are_forgotten_with_their_spills(store):
+    state = {}
+    run_once(store, 'b', state)
+    assert store.sweep() == 1
+    assert store.manager_for('b').load_data() is not None
+
+    store.open_sessions.discard('b')
+    store.sweep()
+    assert store.stats()['spilled_sessions'] == 0
+    assert store.manager_for('b').load_data() is None
+
+
+def test_spill_file_that_no_longer_matches_gets_fresh_ids(store):
+    state = {}
+    run_once(store, 'a', state)
+    store.sweep()
+    manager = store.manager_for('a')
+    data = manager.load_data()
+    data['trip_data'].pop()
+    manager.save_data(data['trip_data'], data['budget_data'], data['trip_info'])
+    manager.release()
+
+    assert store.checkin('a', state)
+    assert len(state['trip_data']) == 3
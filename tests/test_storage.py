@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from datetime import date
+
+import pytest
+
+from itinerary import Itinerary
+from serialization import available_formats
+from storage_backends import JournaledJsonFile, JsonFileBackend, SQLiteBackend
+from tests.helpers import make_days
+
+BUDGET = {'total_budget': 1500.0, 'food_budget': 300.0, 'activities_budget': 0.0, 'shopping_budget': 0.0,
+          'misc_costs': 0.0, 'emergency_budget': 0.0, 'insurance_cost': 0.0, 'currency': 'EUR'}
+TRIP_INFO = {'name': 'Iberia', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 20),
+             'destinations': 'Spain, Portugal', 'travel_style': '🎒 Budget Backpacker (£25-40/day)',
+             'group_size': 2, 'transport_preference': '🚌 Bus', 'accommodation_preference': '🏠 Hostels'}
+
+
+def assert_same_trip(data, trip, budget=BUDGET, trip_info=TRIP_INFO):
+    assert data['trip_data'].to_records() == trip.to_records()
+    assert data['budget_data'] == budget
+    assert data['trip_info'] == trip_info
+
+
+def edit(trip):
+    """A save's worth of changes: one edit, one insert, one removal"""
+    trip.update_day(2, {'location': 'Coimbra', 'transport_cost': 7.5})
+    trip.insert(5, {'location': 'Évora', 'date': '2024-02-01'})
+    trip.pop(-1)
+
+
+# ----------------------------------------------------------------------------
+# Journaled JSON files
+# ----------------------------------------------------------------------------
+
+def test_saves_after_the_first_go_to_the_journal(tmp_path):
+    path = str(tmp_path / "trip.json")
+    trip = Itinerary(make_days(12))
+    store = JournaledJsonFile(path)
+    store.save(trip, BUDGET, TRIP_INFO)
+    snapshot = open(path, 'rb').read()
+
+    edit(trip)
+    store.save(trip, dict(BUDGET, food_budget=250.0), TRIP_INFO)
+    assert open(path, 'rb').read() == snapshot
+    with open(f"{path}.journal", 'rb') as f:
+        assert len(f.readlines()) == 1
+
+    # A fresh reader replays the journal over the snapshot
+    assert_same_trip(JournaledJsonFile(path).load(), trip, dict(BUDGET, food_budget=250.0))
+
+
+def test_torn_journal_line_is_dropped(tmp_path):
+    path = str(tmp_path / "trip.json")
+    trip = Itinerary(make_days(8))
+    store = JournaledJsonFile(path)
+    store.save(trip, BUDGET, TRIP_INFO)
+    edit(trip)
+    store.save(trip, BUDGET, TRIP_INFO)
+    good_size = os.path.getsize(f"{path}.journal")
+
+    # A crash mid-append leaves half a line
+    with open(f"{path}.journal", 'ab') as f:
+        f.write(b'{"seq": 2, "length": 3, "days": {"0": {"loc')
+
+    assert_same_trip(JournaledJsonFile(path).load(), trip)
+    assert os.path.getsize(f"{path}.journal") == good_size
+
+    # The next append starts on a clean line
+    reader = JournaledJsonFile(path)
+    reader.load()
+    trip.update_day(0, {'notes': 'after the crash'})
+    reader.save(trip, BUDGET, TRIP_INFO)
+    assert_same_trip(JournaledJsonFile(path).load(), trip)
+
+
+def test_journal_entries_are_schema_checked(tmp_path, capsys):
+    path = str(tmp_path / "trip.json")
+    trip = Itinerary(make_days(3))
+    JournaledJsonFile(path).save(trip, BUDGET, TRIP_INFO)
+    entry = {"seq": 1, "length": 3, "days": {"1": {"location": "Faro", "transport_cost": -4}},
+             "last_saved": "2024-01-05T10:00:00"}
+    with open(f"{path}.journal", 'ab') as f:
+        f.write(json.dumps(entry).encode('utf-8') + b"\n")
+
+    data = JournaledJsonFile(path).load()
+    assert data['trip_data'].get_value(1, 'location') == 'Faro'
+    assert data['trip_data'].get_value(1, 'transport_cost') == 0.0
+
+
+def test_compaction_folds_the_journal(tmp_path):
+    path = str(tmp_path / "trip.json")
+    trip = Itinerary(make_days(5))
+    store = JournaledJsonFile(path, compact_every=3)
+    store.save(trip, BUDGET, TRIP_INFO)
+    for i in range(3):
+        trip.update_day(i, {'notes': f"edit {i}"})
+        store.save(trip, BUDGET, TRIP_INFO)
+    assert not os.path.exists(f"{path}.journal")
+    assert_same_trip(JournaledJsonFile(path).load(), trip)
+
+
+# ----------------------------------------------------------------------------
+# Round trips through every backend and codec
+# ----------------------------------------------------------------------------
+
+def make_backend(kind, tmp_path):
+    if kind == 'sqlite':
+        return SQLiteBackend(str(tmp_path / "trips.db"))
+    if not available_formats()[kind]:
+        pytest.skip(f"{kind} is not installed")
+    return JsonFileBackend(str(tmp_path / "trip_data.json"), file_format=kind)
+
+
+@pytest.mark.parametrize("kind", ["json", "orjson", "msgpack", "sqlite"])
+def test_round_trip(tmp_path, kind):
+    trip = Itinerary(make_days(15))
+    backend = make_backend(kind, tmp_path)
+    backend.save("iberia", trip, BUDGET, TRIP_INFO)
+    edit(trip)
+    backend.save("iberia", trip, BUDGET, dict(TRIP_INFO, name='Iberia 2'))
+
+    # A new backend reads from disk, not from the first one's cache
+    reader = make_backend(kind, tmp_path)
+    data = reader.load("iberia")
+    assert_same_trip(data, trip, trip_info=dict(TRIP_INFO, name='Iberia 2'))
+    assert reader.load("missing") is None
+
+    assert reader.delete("iberia")
+    assert make_backend(kind, tmp_path).load("iberia") is None
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_incremental_saves_after_load(tmp_path, kind):
+    """Saving a loaded copy writes only what changed, and nothing is lost"""
+    backend = make_backend(kind, tmp_path)
+    backend.save("trip", Itinerary(make_days(30)), BUDGET, TRIP_INFO)
+
+    trip = backend.load("trip")['trip_data']
+    trip.truncate(20)
+    trip.update_day(19, {'location': 'Tavira'})
+    backend.save("trip", trip, BUDGET, TRIP_INFO)
+    trip.generate_days(3, first_date=date(2024, 3, 1))
+    backend.save("trip", trip, BUDGET, TRIP_INFO)
+
+    assert_same_trip(make_backend(kind, tmp_path).load("trip"), trip)
+
+
+def test_sqlite_loads_racing_saves_stay_consistent(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "trips.db"))
+    trip = Itinerary(make_days(10))
+    backend.save("trip", trip, BUDGET, TRIP_INFO)
+    errors = []
+
+    def load_repeatedly():
+        try:
+            for _ in range(30):
+                data = backend.load("trip")
+                assert len(data['trip_data']) in (9, 10)
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=load_repeatedly) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for i in range(30):
+        if i % 2:
+            trip.append({'location': f"Stop {i}"})
+        else:
+            trip.pop()
+        trip.update_day(0, {'notes': f"save {i}"})
+        backend.save("trip", trip, BUDGET, TRIP_INFO)
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    backend.release("trip")
+    assert_same_trip(backend.load("trip"), trip)
+    # The next save after a reload is still incremental and complete
+    trip.update_day(1, {'location': 'Tavira'})
+    backend.save("trip", trip, BUDGET, TRIP_INFO)
+    assert_same_trip(SQLiteBackend(str(tmp_path / "trips.db")).load("trip"), trip)
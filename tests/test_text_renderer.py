@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from exporters import TextItineraryRenderer
+from itinerary import Itinerary
+from tests.helpers import make_days
+
+TRIP_INFO = {'name': 'Iberia', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 6)}
+
+
+class CountingRenderer(TextItineraryRenderer):
+    def __init__(self):
+        super().__init__()
+        self.rendered = []
+
+    def render_day(self, day, cost, target='plain'):
+        self.rendered.append(day['day'])
+        return super().render_day(day, cost, target)
+
+
+@pytest.fixture
+def renderer():
+    return CountingRenderer()
+
+
+def test_plain_output(renderer):
+    trip = Itinerary([
+        {'location': 'Lisbon', 'date': '2024-01-01', 'transport_cost': 10.0, 'accommodation_cost': 20.0,
+         'notes': 'Tram 28'},
+        {'location': 'Porto', 'accommodation_name': 'Yellow House', 'accommodation_cost': 15.0}
+    ])
+    text = renderer.render(trip, TRIP_INFO)
+
+    assert text.startswith("🎒 Iberia\n")
+    assert "📅 2024-01-01 → 2024-01-06\n🌍 2 days of adventure\n" in text
+    assert "📍 Day 1 - Lisbon\n📅 Date: 2024-01-01\n" in text
+    assert "📝 Notes: Tram 28\n💰 Daily Cost: £30.00\n" in text
+    assert "📍 Day 2 - Porto\n" in text and "   Place: Yellow House\n" in text
+    # Optional lines are left out when their field is empty
+    assert text.count("📝 Notes:") == 1
+    assert "💰 Total Trip Cost: £45.00\n🎒 Total Days: 2\n📊 Average Daily Cost: £22.50\n" in text
+    assert text.endswith("Safe travels! 🎒")
+
+
+def test_markdown_target_and_export(renderer):
+    trip = Itinerary(make_days(3))
+    text = renderer.render(trip, TRIP_INFO, target='markdown')
+    assert text.startswith("# 🎒 Iberia\n\n")
+    assert "## 📍 Day 3 - Madrid\n\n" in text
+    assert renderer.export(trip, TRIP_INFO, target='markdown').getvalue().decode('utf-8') == text
+
+
+def test_only_changed_days_are_rendered_again(renderer):
+    trip = Itinerary(make_days(6))
+    first = renderer.render(trip, TRIP_INFO)
+    assert renderer.rendered == [1, 2, 3, 4, 5, 6]
+
+    renderer.rendered.clear()
+    assert renderer.render(trip, TRIP_INFO) == first
+    assert renderer.rendered == []
+
+    trip.update_day(3, {'location': 'Toledo'})
+    text = renderer.render(trip, TRIP_INFO)
+    assert renderer.rendered == [4]
+    assert "📍 Day 4 - Toledo\n" in text
+    assert text == TextItineraryRenderer().render(trip, TRIP_INFO)
+
+
+def test_renumbered_days_are_rendered_again(renderer):
+    trip = Itinerary(make_days(4))
+    renderer.render(trip, TRIP_INFO)
+    renderer.rendered.clear()
+
+    trip.pop(0)
+    text = renderer.render(trip, TRIP_INFO)
+    assert renderer.rendered == [1, 2, 3]
+    assert text == TextItineraryRenderer().render(trip, TRIP_INFO)
+
+
+def test_cache_holds_only_the_current_trip(renderer):
+    trip = Itinerary(make_days(10))
+    renderer.render(trip, TRIP_INFO)
+    renderer.render(trip, TRIP_INFO, target='markdown')
+    trip.truncate(2)
+    renderer.render(trip, TRIP_INFO)
+    assert len(renderer._blocks) == 2 + 10
+    assert TextItineraryRenderer().render(Itinerary(), TRIP_INFO).count("Average Daily Cost") == 0